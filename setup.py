@@ -37,15 +37,22 @@ setup(
         "wai_spectralio>=0.0.5",
         "wai_ma",
     ],
+    extras_require={
+        "hdf5": ["h5py"],
+    },
     version="0.1.0",
     author='Peter Reutemann',
     author_email='fracpete@waikato.ac.nz',
     entry_points={
         "console_scripts": [
+            "sdc-benchmark-startup=sdc.tool.benchmark_startup:sys_main",
+            "sdc-client=sdc.tool.client:sys_main",
             "sdc-convert=sdc.tool.convert:sys_main",
+            "sdc-daemon=sdc.tool.daemon:sys_main",
             "sdc-exec=sdc.tool.exec:sys_main",
             "sdc-find=sdc.tool.find:sys_main",
             "sdc-help=sdc.tool.help:sys_main",
+            "sdc-merge=sdc.tool.merge:sys_main",
             "sdc-registry=sdc.registry:sys_main",
             "sdc-test-generator=sdc.tool.test_generator:sys_main",
         ],
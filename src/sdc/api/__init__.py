@@ -1,9 +1,25 @@
 from ._data import Spectrum, SampleData, SAMPLE_ID, SAMPLE_TYPE
+from ._arrays import ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA, ARRAY_NAMES, DTYPES, DTYPE_FLOAT32, DTYPE_FLOAT64
+from ._arrays import NO_SAMPLE_ID, encode_sample_data, decode_sample_data, spectra_to_arrays, arrays_to_spectrum, has_sample_id, generate_spectrum_name, import_h5py
 from ._2d import Spectrum2D, spectrum_to_matrix, spectra_to_matrix, matrix_to_spectrum, matrix_to_spectra
 from ._filter import Filter, BatchFilter, TrainableBatchFilter
 from ._spectralio import SpectralIOBased
+from ._compression import COMPRESSIONS, COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_BZ2, COMPRESSION_XZ, COMPRESSION_ZSTD, COMPRESSION_EXTENSIONS
+from ._compression import add_compression_option, add_sniff_compression_option, detect_compression, compression_from_extension, compression_from_magic, strip_compression_extension, compressed_path, output_compression, open_input, open_output, decompress_fileobj
+from ._inputs import InputFiles, add_lazy_option, iterate_files, locate_input_files
+from ._shard import SHARD_OPTION, add_shard_option, parse_shard, shard_root, shard_key, in_shard, set_session_shard, get_session_shard, shard_suffix, shard_path
+from ._micro_batch import MicroBatcher, add_micro_batch_options, micro_batching_enabled, locate_other_input_files, \
+    GLOB_NAME_PLACEHOLDER
+from ._checkpoint import CheckpointSupporter, CheckpointedExecution, load_checkpoint, save_checkpoint
+from ._stage_cache import DEFAULT_CACHE_SIZE, StageCache, cache_key
+from ._spill import SPILL_SAMPLE_SIZE, GroupSpill
+from ._model_store import ModelStore, get_model_store
+from ._async import OVERFLOWS, OVERFLOW_BLOCK, OVERFLOW_DROP, DEFAULT_QUEUE_SIZE, AsyncSubFlow, AsyncSubFlowSupporter, add_async_options
+from ._prefetch import Prefetcher, add_prefetch_option, add_parse_processes_option, open_bytes
 from ._reader import Reader, SpectralIOReader, SpectralIOReaderWithLocaleSupport, add_locale_option
 from ._reader import SampleDataReader
 from ._writer import DefaultExtensionWriter, SpectralIOWriter
 from ._writer import SampleDataBatchWriter, SampleDataStreamWriter, SplittableSampleDataBatchWriter, SplittableSampleDataStreamWriter
+from ._sqlite import DEFAULT_TABLE, WAVES_TABLE_SUFFIX, COLUMN_ID, COLUMN_SAMPLE_ID, COLUMN_WAVES_ID, COLUMN_AMPLITUDES, COLUMN_DTYPE, COLUMN_WAVES, COLUMNS, quote_identifier
 from ._cleaner import Cleaner, parse_cleaner
+from ._pipeline import PluginSpec, Pipeline, create_plugin, options_to_args
@@ -0,0 +1,163 @@
+import json
+import os
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+from wai.spectralio.api import Spectrum as WaiSpectrum
+
+from ._compression import strip_compression_extension
+
+NO_SAMPLE_ID = "noid"
+""" the sample ID that wai.spectralio uses if no ID was set. """
+
+ARRAY_AMPLITUDES = "amplitudes"
+""" the 2-D matrix with the amplitudes, one row per spectrum. """
+
+ARRAY_WAVES = "waves"
+""" the wave numbers, either 1-D (shared axis) or 2-D (one row per spectrum). """
+
+ARRAY_IDS = "ids"
+""" the sample IDs. """
+
+ARRAY_SAMPLE_DATA = "sample_data"
+""" the sample data, one JSON-encoded dictionary per spectrum. """
+
+ARRAY_NAMES = [
+    ARRAY_AMPLITUDES,
+    ARRAY_WAVES,
+    ARRAY_IDS,
+    ARRAY_SAMPLE_DATA,
+]
+
+DTYPE_FLOAT32 = "float32"
+DTYPE_FLOAT64 = "float64"
+DTYPES = [
+    DTYPE_FLOAT32,
+    DTYPE_FLOAT64,
+]
+
+
+def encode_sample_data(sample_data: Optional[Dict[str, Any]]) -> str:
+    """
+    Turns the sample data into a JSON string.
+
+    :param sample_data: the sample data to encode, can be None
+    :type sample_data: dict
+    :return: the JSON string
+    :rtype: str
+    """
+    if sample_data is None:
+        sample_data = dict()
+    return json.dumps(sample_data, default=str)
+
+
+def decode_sample_data(sample_data: str) -> Dict[str, Any]:
+    """
+    Turns the JSON string back into sample data.
+
+    :param sample_data: the JSON string to decode
+    :type sample_data: str
+    :return: the sample data
+    :rtype: dict
+    """
+    if len(sample_data) == 0:
+        return dict()
+    return json.loads(sample_data)
+
+
+def spectra_to_arrays(spectra: List[WaiSpectrum], dtype: str = DTYPE_FLOAT64) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turns the spectra into amplitude matrix, wave numbers, IDs and sample data.
+    Spectra without sample ID get an empty ID. The wave numbers are 1-D if all spectra share the same wave axis, otherwise 2-D.
+
+    :param spectra: the spectra to convert
+    :type spectra: list
+    :param dtype: the data type to use for amplitudes and wave numbers
+    :type dtype: str
+    :return: the tuple of amplitudes, waves, IDs and sample data
+    :rtype: tuple
+    """
+    if len(spectra) == 0:
+        raise Exception("No spectra to convert!")
+    lengths = set([len(sp.amplitudes) for sp in spectra])
+    if len(lengths) > 1:
+        raise Exception("Spectra must all have the same number of wave numbers, encountered: %s" % str(sorted(lengths)))
+
+    amplitudes = np.array([sp.amplitudes for sp in spectra], dtype=dtype)
+    waves = np.array([sp.waves for sp in spectra], dtype=dtype)
+    if np.all(waves == waves[0]):
+        waves = waves[0]
+    ids = np.array([(str(sp.id) if has_sample_id(sp) else "") for sp in spectra], dtype=str)
+    sample_data = np.array([encode_sample_data(sp.sample_data) for sp in spectra], dtype=str)
+    return amplitudes, waves, ids, sample_data
+
+
+def arrays_to_spectrum(amplitudes: np.ndarray, waves: np.ndarray, sample_id: Optional[str] = None,
+                       sample_data: Optional[str] = None) -> WaiSpectrum:
+    """
+    Turns a row of the arrays back into a spectrum.
+
+    :param amplitudes: the amplitudes (1-D)
+    :type amplitudes: np.ndarray
+    :param waves: the wave numbers (1-D)
+    :type waves: np.ndarray
+    :param sample_id: the sample ID, can be None
+    :type sample_id: str
+    :param sample_data: the JSON-encoded sample data, can be None
+    :type sample_data: str
+    :return: the spectrum
+    :rtype: WaiSpectrum
+    """
+    result = WaiSpectrum(waves=np.asarray(waves).tolist(), amplitudes=np.asarray(amplitudes).tolist(),
+                         sample_data=dict() if sample_data is None else decode_sample_data(str(sample_data)))
+    if (sample_id is not None) and (len(sample_id) > 0):
+        result.id = str(sample_id)
+    return result
+
+
+def has_sample_id(spectrum: WaiSpectrum) -> bool:
+    """
+    Returns whether the spectrum has an actual sample ID, i.e., not empty or the default one.
+
+    :param spectrum: the spectrum to check
+    :type spectrum: WaiSpectrum
+    :return: True if an ID is present
+    :rtype: bool
+    """
+    return (spectrum.id is not None) and (len(str(spectrum.id)) > 0) and (spectrum.id != NO_SAMPLE_ID)
+
+
+def generate_spectrum_name(spectrum: WaiSpectrum, source: Optional[str], index: int) -> str:
+    """
+    Returns the name for a spectrum read from a file that can contain multiple spectra:
+    the sample ID if present, otherwise the name of the file (without extension) and the index.
+
+    :param spectrum: the spectrum to generate the name for
+    :type spectrum: WaiSpectrum
+    :param source: the file the spectrum came from, None if from a file-like object
+    :type source: str
+    :param index: the 1-based index of the spectrum in the file
+    :type index: int
+    :return: the name
+    :rtype: str
+    """
+    if has_sample_id(spectrum):
+        return str(spectrum.id)
+    if source is None:
+        prefix = "direct"
+    else:
+        prefix = os.path.splitext(strip_compression_extension(os.path.basename(source)))[0]
+    return "%s-%d" % (prefix, index)
+
+
+def import_h5py():
+    """
+    Imports the h5py library, which is only required for the HDF5 plugins.
+
+    :return: the h5py module
+    """
+    try:
+        import h5py
+        return h5py
+    except ImportError:
+        raise Exception("The 'h5py' library is required for HDF5 files, e.g., install with: pip install spectral_data_converter[hdf5]")
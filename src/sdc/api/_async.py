@@ -0,0 +1,250 @@
+import argparse
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+from kasperl.api import safe_deepcopy
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP = "drop"
+OVERFLOWS = [
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP,
+]
+
+DEFAULT_QUEUE_SIZE = 100
+""" the default number of pending records for asynchronous sub-flows. """
+
+_STOP = object()
+""" marker for terminating the worker. """
+
+
+def add_async_options(parser: argparse.ArgumentParser):
+    """
+    Adds the options for executing a sub-flow asynchronously to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--async_sub_flow", action="store_true", help="Whether to execute the sub-flow in a separate worker thread rather than in the main pipeline. The sub-flow receives copies of the records.", required=False)
+    parser.add_argument("--queue_size", type=int, help="The maximum number of records that can be pending for the asynchronous sub-flow.", required=False, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--overflow", choices=OVERFLOWS, help="What to do when the queue of the asynchronous sub-flow is full: '" + OVERFLOW_BLOCK + "' waits for space to become available, '" + OVERFLOW_DROP + "' skips the record.", required=False, default=OVERFLOW_BLOCK)
+
+
+class AsyncSubFlow:
+    """
+    Executes a sub-flow in a worker thread, fed via a bounded queue. The worker receives
+    deep copies of the data, as the sub-flow may modify records (eg their meta-data) while
+    the main pipeline continues processing them. Once the sub-flow failed, any further data
+    gets skipped and the error gets raised in the main pipeline with every submit and when
+    flushing.
+    """
+
+    def __init__(self, process_func: Callable, queue_size: int = DEFAULT_QUEUE_SIZE, overflow: str = OVERFLOW_BLOCK,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initializes the sub-flow worker.
+
+        :param process_func: the function that executes the sub-flow with the data
+        :param queue_size: the maximum number of pending records
+        :type queue_size: int
+        :param overflow: how to handle a full queue (block/drop)
+        :type overflow: str
+        :param logger: the logger to use, can be None
+        :type logger: logging.Logger
+        """
+        if overflow not in OVERFLOWS:
+            raise Exception("Unsupported overflow handling: %s" % overflow)
+        self.process_func = process_func
+        self.queue_size = max(1, queue_size)
+        self.overflow = overflow
+        self.logger = logger if (logger is not None) else logging.getLogger("spectral-data-converter")
+        self._queue = None
+        self._thread = None
+        self._failed = False
+        self._error = None
+        self._submitted = 0
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Returns the number of records that were dropped due to a full queue.
+
+        :return: the number of dropped records
+        :rtype: int
+        """
+        return self._dropped
+
+    @property
+    def failed(self) -> bool:
+        """
+        Returns whether the sub-flow failed.
+
+        :return: True if failed
+        :rtype: bool
+        """
+        return self._failed
+
+    def _work(self):
+        """
+        Processes the queued data until the stop marker is encountered.
+        """
+        while True:
+            data = self._queue.get()
+            try:
+                if data is _STOP:
+                    break
+                # skip remaining data after an error, but keep draining the queue
+                if not self._failed:
+                    self.process_func(data)
+            except Exception as e:
+                self.logger.exception("Failed to execute asynchronous sub-flow!")
+                self._error = e
+                self._failed = True
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        """
+        Starts the worker thread, if not already running.
+        """
+        if self._thread is not None:
+            return
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._work, name="sdc-async-sub-flow", daemon=True)
+        self._thread.start()
+
+    def _check_error(self):
+        """
+        Raises an exception if the worker encountered an error.
+        """
+        if self._failed:
+            raise Exception("Asynchronous sub-flow failed: %s" % str(self._error)) from self._error
+
+    def submit(self, data) -> bool:
+        """
+        Queues a copy of the data for the sub-flow.
+
+        :param data: the data to forward
+        :return: whether the data was queued, False if dropped
+        :rtype: bool
+        """
+        self._check_error()
+        self.start()
+        if self.overflow == OVERFLOW_DROP:
+            # only the main pipeline adds to the queue, so the space cannot disappear after the check
+            if self._queue.full():
+                self._dropped += 1
+                self.logger.debug("Queue of asynchronous sub-flow full, dropping data")
+                return False
+            self._queue.put_nowait(safe_deepcopy(data))
+        else:
+            self._queue.put(safe_deepcopy(data))
+        self._submitted += 1
+        return True
+
+    def flush(self):
+        """
+        Waits for the queued data to be processed and stops the worker thread.
+        Raises an exception if the sub-flow failed.
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
+            if self._dropped > 0:
+                self.logger.warning("Asynchronous sub-flow dropped %d of %d records due to a full queue." % (self._dropped, self._submitted + self._dropped))
+        self._check_error()
+
+
+class AsyncSubFlowSupporter:
+    """
+    Mixin for filters with a sub-flow (eg tee, trigger) that adds the option of executing the
+    sub-flow asynchronously (see AsyncSubFlow). The processing of the filter's base class
+    (_do_process) gets executed in the worker thread. Needs to precede the base class when
+    deriving, and the constructor must call _init_async_sub_flow.
+    """
+
+    def _init_async_sub_flow(self, async_sub_flow: bool = None, queue_size: int = None, overflow: str = None):
+        """
+        Initializes the options for the asynchronous execution.
+
+        :param async_sub_flow: whether to execute the sub-flow in a separate worker thread
+        :type async_sub_flow: bool
+        :param queue_size: the maximum number of pending records for the asynchronous sub-flow
+        :type queue_size: int
+        :param overflow: how to handle a full queue (block/drop)
+        :type overflow: str
+        """
+        self.async_sub_flow = async_sub_flow
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self._async = None
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        add_async_options(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.async_sub_flow = ns.async_sub_flow
+        self.queue_size = ns.queue_size
+        self.overflow = ns.overflow
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.async_sub_flow is None:
+            self.async_sub_flow = False
+        if self.queue_size is None:
+            self.queue_size = DEFAULT_QUEUE_SIZE
+        if self.overflow is None:
+            self.overflow = OVERFLOW_BLOCK
+        self._async = None
+        if self.async_sub_flow:
+            self._async = AsyncSubFlow(super()._do_process, queue_size=self.queue_size,
+                                       overflow=self.overflow, logger=self.logger())
+
+    def _do_process(self, data):
+        """
+        Processes the data record(s).
+
+        :param data: the record(s) to process
+        :return: the potentially updated record(s)
+        """
+        if self._async is None:
+            return super()._do_process(data)
+        self._async.submit(data)
+        return data
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        # process any pending data before finalizing the sub-flow
+        if self._async is not None:
+            try:
+                self._async.flush()
+            finally:
+                self._async = None
+                super().finalize()
+        else:
+            super().finalize()
@@ -0,0 +1,377 @@
+import abc
+import glob
+import os
+import pickle
+import time
+from typing import Dict, Any, List, Optional, Union
+
+from seppl import Session, Initializable, init_initializable
+from seppl.io import Reader, BatchFilter, MultiFilter, Writer, StreamWriter, BatchWriter, InfiniteReader, filter_data
+from kasperl.api import SplittableStreamWriter
+
+CHECKPOINT_VERSION = 1
+""" the version of the checkpoint format. """
+
+KEY_VERSION = "version"
+KEY_ARGS = "args"
+KEY_READS = "reads"
+KEY_INPUT = "input"
+KEY_RECORDS = "records"
+KEY_COUNT = "count"
+KEY_FILTERS = "filters"
+KEY_WRITER = "writer"
+KEY_TIMESTAMP = "timestamp"
+
+
+class CheckpointSupporter(abc.ABC):
+    """
+    Mixin for plugins that can store their state in a checkpoint and restore it when resuming.
+    """
+
+    @abc.abstractmethod
+    def get_checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the current state to store in the checkpoint. Output should get flushed
+        so that the state reflects what has been written so far.
+
+        :return: the state, None if nothing to store
+        :rtype: dict
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def restore_checkpoint_state(self, state: Dict[str, Any]):
+        """
+        Restores the state from the checkpoint. Gets called after the plugin has been initialized.
+
+        :param state: the state to restore
+        :type state: dict
+        """
+        raise NotImplementedError()
+
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Loads the checkpoint from disk.
+
+    :param path: the checkpoint file
+    :type path: str
+    :return: the checkpoint, None if the file does not exist
+    :rtype: dict
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as fp:
+        result = pickle.load(fp)
+    if result.get(KEY_VERSION) != CHECKPOINT_VERSION:
+        raise Exception("Unsupported checkpoint version in %s: %s" % (path, str(result.get(KEY_VERSION))))
+    return result
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """
+    Saves the checkpoint atomically, i.e., a crash while writing leaves the previous checkpoint intact.
+
+    :param path: the checkpoint file
+    :type path: str
+    :param checkpoint: the checkpoint to save
+    :type checkpoint: dict
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fp:
+        pickle.dump(checkpoint, fp)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, path)
+
+
+def _flatten_filters(filters: Optional[Union[BatchFilter, List[BatchFilter]]]) -> List[BatchFilter]:
+    """
+    Turns the filter(s) into a flat list, expanding multi-filters.
+
+    :param filters: the filter(s), can be None
+    :return: the list of filters
+    :rtype: list
+    """
+    result = []
+    if filters is None:
+        return result
+    if not isinstance(filters, list):
+        filters = [filters]
+    for filter_ in filters:
+        if isinstance(filter_, MultiFilter):
+            result.extend(_flatten_filters(filter_.filters))
+        else:
+            result.append(filter_)
+    return result
+
+
+class CheckpointedExecution:
+    """
+    Executes a pipeline in streaming mode, periodically storing a checkpoint with the reader position
+    (number of completed reads, current input and records of the current read), the state of the filters
+    and the writer that support checkpoints. When resuming, file-based readers skip the inputs that were
+    already consumed, other readers get advanced to the stored position by reading the data again, but
+    without pushing it through the filters or the writer. Resuming requires a writer that either supports
+    checkpoints or writes one output file per record.
+    """
+
+    def __init__(self, reader: Reader, filters: Optional[Union[BatchFilter, List[BatchFilter]]], writer: Optional[Writer],
+                 session: Session, path: str, interval: int = 1000, interval_seconds: float = -1,
+                 resume: bool = False, args: List[str] = None):
+        """
+        Initializes the execution.
+
+        :param reader: the reader to use
+        :type reader: Reader
+        :param filters: the filter(s) to use, can be None
+        :param writer: the writer to use, can be None
+        :type writer: Writer
+        :param session: the session to use
+        :type session: Session
+        :param path: the checkpoint file
+        :type path: str
+        :param interval: the number of records after which to store a checkpoint, <1 to disable
+        :type interval: int
+        :param interval_seconds: the number of seconds after which to store a checkpoint, <=0 to disable
+        :type interval_seconds: float
+        :param resume: whether to resume from an existing checkpoint
+        :type resume: bool
+        :param args: the pipeline arguments, stored in the checkpoint for comparison when resuming
+        :type args: list
+        """
+        self.reader = reader
+        # multi-filters swallow errors when streaming, which would remove the checkpoint despite a failure
+        self.filters = _flatten_filters(filters)
+        self.writer = writer
+        self.session = session
+        self.path = path
+        self.interval = interval
+        self.interval_seconds = interval_seconds
+        self.resume = resume
+        self.args = args
+        self._reads = 0
+        self._records = 0
+        self._last_count = 0
+        self._last_time = 0.0
+
+    def _is_infinite(self) -> bool:
+        """
+        Returns whether the reader produces data infinitely.
+
+        :return: True if infinite
+        :rtype: bool
+        """
+        return isinstance(self.reader, InfiniteReader) and self.reader.is_infinite()
+
+    def _checkpoint_supporters(self) -> Dict[str, CheckpointSupporter]:
+        """
+        Returns the filters (key: "filter-INDEX") and the writer (key: "writer") that support checkpoints.
+
+        :return: the plugins
+        :rtype: dict
+        """
+        result = dict()
+        for i, filter_ in enumerate(_flatten_filters(self.filters)):
+            if isinstance(filter_, CheckpointSupporter):
+                result["filter-%d" % i] = filter_
+        if isinstance(self.writer, CheckpointSupporter):
+            result[KEY_WRITER] = self.writer
+        return result
+
+    def _save(self):
+        """
+        Stores the current state in the checkpoint file.
+        """
+        checkpoint = {
+            KEY_VERSION: CHECKPOINT_VERSION,
+            KEY_ARGS: self.args,
+            KEY_READS: self._reads,
+            KEY_INPUT: self.session.current_input,
+            KEY_RECORDS: self._records,
+            KEY_COUNT: self.session.count,
+            KEY_FILTERS: dict(),
+            KEY_WRITER: None,
+            KEY_TIMESTAMP: time.time(),
+        }
+        for key, plugin in self._checkpoint_supporters().items():
+            state = plugin.get_checkpoint_state()
+            if key == KEY_WRITER:
+                checkpoint[KEY_WRITER] = state
+            else:
+                checkpoint[KEY_FILTERS][key] = state
+        save_checkpoint(self.path, checkpoint)
+        self._last_count = self.session.count
+        self._last_time = time.time()
+        self.session.logger.info("Checkpoint saved after %d records: %s" % (self.session.count, self.path))
+
+    def _check_save(self):
+        """
+        Stores a checkpoint if any of the intervals has been reached.
+        """
+        if (self.interval > 0) and (self.session.count - self._last_count >= self.interval):
+            self._save()
+        elif (self.interval_seconds > 0) and (time.time() - self._last_time >= self.interval_seconds):
+            self._save()
+
+    def _skips_inputs(self, checkpoint: Dict[str, Any]) -> bool:
+        """
+        Returns whether the reader can skip the inputs consumed before the checkpoint, i.e.,
+        whether it is a file-based reader (resume_from option) and the checkpoint stores the input.
+
+        :param checkpoint: the checkpoint to check
+        :type checkpoint: dict
+        :return: True if the inputs can be skipped
+        :rtype: bool
+        """
+        return hasattr(self.reader, "resume_from") and isinstance(checkpoint.get(KEY_INPUT), str)
+
+    def _check_writer(self):
+        """
+        Ensures that the writer can resume, i.e., that it does not overwrite or duplicate the output
+        written before the checkpoint. Writers need to support checkpoints or write one file per record.
+        """
+        if (self.writer is None) or isinstance(self.writer, (CheckpointSupporter, SplittableStreamWriter)):
+            return
+        raise Exception("Writer '%s' does not support checkpoints, resuming would overwrite or duplicate its output!" % self.writer.name())
+
+    def _restore(self, checkpoint: Dict[str, Any]):
+        """
+        Restores the state of the plugins and advances the reader to the stored position.
+
+        :param checkpoint: the checkpoint to restore
+        :type checkpoint: dict
+        """
+        if (self.args is not None) and (checkpoint[KEY_ARGS] is not None) and (checkpoint[KEY_ARGS] != self.args):
+            self.session.logger.warning("Pipeline differs from the one stored in the checkpoint!\ncheckpoint: %s\ncurrent: %s" % (str(checkpoint[KEY_ARGS]), str(self.args)))
+
+        supporters = self._checkpoint_supporters()
+        for key, state in checkpoint[KEY_FILTERS].items():
+            if key not in supporters:
+                raise Exception("Filter state '%s' in checkpoint has no matching filter in pipeline!" % key)
+            if state is not None:
+                supporters[key].restore_checkpoint_state(state)
+        if checkpoint[KEY_WRITER] is not None:
+            if KEY_WRITER not in supporters:
+                raise Exception("Writer state in checkpoint, but writer does not support checkpoints!")
+            self.writer.restore_checkpoint_state(checkpoint[KEY_WRITER])
+        elif (self.writer is not None) and (KEY_WRITER not in supporters):
+            self.session.logger.warning("Writer does not support checkpoints, output files generated after the last checkpoint get written again.")
+
+        if self._is_infinite():
+            self.session.logger.warning("Reader produces data infinitely, cannot restore reader position!")
+        else:
+            # replay the reader without processing the data, unless it skips the consumed inputs
+            if not self._skips_inputs(checkpoint):
+                for i in range(checkpoint[KEY_READS]):
+                    if self.reader.has_finished():
+                        raise Exception("Reader finished before reaching the position stored in the checkpoint!")
+                    for _ in self.reader.read():
+                        pass
+            self._reads = checkpoint[KEY_READS]
+            self._records = checkpoint[KEY_RECORDS]
+        self.session.count = checkpoint[KEY_COUNT]
+        self._last_count = self.session.count
+        self.session.logger.info("Resuming after %d records (reads: %d, records of current read: %d)" % (self.session.count, self._reads, self._records))
+
+    def _initialize(self) -> bool:
+        """
+        Propagates the session and initializes the plugins.
+
+        :return: whether successfully initialized
+        :rtype: bool
+        """
+        self.reader.session = self.session
+        for filter_ in self.filters:
+            filter_.session = self.session
+        if self.writer is not None:
+            self.writer.session = self.session
+        if isinstance(self.reader, Initializable) and not init_initializable(self.reader, "reader"):
+            return False
+        for filter_ in self.filters:
+            if isinstance(filter_, Initializable) and not init_initializable(filter_, "filter"):
+                return False
+        if (self.writer is not None) and isinstance(self.writer, Initializable) and not init_initializable(self.writer, "writer"):
+            return False
+        return True
+
+    def _finalize(self):
+        """
+        Finalizes the plugins.
+        """
+        if isinstance(self.reader, Initializable):
+            self.reader.finalize()
+        for filter_ in self.filters:
+            if isinstance(filter_, Initializable):
+                filter_.finalize()
+        if (self.writer is not None) and isinstance(self.writer, Initializable):
+            self.writer.finalize()
+
+    def _write(self, data):
+        """
+        Forwards the data to the writer, if any.
+
+        :param data: the data to write
+        """
+        if self.writer is None:
+            return
+        if isinstance(self.writer, StreamWriter):
+            self.writer.write_stream(data)
+        elif isinstance(self.writer, BatchWriter):
+            self.writer.write_batch(data)
+
+    def execute(self):
+        """
+        Executes the pipeline. Any errors get raised, leaving the last checkpoint in place.
+        The checkpoint gets removed once the pipeline finished successfully.
+        """
+        if self.session.options.force_batch or isinstance(self.writer, BatchWriter):
+            raise Exception("Checkpoints require streaming mode, i.e., no batch writer and no forced batch mode!")
+
+        checkpoint = None
+        if self.resume:
+            checkpoint = load_checkpoint(self.path)
+            if checkpoint is None:
+                self.session.logger.info("No checkpoint to resume from, starting from scratch: %s" % self.path)
+        elif os.path.exists(self.path):
+            self.session.logger.warning("Overwriting existing checkpoint (use resume option to continue from it): %s" % self.path)
+
+        if checkpoint is not None:
+            self._check_writer()
+            # start reading at the input that was being read when the checkpoint got stored
+            if self._skips_inputs(checkpoint):
+                self.reader.resume_from = glob.escape(checkpoint[KEY_INPUT])
+
+        if not self._initialize():
+            return
+        try:
+            if checkpoint is not None:
+                self._restore(checkpoint)
+            self._last_time = time.time()
+            skip = self._records
+            while True:
+                for item in self.reader.read():
+                    if item is None:
+                        continue
+                    if skip > 0:
+                        skip -= 1
+                        continue
+                    if self.session.stopped:
+                        return
+                    self.session.count += 1
+                    self._records += 1
+                    for filtered in filter_data(item, self.filters, session=self.session):
+                        if filtered is not None:
+                            self._write(filtered)
+                    if self.session.count % self.session.options.update_interval == 0:
+                        self.session.logger.info("%d records processed..." % self.session.count)
+                    self._check_save()
+                self._reads += 1
+                self._records = 0
+                if self.reader.has_finished():
+                    break
+            self.session.logger.info("%d records processed in total." % self.session.count)
+        finally:
+            self._finalize()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,456 @@
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+from typing import IO, Optional
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_BZ2 = "bz2"
+COMPRESSION_XZ = "xz"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSIONS = [
+    COMPRESSION_NONE,
+    COMPRESSION_GZIP,
+    COMPRESSION_BZ2,
+    COMPRESSION_XZ,
+    COMPRESSION_ZSTD,
+]
+
+COMPRESSION_EXTENSIONS = {
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_BZ2: ".bz2",
+    COMPRESSION_XZ: ".xz",
+    COMPRESSION_ZSTD: ".zst",
+}
+""" the file extensions (incl dot) per compression. """
+
+COMPRESSION_MAGIC = {
+    COMPRESSION_GZIP: b"\x1f\x8b",
+    COMPRESSION_BZ2: b"BZh",
+    COMPRESSION_XZ: b"\xfd7zXZ\x00",
+    COMPRESSION_ZSTD: b"\x28\xb5\x2f\xfd",
+}
+""" the magic bytes that files start with per compression. """
+
+CHUNK_SIZE = 1024 * 1024
+""" the size of the chunks that get passed between the codec thread and the caller. """
+
+QUEUE_SIZE = 16
+""" the maximum number of chunks queued up between the codec thread and the caller. """
+
+_END_OF_DATA = object()
+
+
+def add_compression_option(parser: argparse.ArgumentParser):
+    """
+    Adds the compression option to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--compression", choices=COMPRESSIONS, help="The compression to apply to the output files, the corresponding extension gets appended; with '" + COMPRESSION_NONE + "' the compression is determined from the output file's extension, if any (" + "|".join(COMPRESSION_EXTENSIONS.values()) + ").", required=False, default=COMPRESSION_NONE)
+
+
+def add_sniff_compression_option(parser: argparse.ArgumentParser):
+    """
+    Adds the option for detecting the compression of input files from their magic bytes to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--sniff_compression", action="store_true", help="Whether to detect the compression of input files without compression extension (" + "|".join(COMPRESSION_EXTENSIONS.values()) + ") from their magic bytes; requires reading the start of every such file an additional time.")
+
+
+def compression_from_extension(path: str) -> Optional[str]:
+    """
+    Determines the compression from the file extension.
+
+    :param path: the file to check
+    :type path: str
+    :return: the compression, None if not compressed
+    :rtype: str
+    """
+    lower = path.lower()
+    for compression, ext in COMPRESSION_EXTENSIONS.items():
+        if lower.endswith(ext):
+            return compression
+    return None
+
+
+def compression_from_magic(data: bytes) -> Optional[str]:
+    """
+    Determines the compression from the magic bytes at the start of the data.
+
+    :param data: the first bytes of the data to check
+    :type data: bytes
+    :return: the compression, None if not compressed
+    :rtype: str
+    """
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if data.startswith(magic):
+            return compression
+    return None
+
+
+def detect_compression(path: str, sniff: bool = False) -> Optional[str]:
+    """
+    Determines the compression of the file, from its extension or, failing that and if enabled, from the magic bytes.
+
+    :param path: the file to check
+    :type path: str
+    :param sniff: whether to inspect the magic bytes of files without compression extension
+    :type sniff: bool
+    :return: the compression, None if not compressed
+    :rtype: str
+    """
+    result = compression_from_extension(path)
+    if (result is None) and sniff:
+        with open(path, "rb") as fp:
+            result = compression_from_magic(fp.read(8))
+    return result
+
+
+def strip_compression_extension(path: str) -> str:
+    """
+    Removes the compression extension from the path, if any.
+
+    :param path: the path to process
+    :type path: str
+    :return: the path without compression extension
+    :rtype: str
+    """
+    compression = compression_from_extension(path)
+    if compression is None:
+        return path
+    return path[:-len(COMPRESSION_EXTENSIONS[compression])]
+
+
+def compressed_path(path: str, compression: Optional[str]) -> str:
+    """
+    Appends the extension of the compression to the path if not already present.
+
+    :param path: the path to process
+    :type path: str
+    :param compression: the compression, can be None
+    :type compression: str
+    :return: the updated path
+    :rtype: str
+    """
+    if (compression is None) or (compression == COMPRESSION_NONE):
+        return path
+    ext = COMPRESSION_EXTENSIONS[compression]
+    if path.lower().endswith(ext):
+        return path
+    return path + ext
+
+
+def output_compression(path: str, compression: Optional[str]) -> Optional[str]:
+    """
+    Determines the compression to use for the output file: either the explicitly
+    specified one or the one derived from the file's extension.
+
+    :param path: the output file
+    :type path: str
+    :param compression: the compression, None or 'none' to determine from extension
+    :type compression: str
+    :return: the compression, None if not compressed
+    :rtype: str
+    """
+    if (compression is None) or (compression == COMPRESSION_NONE):
+        return compression_from_extension(path)
+    return compression
+
+
+def _zstandard():
+    """
+    Returns the zstandard module.
+
+    :return: the module
+    """
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise Exception("The 'zstandard' library is required for zstd compression, e.g., install with: pip install zstandard")
+
+
+def _codec_reader(compression: str, fileobj: IO) -> IO:
+    """
+    Wraps the binary file-like object with a decompressing one.
+
+    :param compression: the compression to use
+    :type compression: str
+    :param fileobj: the file-like object to wrap
+    :return: the decompressing file-like object
+    """
+    if compression == COMPRESSION_GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    elif compression == COMPRESSION_BZ2:
+        return bz2.BZ2File(fileobj, mode="rb")
+    elif compression == COMPRESSION_XZ:
+        return lzma.LZMAFile(fileobj, mode="rb")
+    elif compression == COMPRESSION_ZSTD:
+        return _zstandard().ZstdDecompressor().stream_reader(fileobj, read_across_frames=True, closefd=False)
+    else:
+        raise Exception("Unsupported compression: %s" % compression)
+
+
+def _codec_writer(compression: str, fileobj: IO) -> IO:
+    """
+    Wraps the binary file-like object with a compressing one.
+
+    :param compression: the compression to use
+    :type compression: str
+    :param fileobj: the file-like object to wrap
+    :return: the compressing file-like object
+    """
+    if compression == COMPRESSION_GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode="wb")
+    elif compression == COMPRESSION_BZ2:
+        return bz2.BZ2File(fileobj, mode="wb")
+    elif compression == COMPRESSION_XZ:
+        return lzma.LZMAFile(fileobj, mode="wb")
+    elif compression == COMPRESSION_ZSTD:
+        return _zstandard().ZstdCompressor().stream_writer(fileobj, closefd=False)
+    else:
+        raise Exception("Unsupported compression: %s" % compression)
+
+
+class _ThreadedDecompressor(io.RawIOBase):
+    """
+    Decompresses the file in a background thread, handing out the decompressed chunks via a bounded queue.
+    """
+
+    def __init__(self, path: str, compression: str):
+        """
+        Initializes the decompressor and starts the background thread.
+
+        :param path: the compressed file to read
+        :type path: str
+        :param compression: the compression of the file
+        :type compression: str
+        """
+        super().__init__()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._buffer = b""
+        self._eof = False
+        self._error = None
+        self._thread = threading.Thread(target=self._work, args=(path, compression), daemon=True)
+        self._thread.start()
+
+    def _work(self, path: str, compression: str):
+        """
+        Decompresses the file chunk by chunk and queues the chunks. Gets executed in the background thread.
+
+        :param path: the compressed file to read
+        :type path: str
+        :param compression: the compression of the file
+        :type compression: str
+        """
+        try:
+            with open(path, "rb") as fp:
+                with _codec_reader(compression, fp) as codec:
+                    while not self._stop.is_set():
+                        chunk = codec.read(CHUNK_SIZE)
+                        if len(chunk) == 0:
+                            break
+                        self._queue.put(chunk)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._queue.put(_END_OF_DATA)
+
+    def readable(self) -> bool:
+        """
+        Returns whether the stream can be read from.
+
+        :return: always True
+        :rtype: bool
+        """
+        return True
+
+    def readinto(self, b) -> int:
+        """
+        Reads decompressed bytes into the pre-allocated buffer, waiting for the next chunk if necessary.
+
+        :param b: the buffer to fill
+        :return: the number of bytes read, 0 at the end of the data
+        :rtype: int
+        """
+        if (len(self._buffer) == 0) and not self._eof:
+            chunk = self._queue.get()
+            if chunk is _END_OF_DATA:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+            else:
+                self._buffer = chunk
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        """
+        Stops the background thread and closes the stream.
+        """
+        if not self.closed:
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        super().close()
+
+
+class _ThreadedCompressor(io.RawIOBase):
+    """
+    Compresses the data handed in via a bounded queue in a background thread.
+    """
+
+    def __init__(self, path: str, compression: str):
+        """
+        Initializes the compressor, opens the output file and starts the background thread.
+
+        :param path: the file to write to
+        :type path: str
+        :param compression: the compression to apply
+        :type compression: str
+        """
+        super().__init__()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._error = None
+        # open file in calling thread to surface errors immediately
+        self._fp = open(path, "wb")
+        self._thread = threading.Thread(target=self._work, args=(compression,), daemon=True)
+        self._thread.start()
+
+    def _work(self, compression: str):
+        """
+        Compresses the queued chunks and writes them to the file. Gets executed in the background thread.
+
+        :param compression: the compression to apply
+        :type compression: str
+        """
+        try:
+            with _codec_writer(compression, self._fp) as codec:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is _END_OF_DATA:
+                        break
+                    codec.write(chunk)
+        except Exception as e:
+            self._error = e
+            # keep consuming so the caller never blocks
+            while self._queue.get() is not _END_OF_DATA:
+                pass
+        finally:
+            self._fp.close()
+
+    def writable(self) -> bool:
+        """
+        Returns whether the stream can be written to.
+
+        :return: always True
+        :rtype: bool
+        """
+        return True
+
+    def write(self, b) -> int:
+        """
+        Queues the bytes for compression. Raises the error if the background thread failed.
+
+        :param b: the bytes to write
+        :return: the number of bytes written
+        :rtype: int
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put(bytes(b))
+        return len(b)
+
+    def close(self):
+        """
+        Waits for the queued data to be compressed and closes the stream.
+        Raises the error if the background thread failed.
+        """
+        if not self.closed:
+            self._queue.put(_END_OF_DATA)
+            self._thread.join()
+            super().close()
+            if self._error is not None:
+                raise self._error
+        else:
+            super().close()
+
+
+def open_input(path: str, binary: bool, compression: str = None, sniff: bool = False) -> IO:
+    """
+    Opens the file for reading, transparently decompressing it in a background thread if necessary.
+    The compression gets detected from the extension (or the magic bytes, if enabled) if not specified.
+
+    :param path: the file to open
+    :type path: str
+    :param binary: whether to open the file in binary or text mode
+    :type binary: bool
+    :param compression: the compression of the file, None to detect
+    :type compression: str
+    :param sniff: whether to inspect the magic bytes of files without compression extension
+    :type sniff: bool
+    :return: the file-like object
+    """
+    if compression is None:
+        compression = detect_compression(path, sniff=sniff)
+    if compression is None:
+        return open(path, "rb" if binary else "r")
+    result = io.BufferedReader(_ThreadedDecompressor(path, compression), buffer_size=CHUNK_SIZE)
+    if not binary:
+        result = io.TextIOWrapper(result)
+    return result
+
+
+def open_output(path: str, compression: Optional[str], binary: bool) -> IO:
+    """
+    Opens the file for writing, compressing the data in a background thread if necessary.
+
+    :param path: the file to open
+    :type path: str
+    :param compression: the compression to apply, None or 'none' to determine from the extension
+    :type compression: str
+    :param binary: whether to open the file in binary or text mode
+    :type binary: bool
+    :return: the file-like object
+    """
+    compression = output_compression(path, compression)
+    if compression is None:
+        return open(path, "wb" if binary else "w")
+    result = io.BufferedWriter(_ThreadedCompressor(path, compression), buffer_size=CHUNK_SIZE)
+    if not binary:
+        result = io.TextIOWrapper(result)
+    return result
+
+
+def decompress_fileobj(fileobj: IO, compression: str = None) -> IO:
+    """
+    Wraps the binary file-like object with a decompressing one for the specified compression or,
+    if not specified, if the magic bytes indicate a compression. For inspecting the magic bytes,
+    the file-like object must support seeking.
+
+    :param fileobj: the file-like object to wrap
+    :param compression: the compression of the data, None to detect from the magic bytes
+    :type compression: str
+    :return: the (decompressing) file-like object
+    """
+    if compression is None:
+        start = fileobj.tell()
+        compression = compression_from_magic(fileobj.read(8))
+        fileobj.seek(start)
+    if (compression is None) or (compression == COMPRESSION_NONE):
+        return fileobj
+    return _codec_reader(compression, fileobj)
@@ -3,20 +3,153 @@ import argparse
 import os
 import pickle
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Any
 
 from seppl import MetaDataHandler, get_metadata
 from seppl.io import BatchFilter as SBatchFilter
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import make_list
+from ._checkpoint import CheckpointSupporter
+from ._spill import GroupSpill
+from ._stage_cache import StageCache, cache_key, DEFAULT_CACHE_SIZE
+from ._model_store import get_model_store
+
+CACHE_EXCLUDED_OPTIONS = {"logging_level", "logger_name", "skip", "spill_threshold", "spill_dir", "cache_dir", "cache_size", "model_store"}
+""" the options that do not influence the output of a filter and get ignored for the cache key. """
 
 
 class Filter(SBatchFilter, abc.ABC):
     """
-    Ancestor for filters.
+    Ancestor for filters. The output of filters can be cached on disk, keyed by the input data,
+    the filter's options and its state (eg a trained model), so that re-running a pipeline with
+    the same data and configuration can skip the processing.
     """
-    pass
+
+    def __init__(self, cache_dir: str = None, cache_size: int = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the filter.
+
+        :param cache_dir: the directory for caching the output of the filter, no caching if None
+        :type cache_dir: str
+        :param cache_size: the maximum size of the cache directory in MB, <1 for unlimited
+        :type cache_size: int
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self._cache = None
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("--cache_dir", type=str, metavar="DIR", help="The directory for caching the output of this filter, keyed by the input data and the filter's options; a re-run with the same input and options loads the output from the cache instead of processing the data. Only batches of records get cached, i.e., in batch mode. The directory can be shared among filters and pipelines.", default=None, required=False)
+        parser.add_argument("--cache_size", type=int, metavar="MB", help="The maximum size of the cache directory in MB, removing the least recently used outputs when exceeded; use <1 for unlimited.", default=DEFAULT_CACHE_SIZE, required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.cache_dir = ns.cache_dir
+        self.cache_size = ns.cache_size
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.cache_size is None:
+            self.cache_size = DEFAULT_CACHE_SIZE
+        self._cache = None
+        if (self.cache_dir is not None) and (len(self.cache_dir) > 0):
+            if self._supports_cache():
+                self._cache = StageCache(self.session.expand_variables(self.cache_dir), max_size=self.cache_size, logger=self.logger())
+            else:
+                self.logger().warning("Filter does not support caching in its current configuration, ignoring cache directory!")
+
+    def _supports_cache(self) -> bool:
+        """
+        Returns whether the output of the filter can be cached in its current configuration.
+
+        :return: True if supported
+        :rtype: bool
+        """
+        return True
+
+    def _cache_options(self) -> Dict[str, Any]:
+        """
+        Returns the options that influence the output of the filter, for generating the cache key.
+
+        :return: the options
+        :rtype: dict
+        """
+        result = dict()
+        for k, v in vars(self).items():
+            if k.startswith("_") or (k in CACHE_EXCLUDED_OPTIONS):
+                continue
+            result[k] = v
+        return result
+
+    def _cache_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the internal state of the filter that influences the output, e.g., a trained model.
+        Uses the checkpoint state if the filter supports checkpoints.
+
+        :return: the state, None if no state
+        :rtype: dict
+        """
+        if isinstance(self, CheckpointSupporter):
+            return self.get_checkpoint_state()
+        return None
+
+    def process(self, data):
+        """
+        Processes the data record, using the cached output if available.
+        Only batches (lists) get cached, as the output of filters that carry state
+        across records cannot be restored for individual records in streaming mode.
+
+        :param data: the record(s) to process
+        :return: the potentially updated record or None if to drop
+        """
+        if self.skip or (self._cache is None) or not isinstance(data, list):
+            return super().process(data)
+
+        options = sorted(self._cache_options().items())
+        key = cache_key(self.__class__.__module__ + "." + self.__class__.__name__, repr(options), self._cache_state(), data)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.logger().debug("Using cached output: %s" % key)
+            if isinstance(self, CheckpointSupporter) and (cached["state"] is not None):
+                self.restore_checkpoint_state(cached["state"])
+            return cached["output"]
+
+        result = super().process(data)
+        self._cache.put(key, {"output": result, "state": self._cache_state()})
+        return result
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        if self._cache is not None:
+            self.logger().info("Cache hits: %d, misses: %d" % (self._cache.hits, self._cache.misses))
+            self._cache = None
+        super().finalize()
 
 
 class BatchFilter(Filter, abc.ABC):
@@ -25,6 +158,7 @@ class BatchFilter(Filter, abc.ABC):
     """
 
     def __init__(self, metadata_key: str = None, batch_order: List[str] = None,
+                 spill_threshold: int = None, spill_dir: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the filter.
@@ -33,6 +167,10 @@ class BatchFilter(Filter, abc.ABC):
         :type metadata_key: str
         :param batch_order: the list of batch names for enforcing an order other than alphabetical
         :type batch_order: list
+        :param spill_threshold: the memory budget in MB for the batches, above which they get buffered on disk, <1 to disable
+        :type spill_threshold: int
+        :param spill_dir: the directory for the temporary files, uses the system's default if None
+        :type spill_dir: str
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -41,6 +179,8 @@ class BatchFilter(Filter, abc.ABC):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.metadata_key = metadata_key
         self.batch_order = batch_order
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
 
     def _create_argparser(self) -> argparse.ArgumentParser:
         """
@@ -52,6 +192,8 @@ class BatchFilter(Filter, abc.ABC):
         parser = super()._create_argparser()
         parser.add_argument("-k", "--metadata_key", type=str, help="The key in the meta-data that identifies the batches. NB: sorts the batch names alphabetically by default.", default=None, required=False)
         parser.add_argument("--batch_order", type=str, help="Lists the names of the batches to enforce an order other than alphabetical. Batches that do not appear in this list get appended to the order.", default=None, required=False, nargs="*")
+        parser.add_argument("--spill_threshold", type=int, metavar="MB", help="The memory budget in MB for the batches (estimated from the serialized size of the first items); above it, the items get buffered in temporary files per batch and each batch gets loaded only when it gets processed. The incoming list of records gets consumed in that case. Use <1 to disable.", default=-1, required=False)
+        parser.add_argument("--spill_dir", type=str, metavar="DIR", help="The directory for the temporary files when spilling batches to disk; uses the system's temp directory if not specified.", default=None, required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -64,6 +206,18 @@ class BatchFilter(Filter, abc.ABC):
         super()._apply_args(ns)
         self.metadata_key = ns.metadata_key
         self.batch_order = ns.batch_order
+        self.spill_threshold = ns.spill_threshold
+        self.spill_dir = ns.spill_dir
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.spill_threshold is None:
+            self.spill_threshold = -1
+        if (self.spill_dir is not None) and (len(self.spill_dir) == 0):
+            self.spill_dir = None
 
     def _requires_list_input(self) -> bool:
         """
@@ -112,52 +266,100 @@ class BatchFilter(Filter, abc.ABC):
             batch_new = self._process_batch(data)
             self._post_process_batch(batch_new)
             return batch_new
+        elif (self.spill_threshold > 0) and isinstance(data, list):
+            return self._do_process_spilled(data)
         else:
             # split data into batches
             batch_data = dict()
             for item in make_list(data):
-                # get meta data
-                meta = get_metadata(item)
-                if meta is None:
-                    if not isinstance(item, MetaDataHandler):
-                        raise Exception("Cannot access meta-data for type: %s" % str(type(item)))
-
-                batch_name = meta[self.metadata_key]
+                batch_name = self._batch_name(item)
                 if batch_name not in batch_data:
                     batch_data[batch_name] = []
                 batch_data[batch_name].append(item)
 
-            # split into batches
-            batches = []
-            if self.batch_order is not None:
-                batch_names = self.batch_order[:]
-                for batch_name in sorted(batch_data.keys()):
-                    if batch_name not in batch_names:
-                        batch_names.append(batch_name)
-                self.logger().info("batch names (custom order): %s" % str(batch_names))
-            else:
-                batch_names = sorted(batch_data.keys())
-                self.logger().info("batch names (alphabetical): %s" % str(batch_names))
-            for batch_name in batch_names:
-                batches.append(batch_data[batch_name])
-
             # process batches
             result = []
-            for batch in batches:
+            for batch_name in self._batch_names(list(batch_data.keys())):
+                batch = batch_data[batch_name]
                 self._pre_process_batch(batch)
                 batch_new = self._process_batch(batch)
                 self._post_process_batch(batch_new)
                 result.extend(batch_new)
             return result
 
+    def _batch_name(self, item) -> str:
+        """
+        Returns the name of the batch that the item belongs to.
+
+        :param item: the item to get the batch name for
+        :return: the batch name
+        :rtype: str
+        """
+        meta = get_metadata(item)
+        if meta is None:
+            if not isinstance(item, MetaDataHandler):
+                raise Exception("Cannot access meta-data for type: %s" % str(type(item)))
+        return meta[self.metadata_key]
+
+    def _batch_names(self, names: List[str]) -> List[str]:
+        """
+        Returns the batch names in the order to process them.
 
-class TrainableBatchFilter(BatchFilter, abc.ABC):
+        :param names: the batch names encountered in the data
+        :type names: list
+        :return: the ordered names
+        :rtype: list
+        """
+        if self.batch_order is not None:
+            batch_names = self.batch_order[:]
+            for batch_name in sorted(names):
+                if batch_name not in batch_names:
+                    batch_names.append(batch_name)
+            self.logger().info("batch names (custom order): %s" % str(batch_names))
+        else:
+            batch_names = sorted(names)
+            self.logger().info("batch names (alphabetical): %s" % str(batch_names))
+        return batch_names
+
+    def _do_process_spilled(self, data: List):
+        """
+        Processes the batches, buffering them in temporary files once they exceed the memory budget.
+        Consumes the incoming list, releasing the records as they get buffered, and loads only
+        one batch at a time.
+
+        :param data: the records to process
+        :type data: list
+        :return: the updated records
+        :rtype: list
+        """
+        spill = GroupSpill(self.spill_threshold * 1024 * 1024, spill_dir=self.spill_dir)
+        try:
+            for i in range(len(data)):
+                spill.add(self._batch_name(data[i]), data[i])
+                data[i] = None
+            data.clear()
+            if spill.spilled:
+                self.logger().info("Data exceeds memory budget of %dMB, spilled batches to disk" % self.spill_threshold)
+
+            result = []
+            for batch_name in self._batch_names(spill.groups):
+                batch = spill.load(batch_name)
+                self._pre_process_batch(batch)
+                batch_new = self._process_batch(batch)
+                self._post_process_batch(batch_new)
+                result.extend(batch_new)
+            return result
+        finally:
+            spill.close()
+
+
+class TrainableBatchFilter(BatchFilter, CheckpointSupporter, abc.ABC):
     """
     Batch filter that get trained with first batch.
     """
 
     def __init__(self, metadata_key: str = None, always_reset: bool = None, save_to: str = None, load_from: str = None,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+                 model_store: str = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the handler.
 
@@ -169,6 +371,8 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
         :type save_to: str
         :param load_from: the file to load the trained filter from
         :type load_from: str
+        :param model_store: the directory for sharing the arrays of loaded filters via memory-mapped files, None to unpickle them
+        :type model_store: str
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -178,6 +382,7 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
         self.always_reset = always_reset
         self.save_to = save_to
         self.load_from = load_from
+        self.model_store = model_store
         self._trained = False
         self._first_batch = None
 
@@ -192,6 +397,7 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
         parser.add_argument("--always_reset", action="store_true", help="If enabled, the filter's 'trained' flag gets reset with every batch and the filter retrained each time, rather than only getting trained on the 1st batch and then applied in that form to subsequent batches.")
         parser.add_argument("--save_to", type=str, metavar="FILE", help="The file to save the trained filter to.", default=None, required=False)
         parser.add_argument("--load_from", type=str, metavar="FILE", help="The file to load a trained filter from (instead of training it on the first batch).", default=None, required=False)
+        parser.add_argument("--model_store", type=str, metavar="DIR", help="The directory for storing the arrays of the filter loaded via --load_from in memory-mapped files, sharing a single copy among processes and pipelines; the filter gets reloaded when the file's modification time changes.", default=None, required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -205,6 +411,7 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
         self.always_reset = ns.always_reset
         self.save_to = ns.save_to
         self.load_from = ns.load_from
+        self.model_store = ns.model_store
 
     def initialize(self):
         """
@@ -218,6 +425,8 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
             self.save_to = None
         if (self.load_from is not None) and (len(self.load_from) == 0):
             self.load_from = None
+        if (self.model_store is not None) and (len(self.model_store) == 0):
+            self.model_store = None
 
     def _supports_serialization(self):
         """
@@ -250,6 +459,54 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
         """
         raise NotImplementedError()
 
+    def _supports_cache(self) -> bool:
+        """
+        Returns whether the output of the filter can be cached in its current configuration.
+        Requires serialization for restoring the trained filter from the cache; saving the
+        trained filter to disk is not supported as it would not happen for cached outputs.
+
+        :return: True if supported
+        :rtype: bool
+        """
+        return self._supports_serialization() and (self.save_to is None)
+
+    def _cache_options(self) -> Dict[str, Any]:
+        """
+        Returns the options that influence the output of the filter, for generating the cache key.
+        Includes the modification time of the filter file to load.
+
+        :return: the options
+        :rtype: dict
+        """
+        result = super()._cache_options()
+        if self.load_from is not None:
+            path = self.session.expand_variables(self.load_from)
+            result["load_from_mtime"] = os.path.getmtime(path) if os.path.exists(path) else None
+        return result
+
+    def get_checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the current state to store in the checkpoint, i.e., the trained model.
+
+        :return: the state, None if nothing to store
+        :rtype: dict
+        """
+        if not self._trained or self.always_reset:
+            return None
+        if not self._supports_serialization():
+            self.logger().warning("Filter does not support serialization, gets retrained when resuming!")
+            return None
+        return {"model": self._serialize()}
+
+    def restore_checkpoint_state(self, state: Dict[str, Any]):
+        """
+        Restores the trained model from the checkpoint.
+
+        :param state: the state to restore
+        :type state: dict
+        """
+        self._trained = self._deserialize(state["model"])
+
     def _pre_process_batch(self, batch):
         """
         Hook method that gets executed before a batch is being processed.
@@ -266,8 +523,12 @@ class TrainableBatchFilter(BatchFilter, abc.ABC):
                 path = self.session.expand_variables(self.load_from)
                 if os.path.exists(path) and os.path.isfile(path):
                     self.logger().info("Loading filter from: %s" % path)
-                    with open(path, "rb") as fp:
-                        self._trained = self._deserialize(pickle.load(fp))
+                    if self.model_store is not None:
+                        store = get_model_store(self.session.expand_variables(self.model_store))
+                        self._trained = self._deserialize(store.load(path))
+                    else:
+                        with open(path, "rb") as fp:
+                            self._trained = self._deserialize(pickle.load(fp))
                 else:
                     self.logger().warning("Filter model does not exist or is not a file: %s" % path)
 
@@ -0,0 +1,265 @@
+import argparse
+import fnmatch
+import glob
+import logging
+import os
+from collections import deque
+from typing import Union, List, Iterable, Iterator, Optional, Tuple
+
+from seppl.variables import expand_variables
+from seppl.io import locate_files
+from wai.logging import set_logging_level, LOGGING_INFO
+
+from ._shard import in_shard, shard_root
+
+_logger = None
+
+
+def logger() -> logging.Logger:
+    """
+    Returns the logger instance to use, initializes it if necessary.
+
+    :return: the logger instance
+    :rtype: logging.Logger
+    """
+    global _logger
+    if _logger is None:
+        _logger = logging.getLogger("sdc.api.inputs")
+        set_logging_level(_logger, LOGGING_INFO)
+    return _logger
+
+
+def add_lazy_option(parser: argparse.ArgumentParser):
+    """
+    Adds the lazy enumeration option to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--lazy", action="store_true", help="Enumerates the input files lazily while reading, rather than locating (and sorting) all of them before reading the first one; files get returned in directory order.", required=False)
+
+
+class InputFiles:
+    """
+    The queue of input files to process. Files get consumed in O(1) and can be
+    supplied by a generator, which gets only advanced as far as necessary.
+    """
+
+    def __init__(self, files: Iterable[str] = None):
+        """
+        Initializes the queue.
+
+        :param files: the files, can be a generator
+        :type files: Iterable
+        """
+        self._files = iter([]) if files is None else iter(files)
+        self._buffer = deque()
+
+    def _fill(self, num: int):
+        """
+        Ensures that at least the specified number of files are buffered (if available).
+
+        :param num: the number of files to buffer
+        :type num: int
+        """
+        while len(self._buffer) < num:
+            try:
+                self._buffer.append(next(self._files))
+            except StopIteration:
+                break
+
+    def pop(self) -> str:
+        """
+        Removes and returns the next file.
+
+        :return: the file
+        :rtype: str
+        """
+        self._fill(1)
+        if len(self._buffer) == 0:
+            raise IndexError("No more input files!")
+        return self._buffer.popleft()
+
+    def peek(self, num: int) -> List[str]:
+        """
+        Returns the next files without removing them.
+
+        :param num: the maximum number of files to return
+        :type num: int
+        :return: the files
+        :rtype: list
+        """
+        self._fill(num)
+        return [self._buffer[i] for i in range(min(num, len(self._buffer)))]
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether there are no more files.
+
+        :return: True if no more files
+        :rtype: bool
+        """
+        self._fill(1)
+        return len(self._buffer) == 0
+
+
+def _iterate_dirs(pattern: str) -> Iterator[str]:
+    """
+    Returns the directories matching the glob pattern.
+
+    :param pattern: the glob pattern for the directories
+    :type pattern: str
+    :return: the directories
+    """
+    if not glob.has_magic(pattern):
+        if os.path.isdir(pattern):
+            yield pattern
+        return
+    for path in _iterate_glob(pattern, dirs=True):
+        yield path
+
+
+def _iterate_glob(pattern: str, dirs: bool = False) -> Iterator[str]:
+    """
+    Returns the files (or directories) matching the glob pattern, using os.scandir.
+    The entries get returned in directory order.
+
+    :param pattern: the glob pattern
+    :type pattern: str
+    :param dirs: whether to return directories rather than files
+    :type dirs: bool
+    :return: the matching paths
+    """
+    if not glob.has_magic(pattern):
+        if (os.path.isdir(pattern) if dirs else os.path.isfile(pattern)):
+            yield pattern
+        return
+
+    dirname, basename = os.path.split(pattern)
+    hidden = basename.startswith(".")
+    for parent in (_iterate_dirs(dirname) if len(dirname) > 0 else ["."]):
+        try:
+            with os.scandir(parent) as it:
+                for entry in it:
+                    if entry.name.startswith(".") and not hidden:
+                        continue
+                    if not fnmatch.fnmatch(entry.name, basename):
+                        continue
+                    if entry.is_dir() != dirs:
+                        continue
+                    yield entry.name if len(dirname) == 0 else os.path.join(parent, entry.name)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+
+
+def iterate_files(inputs: Union[str, List[str]], input_lists: Union[str, List[str]] = None,
+                  fail_if_empty: bool = False, default_glob: str = None, resume_from: str = None) -> Iterator[str]:
+    """
+    Generator version of seppl's locate_files: walks the directories with os.scandir
+    and reads the input lists line by line, returning the files as they get found.
+    Applies resume_from while walking; if no file matches, all files get returned, like with locate_files.
+    The files get returned in directory order.
+
+    :param inputs: the input path(s) with optional globs
+    :type inputs: str or list
+    :param input_lists: text file(s) that list the actual input files to use
+    :type input_lists: str or list
+    :param fail_if_empty: whether to throw an exception if no files were located
+    :type fail_if_empty: bool
+    :param default_glob: the default glob to use, ignored if None
+    :type default_glob: str
+    :param resume_from: the file name to resume from (glob syntax)
+    :type resume_from: str
+    :return: the files
+    """
+    if (inputs is None) and (input_lists is None):
+        raise Exception("Neither input paths nor input lists provided!")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    if isinstance(input_lists, str):
+        input_lists = [input_lists]
+
+    def _all_files():
+        if inputs is not None:
+            for inp in inputs:
+                inp = expand_variables(inp)
+                if (default_glob is not None) and os.path.isdir(inp):
+                    inp = os.path.join(inp, default_glob)
+                yield from _iterate_glob(inp)
+        if input_lists is not None:
+            for inp in input_lists:
+                inp = expand_variables(inp)
+                if not os.path.exists(inp):
+                    logger().warning("Input list does not exist: %s" % inp)
+                    continue
+                if os.path.isdir(inp):
+                    logger().warning("Input list points to directory: %s" % inp)
+                    continue
+                with open(inp, "r") as fp:
+                    for line in fp:
+                        line = expand_variables(line.strip())
+                        if len(line) == 0:
+                            continue
+                        if not os.path.exists(line):
+                            logger().warning("Path from input list '%s' does not exist: %s" % (inp, line))
+                            continue
+                        yield line
+
+    # the files before the one to resume from get held back, as all files
+    # get returned if there is no file to resume from (like locate_files does)
+    located = False
+    resumed = resume_from is None
+    skipped = []
+    for path in _all_files():
+        located = True
+        if not resumed:
+            if not fnmatch.fnmatch(path, resume_from):
+                skipped.append(path)
+                continue
+            resumed = True
+            skipped = None
+        yield path
+
+    if fail_if_empty and not located:
+        raise Exception("Failed to locate any files using: %s" % str(inputs))
+    if not resumed:
+        logger().warning("resume from '%s' not found!" % resume_from)
+        yield from skipped
+
+
+def locate_input_files(inputs: Union[str, List[str]], input_lists: Union[str, List[str]] = None,
+                       fail_if_empty: bool = False, default_glob: str = None, resume_from: str = None,
+                       lazy: Optional[bool] = False, shard: Optional[Tuple[int, int]] = None) -> InputFiles:
+    """
+    Locates the input files, either all of them up front (sorted glob results) or lazily while
+    they get consumed. Only the files that fall into the shard get returned if a shard is specified.
+
+    :param inputs: the input path(s) with optional globs
+    :type inputs: str or list
+    :param input_lists: text file(s) that list the actual input files to use
+    :type input_lists: str or list
+    :param fail_if_empty: whether to throw an exception if no files were located
+    :type fail_if_empty: bool
+    :param default_glob: the default glob to use, ignored if None
+    :type default_glob: str
+    :param resume_from: the file name to resume from (glob syntax)
+    :type resume_from: str
+    :param lazy: whether to enumerate the files lazily
+    :type lazy: bool
+    :param shard: the tuple of shard index (1-based) and count, None for all files
+    :type shard: tuple
+    :return: the input files
+    :rtype: InputFiles
+    """
+    if lazy:
+        files = iterate_files(inputs, input_lists=input_lists, fail_if_empty=fail_if_empty,
+                              default_glob=default_glob, resume_from=resume_from)
+    else:
+        files = locate_files(inputs, input_lists=input_lists, fail_if_empty=fail_if_empty,
+                             default_glob=default_glob, resume_from=resume_from)
+    if shard is not None:
+        roots = None
+        if inputs is not None:
+            roots = [shard_root(expand_variables(x)) for x in ([inputs] if isinstance(inputs, str) else inputs)]
+        files = (x for x in files if in_shard(x, shard, roots))
+    return InputFiles(files)
@@ -0,0 +1,207 @@
+import argparse
+import glob
+import os
+import time
+from typing import List, Optional, Iterable, Dict, Tuple
+
+GLOB_NAME_PLACEHOLDER = "{NAME}"
+""" the placeholder for the name of the current file in the glob expressions for other input files (same as kasperl's poll-dir/watch-dir). """
+
+
+def add_micro_batch_options(parser: argparse.ArgumentParser):
+    """
+    Adds the micro-batching and debounce options to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--batch_files", type=int, help="Collects new files into micro-batches, closing the batch once it contains this many files; <1 for no limit. The whole batch gets pushed through the filters at once.", required=False, default=-1)
+    parser.add_argument("--batch_time", type=int, help="Closes the micro-batch this many milliseconds after its first file arrived; <1 for not waiting for further files.", required=False, default=-1)
+    parser.add_argument("--batch_bytes", type=int, help="Closes the micro-batch once the sizes of its files add up to this many bytes; <1 for no limit.", required=False, default=-1)
+    parser.add_argument("--debounce", type=int, help="Only considers files that have not been modified for this many milliseconds, skipping files that are still being written; <1 to disable.", required=False, default=-1)
+
+
+def locate_other_input_files(path: str, dir_in: str, other_input_files: Optional[List[str]]) -> List[str]:
+    """
+    Returns the other input files associated with the file.
+
+    :param path: the file to get the other files for
+    :type path: str
+    :param dir_in: the directory to look for the other files
+    :type dir_in: str
+    :param other_input_files: the glob expressions for the other files (using GLOB_NAME_PLACEHOLDER), can be None
+    :type other_input_files: list
+    :return: the other files
+    :rtype: list
+    """
+    result = []
+    if other_input_files is not None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        for other_input_file in other_input_files:
+            result.extend(glob.glob(os.path.join(dir_in, other_input_file.replace(GLOB_NAME_PLACEHOLDER, name))))
+    return result
+
+
+def micro_batching_enabled(batch_files: Optional[int], batch_time: Optional[int], batch_bytes: Optional[int], debounce: Optional[int]) -> bool:
+    """
+    Checks whether any of the micro-batching/debounce options is enabled.
+
+    :param batch_files: the maximum number of files per batch, <1 or None for no limit
+    :type batch_files: int
+    :param batch_time: the maximum time in msec to wait after the first file, <1 or None for no waiting
+    :type batch_time: int
+    :param batch_bytes: the maximum number of bytes per batch, <1 or None for no limit
+    :type batch_bytes: int
+    :param debounce: the time in msec that a file must not have been modified, <1 or None to disable
+    :type debounce: int
+    :return: True if enabled
+    :rtype: bool
+    """
+    for value in [batch_files, batch_time, batch_bytes, debounce]:
+        if (value is not None) and (value > 0):
+            return True
+    return False
+
+
+class MicroBatcher:
+    """
+    Collects files into micro-batches. A batch gets closed by whichever comes first: the maximum
+    number of files, the maximum time since its first file or the maximum number of bytes. Without
+    a time limit, a batch gets closed as soon as no further files are pending. With a debounce window,
+    files only get added to the batch once their size and modification time have been stable for that long.
+    """
+
+    def __init__(self, batch_files: int = None, batch_time: int = None, batch_bytes: int = None, debounce: int = None):
+        """
+        Initializes the batcher.
+
+        :param batch_files: the maximum number of files per batch, <1 or None for no limit
+        :type batch_files: int
+        :param batch_time: the maximum time in msec to wait after the first file, <1 or None for no waiting
+        :type batch_time: int
+        :param batch_bytes: the maximum number of bytes per batch, <1 or None for no limit
+        :type batch_bytes: int
+        :param debounce: the time in msec that a file must not have been modified, <1 or None to disable
+        :type debounce: int
+        """
+        self.batch_files = -1 if batch_files is None else batch_files
+        self.batch_time = -1 if batch_time is None else batch_time
+        self.batch_bytes = -1 if batch_bytes is None else batch_bytes
+        self.debounce = -1 if debounce is None else debounce
+        self._pending: Dict[str, Tuple[int, float, float]] = dict()
+        self._batch: List[str] = []
+        self._batch_set = set()
+        self._batch_size = 0
+        self._batch_start = None
+
+    def offer(self, paths: Iterable[str]):
+        """
+        Adds the files as candidates, files that are already pending or in the batch get ignored.
+
+        :param paths: the files to add
+        :type paths: Iterable
+        """
+        now = time.time()
+        for path in paths:
+            if (path in self._pending) or (path in self._batch_set):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            self._pending[path] = (stat.st_size, stat.st_mtime, now)
+
+    def _is_stable(self, path: str, now: float) -> Optional[bool]:
+        """
+        Checks whether the file has not changed for the debounce window.
+
+        :param path: the file to check
+        :type path: str
+        :param now: the current time in seconds
+        :type now: float
+        :return: whether stable, None if the file no longer exists
+        :rtype: bool
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        size, mtime, seen = self._pending[path]
+        if (stat.st_size != size) or (stat.st_mtime != mtime):
+            self._pending[path] = (stat.st_size, stat.st_mtime, now)
+            return False
+        if self.debounce < 1:
+            return True
+        window = self.debounce / 1000.0
+        return (now - stat.st_mtime >= window) or (now - seen >= window)
+
+    def _is_full(self) -> bool:
+        """
+        Checks whether the file or byte limit of the batch has been reached.
+
+        :return: True if full
+        :rtype: bool
+        """
+        if (self.batch_files > 0) and (len(self._batch) >= self.batch_files):
+            return True
+        if (self.batch_bytes > 0) and (self._batch_size >= self.batch_bytes):
+            return True
+        return False
+
+    def poll(self) -> Optional[List[str]]:
+        """
+        Moves the stable pending files into the batch and returns the batch if it is closed.
+
+        :return: the closed batch, None if not yet closed
+        :rtype: list
+        """
+        now = time.time()
+        for path in list(self._pending.keys()):
+            if self._is_full():
+                break
+            stable = self._is_stable(path, now)
+            if stable is None:
+                self._pending.pop(path)
+                continue
+            if not stable:
+                continue
+            size = self._pending.pop(path)[0]
+            if self._batch_start is None:
+                self._batch_start = now
+            self._batch.append(path)
+            self._batch_set.add(path)
+            self._batch_size += size
+
+        if len(self._batch) == 0:
+            return None
+        if self._is_full():
+            return self.flush()
+        if self.batch_time > 0:
+            if (now - self._batch_start) * 1000.0 >= self.batch_time:
+                return self.flush()
+        elif len(self._pending) == 0:
+            return self.flush()
+        return None
+
+    def flush(self) -> List[str]:
+        """
+        Returns the current batch (regardless of the limits) and starts a new one.
+
+        :return: the batch
+        :rtype: list
+        """
+        result = self._batch
+        self._batch = []
+        self._batch_set = set()
+        self._batch_size = 0
+        self._batch_start = None
+        return result
+
+    def has_pending(self) -> bool:
+        """
+        Returns whether there are files pending or in the current batch.
+
+        :return: True if files pending
+        :rtype: bool
+        """
+        return (len(self._pending) > 0) or (len(self._batch) > 0)
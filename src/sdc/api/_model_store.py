@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+STORE_VERSION = 1
+""" the version of the store format. """
+
+EXT_INDEX = ".idx"
+""" the extension for the index files (pickled object graph and buffer locations). """
+
+EXT_BUFFERS = ".bin"
+""" the extension for the files with the array data. """
+
+ALIGNMENT = 64
+""" the alignment of the array data in the buffer files. """
+
+
+class _StoredModel:
+    """
+    Container for a memory-mapped model.
+    """
+
+    def __init__(self, mtime: int, size: int, meta: bytes, locations: List[Tuple[int, int]], buffers: Optional[mmap.mmap]):
+        """
+        Initializes the container.
+
+        :param mtime: the modification time of the model file in nanoseconds
+        :type mtime: int
+        :param size: the size of the model file
+        :type size: int
+        :param meta: the pickled object graph, without the array data
+        :type meta: bytes
+        :param locations: the offset and length of the array data in the buffers
+        :type locations: list
+        :param buffers: the memory-mapped array data, None if no array data
+        :type buffers: mmap.mmap
+        """
+        self.mtime = mtime
+        self.size = size
+        self.meta = meta
+        self.locations = locations
+        self.buffers = buffers
+
+    def instantiate(self) -> Any:
+        """
+        Unpickles the model, with the arrays referencing the memory-mapped data rather than copies.
+
+        :return: the model
+        """
+        if self.buffers is None:
+            return pickle.loads(self.meta, buffers=[])
+        view = memoryview(self.buffers)
+        return pickle.loads(self.meta, buffers=[view[o:o + n] for o, n in self.locations])
+
+
+class ModelStore:
+    """
+    Keeps the arrays of pickled models (as loaded via 'load_from') in memory-mapped files, so that
+    processes and pipelines loading the same model share a single copy of the data. On first use, a
+    model gets converted into an index and a buffer file in the store directory (pickle protocol 5
+    with out-of-band buffers). Models get reloaded when the modification time or size of the model
+    file changes. The arrays must be treated as read-only: they get mapped copy-on-write, i.e., modifications
+    do not reach the files or other processes, but they are visible to the other pipelines of the process.
+    """
+
+    def __init__(self, store_dir: str, logger: Optional[logging.Logger] = None):
+        """
+        Initializes the store.
+
+        :param store_dir: the directory for the converted models
+        :type store_dir: str
+        :param logger: the logger to use, can be None
+        :type logger: logging.Logger
+        """
+        self.store_dir = store_dir
+        self.logger = logger if (logger is not None) else logging.getLogger("spectral-data-converter")
+        self._models: Dict[str, _StoredModel] = dict()
+        self._lock = threading.Lock()
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def _prefix(self, path: str) -> str:
+        """
+        Returns the prefix for the files of the model in the store directory.
+
+        :param path: the absolute path of the model file
+        :type path: str
+        :return: the prefix
+        :rtype: str
+        """
+        return hashlib.sha256(path.encode("utf-8")).hexdigest()[:32]
+
+    def _convert(self, path: str, base: str):
+        """
+        Converts the pickled model into an index and a buffer file.
+
+        :param path: the model file
+        :type path: str
+        :param base: the path of the files to generate, without extension
+        :type base: str
+        """
+        self.logger.info("Converting model for store: %s" % path)
+        with open(path, "rb") as fp:
+            model = pickle.load(fp)
+        buffers = []
+        meta = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+
+        locations = []
+        tmp = base + EXT_BUFFERS + ".%d.tmp" % os.getpid()
+        with open(tmp, "wb") as fp:
+            offset = 0
+            for buffer in buffers:
+                data = buffer.raw()
+                padding = (ALIGNMENT - offset % ALIGNMENT) % ALIGNMENT
+                fp.write(b"\0" * padding)
+                offset += padding
+                fp.write(data)
+                locations.append((offset, data.nbytes))
+                offset += data.nbytes
+        os.replace(tmp, base + EXT_BUFFERS)
+
+        # index gets written last, marking the conversion as complete
+        tmp = base + EXT_INDEX + ".%d.tmp" % os.getpid()
+        with open(tmp, "wb") as fp:
+            pickle.dump({"version": STORE_VERSION, "meta": meta, "locations": locations}, fp)
+        os.replace(tmp, base + EXT_INDEX)
+
+    def _remove_outdated(self, prefix: str, base: str):
+        """
+        Removes the files of other versions of the model. Processes that have them mapped can continue using them.
+
+        :param prefix: the prefix of the model's files
+        :type prefix: str
+        :param base: the path of the current files, without extension
+        :type base: str
+        """
+        current = os.path.basename(base)
+        for f in os.listdir(self.store_dir):
+            if f.startswith(prefix + "-") and not f.startswith(current + "."):
+                try:
+                    os.remove(os.path.join(self.store_dir, f))
+                except FileNotFoundError:
+                    pass
+
+    def _map(self, path: str, mtime: int, size: int) -> _StoredModel:
+        """
+        Maps the converted model, converting it first if necessary.
+
+        :param path: the absolute path of the model file
+        :type path: str
+        :param mtime: the modification time of the model file in nanoseconds
+        :type mtime: int
+        :param size: the size of the model file
+        :type size: int
+        :return: the mapped model
+        :rtype: _StoredModel
+        """
+        prefix = self._prefix(path)
+        base = os.path.join(self.store_dir, "%s-%d-%d" % (prefix, mtime, size))
+        if not os.path.exists(base + EXT_INDEX):
+            self._convert(path, base)
+            self._remove_outdated(prefix, base)
+        with open(base + EXT_INDEX, "rb") as fp:
+            index = pickle.load(fp)
+        if index.get("version") != STORE_VERSION:
+            raise Exception("Unsupported model store version in %s: %s" % (base + EXT_INDEX, str(index.get("version"))))
+        buffers = None
+        if len(index["locations"]) > 0:
+            with open(base + EXT_BUFFERS, "rb") as fp:
+                buffers = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.logger.info("Mapped model from store: %s" % base)
+        return _StoredModel(mtime, size, index["meta"], index["locations"], buffers)
+
+    def load(self, path: str) -> Any:
+        """
+        Returns the model stored in the file, reloading it if the file has changed.
+
+        :param path: the pickled model file
+        :type path: str
+        :return: the model
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            model = self._models.get(path)
+            if (model is None) or (model.mtime != stat.st_mtime_ns) or (model.size != stat.st_size):
+                if model is not None:
+                    self.logger.info("Model file changed, reloading: %s" % path)
+                # previous mapping stays alive as long as models reference it
+                model = self._map(path, stat.st_mtime_ns, stat.st_size)
+                self._models[path] = model
+            return model.instantiate()
+
+
+_stores: Dict[str, ModelStore] = dict()
+""" the model stores of this process, per directory. """
+
+_stores_lock = threading.Lock()
+
+
+def get_model_store(store_dir: str) -> ModelStore:
+    """
+    Returns the model store for the directory, shared by all pipelines within the process.
+
+    :param store_dir: the directory of the store
+    :type store_dir: str
+    :return: the store
+    :rtype: ModelStore
+    """
+    store_dir = os.path.abspath(store_dir)
+    with _stores_lock:
+        if store_dir not in _stores:
+            _stores[store_dir] = ModelStore(store_dir)
+        return _stores[store_dir]
@@ -0,0 +1,323 @@
+import argparse
+import logging
+from typing import Union, Tuple, Dict, Any, List, Optional, Iterable
+
+import numpy as np
+from seppl import Plugin, Initializable, init_initializable, split_cmdline
+from seppl.io import Reader, BatchFilter, Writer, StreamWriter, BatchWriter, filter_data
+from wai.logging import LOGGING_WARNING, set_logging_level
+from wai.spectralio.api import Spectrum as WaiSpectrum
+
+from kasperl.api import Session
+from ._2d import Spectrum2D
+from ._arrays import DTYPE_FLOAT64, spectra_to_arrays, arrays_to_spectrum, has_sample_id
+from ._data import Spectrum
+
+PluginSpec = Union[Plugin, str, Tuple[str, Dict[str, Any]]]
+""" a plugin instance, a command-line string (name plus options) or a tuple of name and options dictionary. """
+
+
+def options_to_args(options: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    Turns the options dictionary into command-line arguments, with the keys representing
+    the long option names (without the leading dashes). Boolean values represent flags,
+    lists/tuples get added as multiple values and None values get skipped.
+
+    :param options: the options to convert, can be None
+    :type options: dict
+    :return: the command-line arguments
+    :rtype: list
+    """
+    result = []
+    if options is None:
+        return result
+    for key, value in options.items():
+        if value is None:
+            continue
+        opt = "--" + key
+        if isinstance(value, bool):
+            if value:
+                result.append(opt)
+        elif isinstance(value, (list, tuple)):
+            result.append(opt)
+            result.extend([str(x) for x in value])
+        else:
+            result.append(opt)
+            result.append(str(value))
+    return result
+
+
+def _available(plugin_type: type, name: str) -> Dict[str, Plugin]:
+    """
+    Returns the available plugins of the specified type, only loading the named plugin if lazy loading is possible.
+
+    :param plugin_type: the type of plugins to retrieve (Reader, BatchFilter, Writer)
+    :type plugin_type: type
+    :param name: the name of the plugin that is required
+    :type name: str
+    :return: the plugins
+    :rtype: dict
+    """
+    from sdc.registry import available_readers, available_filters, available_writers, lazy_pipeline_plugins
+    plugins = lazy_pipeline_plugins([name])
+    if plugins is not None:
+        readers, filters, writers = plugins
+    else:
+        readers, filters, writers = None, None, None
+    if plugin_type is Reader:
+        return available_readers() if (readers is None) else readers
+    elif plugin_type is Writer:
+        return available_writers() if (writers is None) else writers
+    else:
+        return available_filters() if (filters is None) else filters
+
+
+def create_plugin(spec: PluginSpec, plugin_type: type = BatchFilter) -> Plugin:
+    """
+    Instantiates the plugin from the specification, which can be an instance, a command-line
+    string (eg "savitzky-golay -w 5") or a tuple of name and options (eg ("savitzky-golay", {"num_points_left": 5})).
+    Instances get returned as is.
+
+    :param spec: the plugin specification
+    :param plugin_type: the type of plugin (Reader, BatchFilter, Writer)
+    :type plugin_type: type
+    :return: the plugin
+    :rtype: Plugin
+    """
+    if isinstance(spec, Plugin):
+        if not isinstance(spec, plugin_type):
+            raise Exception("Expected plugin of type %s, but got: %s" % (plugin_type.__name__, str(type(spec))))
+        return spec
+
+    if isinstance(spec, str):
+        args = split_cmdline(spec)
+        if len(args) == 0:
+            raise Exception("Empty plugin specification!")
+        name = args[0]
+        args = args[1:]
+    elif isinstance(spec, (tuple, list)) and (len(spec) == 2):
+        name = spec[0]
+        args = options_to_args(spec[1])
+    else:
+        raise Exception("Unsupported plugin specification: %s" % str(spec))
+
+    plugins = _available(plugin_type, name)
+    if name not in plugins:
+        raise Exception("Unknown %s plugin: %s" % (plugin_type.__name__, name))
+    result = plugins[name].__class__()
+    unknown = result.parse_args(args)
+    if (unknown is not None) and (len(unknown) > 0):
+        raise Exception("Unknown options for plugin '%s': %s" % (name, str(unknown)))
+    return result
+
+
+class Pipeline(Initializable):
+    """
+    In-process pipeline for applying filters (and optionally a writer) to spectra or NumPy arrays
+    without going through the command-line. The plugins get initialized once and then reused
+    across calls of the process methods, with each call representing a batch. Use finalize()
+    (or the pipeline as context manager) to release the plugins.
+    """
+
+    def __init__(self, filters: List[PluginSpec] = None, reader: PluginSpec = None, writer: PluginSpec = None,
+                 logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the pipeline.
+
+        :param filters: the filters to apply, in order
+        :type filters: list
+        :param reader: the optional reader to use with the run method
+        :param writer: the optional writer to forward the filtered data to
+        :param logging_level: the logging level for the session
+        :type logging_level: str
+        """
+        self.filters = [create_plugin(x, plugin_type=BatchFilter) for x in (filters if filters is not None else [])]
+        self.reader = None if (reader is None) else create_plugin(reader, plugin_type=Reader)
+        self.writer = None if (writer is None) else create_plugin(writer, plugin_type=Writer)
+        self.logging_level = logging_level
+        self.session = None
+        self._initialized = False
+
+    def logger(self) -> logging.Logger:
+        """
+        Returns the logger instance to use.
+
+        :return: the logger
+        :rtype: logging.Logger
+        """
+        if self.session is not None:
+            return self.session.logger
+        return logging.getLogger("spectral-data-converter")
+
+    def _create_session(self) -> Session:
+        """
+        Creates the session that gets shared among the plugins.
+
+        :return: the session
+        :rtype: Session
+        """
+        options = argparse.Namespace()
+        options.update_interval = 1000
+        options.logging_level = self.logging_level
+        options.force_batch = True
+        options.variables = None
+        options.dump_pipeline = None
+        result = Session(options=options, logger=logging.getLogger("spectral-data-converter"))
+        set_logging_level(result.logger, self.logging_level)
+        return result
+
+    def initialize(self):
+        """
+        Initializes the filters and writer, if not already initialized.
+        """
+        if self._initialized:
+            return
+        self.session = self._create_session()
+        for filter_ in self.filters:
+            filter_.session = self.session
+            if isinstance(filter_, Initializable):
+                init_initializable(filter_, "filter", raise_again=True)
+        if self.writer is not None:
+            self.writer.session = self.session
+            if isinstance(self.writer, Initializable):
+                init_initializable(self.writer, "writer", raise_again=True)
+        self._initialized = True
+
+    def _wrap(self, spectrum: Union[Spectrum, WaiSpectrum], index: int) -> Spectrum:
+        """
+        Wraps plain spectra in a container, using the ID as name (or a generated name if no ID,
+        i.e., empty or the default one).
+
+        :param spectrum: the spectrum to wrap
+        :param index: the overall index of the spectrum, for generating a name
+        :type index: int
+        :return: the container
+        :rtype: Spectrum
+        """
+        if isinstance(spectrum, Spectrum):
+            return spectrum
+        if has_sample_id(spectrum):
+            name = str(spectrum.id)
+        else:
+            name = "spectrum-%d" % index
+        return Spectrum2D(spectrum_name=name, spectrum=spectrum)
+
+    def process(self, data: Union[Spectrum, WaiSpectrum, Iterable[Union[Spectrum, WaiSpectrum]]]) -> List[Spectrum]:
+        """
+        Pushes the spectra through the filters (as a single batch) and, if present, the writer.
+        Plain spectra (wai.spectralio) get wrapped in Spectrum2D containers first.
+
+        :param data: the spectrum or spectra to process
+        :return: the filtered spectra
+        :rtype: list
+        """
+        self.initialize()
+        if isinstance(data, (Spectrum, WaiSpectrum)):
+            data = [data]
+        data = [self._wrap(x, self.session.count + i + 1) for i, x in enumerate(data)]
+        self.session.count += len(data)
+
+        result = []
+        if len(self.filters) == 0:
+            result.extend(data)
+        else:
+            for filtered in filter_data(data, self.filters, session=self.session):
+                if filtered is None:
+                    continue
+                if isinstance(filtered, list):
+                    result.extend(filtered)
+                else:
+                    result.append(filtered)
+
+        if (self.writer is not None) and (len(result) > 0):
+            if isinstance(self.writer, StreamWriter):
+                for item in result:
+                    self.writer.write_stream(item)
+            elif isinstance(self.writer, BatchWriter):
+                self.writer.write_batch(result)
+            else:
+                raise Exception("Neither stream nor batch writer: %s" % str(type(self.writer)))
+        return result
+
+    def process_arrays(self, amplitudes: np.ndarray, waves: np.ndarray, ids: np.ndarray = None,
+                       sample_data: np.ndarray = None, dtype: str = DTYPE_FLOAT64) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pushes the spectra represented by the arrays through the pipeline and returns the filtered
+        spectra as arrays again.
+
+        :param amplitudes: the amplitude matrix (one spectrum per row) or a single spectrum (1-D)
+        :type amplitudes: np.ndarray
+        :param waves: the wave numbers, either shared (1-D) or one row per spectrum (2-D)
+        :type waves: np.ndarray
+        :param ids: the sample IDs, can be None
+        :type ids: np.ndarray
+        :param sample_data: the JSON-encoded sample data, one per spectrum, can be None
+        :type sample_data: np.ndarray
+        :param dtype: the data type to use for the output amplitudes and wave numbers
+        :type dtype: str
+        :return: the tuple of amplitudes, waves, IDs and sample data of the filtered spectra
+        :rtype: tuple
+        """
+        amplitudes = np.asarray(amplitudes)
+        if amplitudes.ndim == 1:
+            amplitudes = amplitudes.reshape((1, -1))
+        waves = np.asarray(waves)
+        spectra = []
+        for i in range(len(amplitudes)):
+            spectra.append(arrays_to_spectrum(
+                amplitudes[i],
+                waves if (waves.ndim == 1) else waves[i],
+                sample_id=None if (ids is None) else ids[i],
+                sample_data=None if (sample_data is None) else sample_data[i]))
+        return spectra_to_arrays([x.spectrum for x in self.process(spectra)], dtype=dtype)
+
+    def run(self) -> List[Spectrum]:
+        """
+        Reads all the data from the reader and pushes it through the pipeline as a single batch.
+        The reader gets initialized and finalized with every call.
+
+        :return: the filtered spectra
+        :rtype: list
+        """
+        if self.reader is None:
+            raise Exception("No reader defined!")
+        self.initialize()
+        self.reader.session = self.session
+        if isinstance(self.reader, Initializable):
+            init_initializable(self.reader, "reader", raise_again=True)
+        data = []
+        try:
+            while True:
+                for item in self.reader.read():
+                    if item is None:
+                        continue
+                    if isinstance(item, list):
+                        data.extend(item)
+                    else:
+                        data.append(item)
+                if self.reader.has_finished():
+                    break
+        finally:
+            if isinstance(self.reader, Initializable):
+                self.reader.finalize()
+        return self.process(data)
+
+    def finalize(self):
+        """
+        Finalizes the filters and writer, e.g., flushing and closing output files.
+        """
+        if not self._initialized:
+            return
+        for filter_ in self.filters:
+            if isinstance(filter_, Initializable):
+                filter_.finalize()
+        if (self.writer is not None) and isinstance(self.writer, Initializable):
+            self.writer.finalize()
+        self._initialized = False
+
+    def __enter__(self):
+        self.initialize()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finalize()
@@ -0,0 +1,158 @@
+import argparse
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Optional, Callable, IO
+
+from ._compression import decompress_fileobj, compression_from_extension, COMPRESSION_NONE
+
+
+def add_prefetch_option(parser: argparse.ArgumentParser):
+    """
+    Adds the prefetch option to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--prefetch", type=int, help="The number of upcoming input files to read into memory in background threads while the current one is being processed (output order is retained); 0 to disable.", required=False, default=0)
+
+
+def add_parse_processes_option(parser: argparse.ArgumentParser):
+    """
+    Adds the parse processes option to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--parse_processes", type=int, help="The number of processes to use for parsing the prefetched files; 0 to parse them in the main process. Requires --prefetch.", required=False, default=0)
+
+
+def open_bytes(data: bytes, path: str, binary: bool, sniff: bool = False) -> IO:
+    """
+    Turns the raw bytes of a file into a file-like object, mimicking how the file would get opened from disk.
+    Compressed data (gzip, bz2, xz, zstd) gets decompressed, with the compression determined from the
+    extension or, if enabled, from the magic bytes.
+
+    :param data: the raw bytes
+    :type data: bytes
+    :param path: the path of the file the bytes came from
+    :type path: str
+    :param binary: whether to return a binary or text file-like object
+    :type binary: bool
+    :param sniff: whether to inspect the magic bytes of files without compression extension
+    :type sniff: bool
+    :return: the file-like object
+    """
+    compression = compression_from_extension(path)
+    if (compression is None) and not sniff:
+        compression = COMPRESSION_NONE
+    result = decompress_fileobj(io.BytesIO(data), compression=compression)
+    if not binary:
+        result = io.TextIOWrapper(result)
+    return result
+
+
+def _load_bytes(path: str) -> bytes:
+    """
+    Reads the raw bytes from the file.
+
+    :param path: the file to read
+    :type path: str
+    :return: the content
+    :rtype: bytes
+    """
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+class Prefetcher:
+    """
+    Reads the raw bytes of upcoming input files in background threads and, optionally,
+    parses them in a pool of processes. Results get handed out in the order the
+    files get requested.
+    """
+
+    def __init__(self, num_files: int, parse_func: Callable = None, num_processes: int = 0):
+        """
+        Initializes the prefetcher.
+
+        :param num_files: the maximum number of files to prefetch
+        :type num_files: int
+        :param parse_func: the picklable function for parsing the bytes in a separate process, receives path and bytes, None for returning the raw bytes
+        :param num_processes: the number of processes to use for parsing, requires parse_func
+        :type num_processes: int
+        """
+        self.num_files = num_files
+        self.parse_func = parse_func
+        self.num_processes = num_processes
+        self._threads = None
+        self._processes = None
+        self._pending = deque()
+
+    def _load(self, path: str):
+        """
+        Loads the file and parses it, if necessary. Gets executed in a background thread.
+
+        :param path: the file to load
+        :type path: str
+        :return: the raw bytes or the parsed content
+        """
+        data = _load_bytes(path)
+        if self._processes is not None:
+            return self._processes.submit(self.parse_func, path, data).result()
+        return data
+
+    def _schedule(self, paths: List[str]):
+        """
+        Ensures that the specified files are being prefetched.
+
+        :param paths: the files to prefetch, in order
+        :type paths: list
+        """
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=max(1, self.num_files))
+            if (self.parse_func is not None) and (self.num_processes > 0):
+                self._processes = ProcessPoolExecutor(max_workers=self.num_processes)
+        for i, path in enumerate(paths):
+            if i < len(self._pending):
+                continue
+            self._pending.append((path, self._threads.submit(self._load, path)))
+
+    def _cancel(self):
+        """
+        Cancels all pending files.
+        """
+        while len(self._pending) > 0:
+            self._pending.popleft()[1].cancel()
+
+    def get(self, path: str, upcoming: Optional[List[str]] = None):
+        """
+        Returns the content for the file, waiting for it to become available if necessary.
+        Schedules the prefetching of the upcoming files.
+
+        :param path: the file to get the content for
+        :type path: str
+        :param upcoming: the files that will get requested next (in order)
+        :type upcoming: list
+        :return: the raw bytes or the parsed content
+        """
+        # inputs changed?
+        if (len(self._pending) > 0) and (self._pending[0][0] != path):
+            self._cancel()
+        paths = [path]
+        if upcoming is not None:
+            paths.extend(upcoming[:self.num_files])
+        self._schedule(paths)
+        return self._pending.popleft()[1].result()
+
+    def close(self):
+        """
+        Cancels any pending files and shuts down the pools.
+        """
+        self._cancel()
+        if self._threads is not None:
+            self._threads.shutdown(wait=True, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
+            self._processes = None
@@ -1,10 +1,19 @@
+import abc
 import argparse
-from typing import List
+import io
+import os
+from functools import partial
+from typing import List, IO, Iterable, Optional
 
 from kasperl.api import Reader as KReader
 from wai.logging import LOGGING_WARNING
+from wai.spectralio.api import Spectrum as WaiSpectrum
+from wai.spectralio.sampleidextraction import SampleIDExtraction
 
+from ._arrays import NO_SAMPLE_ID
+from ._compression import detect_compression, open_input, strip_compression_extension, add_sniff_compression_option
 from ._data import SampleData
+from ._prefetch import Prefetcher, add_prefetch_option, add_parse_processes_option, open_bytes
 from ._spectralio import SpectralIOBased
 
 
@@ -82,11 +91,167 @@ def add_locale_option(parser: argparse.ArgumentParser):
     parser.add_argument("--locale", type=str, help="The locale to use for parsing/formatting numbers", required=False, default="en_US")
 
 
+PLACEHOLDER_IDS = {"", ".", NO_SAMPLE_ID}
+""" the sample IDs that readers generate when they cannot derive the ID from the file name. """
+
+
+def _binary_mode(reader, path: Optional[str]) -> bool:
+    """
+    Returns whether the wai.spectralio reader expects binary file-like objects for the file.
+
+    :param reader: the wai.spectralio reader to query
+    :param path: the file to read (compression extensions get ignored), None if unknown
+    :type path: str
+    :return: True if binary
+    :rtype: bool
+    """
+    return reader.binary_mode("" if path is None else strip_compression_extension(path))
+
+
+def _sample_id(reader, path: str) -> str:
+    """
+    Determines the sample ID from the file name, the same way the reader would when reading the file from disk.
+
+    :param reader: the wai.spectralio reader to use
+    :param path: the file the data came from (compression extensions get ignored)
+    :type path: str
+    :return: the sample ID
+    :rtype: str
+    """
+    path = strip_compression_extension(path)
+    if isinstance(reader, SampleIDExtraction):
+        return reader.extract(path)
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _read_spectra_fp(reader, fp: IO, path: Optional[str] = None) -> List[WaiSpectrum]:
+    """
+    Reads the spectra from the file-like object using the wai.spectralio reader.
+    Binary file-like objects (e.g., archive members) get wrapped for text-based formats.
+    Since the reader does not know the file name, placeholder sample IDs get replaced
+    with the one derived from the path (if available).
+
+    :param reader: the wai.spectralio reader to use
+    :param fp: the file-like object to read from
+    :param path: the file the data came from, None if unknown
+    :type path: str
+    :return: the spectra
+    :rtype: list
+    """
+    if path is None:
+        path = getattr(fp, "name", None)
+        if not isinstance(path, str):
+            path = None
+    if _binary_mode(reader, path) or isinstance(fp, io.TextIOBase):
+        result = reader.read_fp(fp)
+    else:
+        wrapper = io.TextIOWrapper(fp)
+        try:
+            result = reader.read_fp(wrapper)
+        finally:
+            wrapper.detach()
+    if path is not None:
+        for sp in result:
+            if sp.id in PLACEHOLDER_IDS:
+                sp.id = _sample_id(reader, path)
+    return result
+
+
+def _parse_spectra(reader, path: str, data: bytes, sniff: bool = False) -> List[WaiSpectrum]:
+    """
+    Parses the raw bytes of a file using the wai.spectralio reader.
+
+    :param reader: the wai.spectralio reader to use
+    :param path: the file the bytes came from
+    :type path: str
+    :param data: the raw bytes to parse
+    :type data: bytes
+    :param sniff: whether to detect the compression of files without compression extension from the magic bytes
+    :type sniff: bool
+    :return: the spectra
+    :rtype: list
+    """
+    with open_bytes(data, path, _binary_mode(reader, path), sniff=sniff) as fp:
+        return _read_spectra_fp(reader, fp, path)
+
+
 class SpectralIOReader(Reader, SpectralIOBased):
     """
     Ancestor for readers that use a wai.spectralio-based reader under the hood.
     """
 
+    def __init__(self, instrument: str = None, format: str = None, keep_format: bool = None,
+                 prefetch: int = None, parse_processes: int = None, sniff_compression: bool = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param instrument: the instrument name to use
+        :type instrument: str
+        :param format: the spectral format
+        :type format: str
+        :param keep_format: whether to keep the format determined by the reader
+        :type keep_format: bool
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param parse_processes: the number of processes for parsing the prefetched files, 0 for parsing in the main process
+        :type parse_processes: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(instrument=instrument, format=format, keep_format=keep_format,
+                         logger_name=logger_name, logging_level=logging_level)
+        self.prefetch = prefetch
+        self.parse_processes = parse_processes
+        self.sniff_compression = sniff_compression
+        self._prefetcher = None
+        # the input files, derived readers that read files need to set them for prefetching the upcoming ones
+        self._inputs = None
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        add_prefetch_option(parser)
+        add_parse_processes_option(parser)
+        add_sniff_compression_option(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.prefetch = ns.prefetch
+        self.parse_processes = ns.parse_processes
+        self.sniff_compression = ns.sniff_compression
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.prefetch is None:
+            self.prefetch = 0
+        if self.parse_processes is None:
+            self.parse_processes = 0
+        if self.sniff_compression is None:
+            self.sniff_compression = False
+        if (self.parse_processes > 0) and (self.prefetch < 1):
+            self.logger().warning("Parsing in separate processes requires prefetching, parsing in main process instead!")
+        self._prefetcher = None
+
     def _compile_options(self) -> List[str]:
         """
         Compiles the options for initializing the underlying reader.
@@ -99,6 +264,7 @@ class SpectralIOReader(Reader, SpectralIOBased):
             result.append("--keep-format")
         return result
 
+    @abc.abstractmethod
     def _init_reader(self):
         """
         Initializes the reader.
@@ -107,6 +273,67 @@ class SpectralIOReader(Reader, SpectralIOBased):
         """
         raise NotImplementedError()
 
+    def _read_spectra_fp(self, fp: IO, path: Optional[str] = None) -> List[WaiSpectrum]:
+        """
+        Reads the spectra from the file-like object with the underlying reader.
+        Binary file-like objects (e.g., archive members) get wrapped for text-based formats.
+
+        :param fp: the file-like object to read from
+        :param path: the file the data came from, used for determining the sample IDs; None if unknown
+        :type path: str
+        :return: the spectra
+        :rtype: list
+        """
+        return _read_spectra_fp(self._reader, fp, path)
+
+    def _read_spectra(self, path: str) -> List[WaiSpectrum]:
+        """
+        Reads the spectra from the specified file with the underlying reader.
+        Compressed files get decompressed transparently in a background thread.
+        Uses the prefetched data if prefetching is enabled and schedules the
+        upcoming inputs to be prefetched.
+
+        :param path: the file to read
+        :type path: str
+        :return: the spectra
+        :rtype: list
+        """
+        if self.prefetch < 1:
+            compression = detect_compression(path, sniff=self.sniff_compression)
+            if compression is None:
+                return self._reader.read(path)
+            with open_input(path, _binary_mode(self._reader, path), compression=compression) as fp:
+                return self._read_spectra_fp(fp, path)
+
+        if self._prefetcher is None:
+            self._prefetcher = Prefetcher(self.prefetch, parse_func=partial(_parse_spectra, self._reader, sniff=self.sniff_compression),
+                                          num_processes=self.parse_processes)
+        result = self._prefetcher.get(path, upcoming=None if self._inputs is None else self._inputs.peek(self.prefetch))
+        if self.parse_processes > 0:
+            return result
+        return _parse_spectra(self._reader, path, result, sniff=self.sniff_compression)
+
+    @abc.abstractmethod
+    def read_file(self, path: str) -> Iterable:
+        """
+        Reads the data from the specified file and returns the items one by one.
+
+        :param path: the file to read
+        :type path: str
+        :return: the data
+        :rtype: Iterable
+        """
+        raise NotImplementedError()
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
 
 class SpectralIOReaderWithLocaleSupport(SpectralIOReader):
     """
@@ -114,6 +341,7 @@ class SpectralIOReaderWithLocaleSupport(SpectralIOReader):
     """
 
     def __init__(self, instrument: str = None, format: str = None, keep_format: bool = None, locale: str = None,
+                 prefetch: int = None, parse_processes: int = None, sniff_compression: bool = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -126,12 +354,20 @@ class SpectralIOReaderWithLocaleSupport(SpectralIOReader):
         :type keep_format: bool
         :param locale: the locale to use for parsing numbers
         :type locale: str
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param parse_processes: the number of processes for parsing the prefetched files, 0 for parsing in the main process
+        :type parse_processes: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
         :type logging_level: str
         """
-        super().__init__(instrument=instrument, format=format, keep_format=keep_format, logger_name=logger_name, logging_level=logging_level)
+        super().__init__(instrument=instrument, format=format, keep_format=keep_format,
+                         prefetch=prefetch, parse_processes=parse_processes, sniff_compression=sniff_compression,
+                         logger_name=logger_name, logging_level=logging_level)
         self.locale = locale
 
     def _create_argparser(self) -> argparse.ArgumentParser:
@@ -180,6 +416,89 @@ class SampleDataReader(KReader):
     Ancestor for sample data readers.
     """
 
+    def __init__(self, prefetch: int = None, sniff_compression: bool = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.prefetch = prefetch
+        self.sniff_compression = sniff_compression
+        self._prefetcher = None
+        # the input files, derived readers that read files need to set them for prefetching the upcoming ones
+        self._inputs = None
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        add_prefetch_option(parser)
+        add_sniff_compression_option(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.prefetch = ns.prefetch
+        self.sniff_compression = ns.sniff_compression
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.prefetch is None:
+            self.prefetch = 0
+        if self.sniff_compression is None:
+            self.sniff_compression = False
+        self._prefetcher = None
+
+    def _open_input(self, path: str, binary: bool = False) -> IO:
+        """
+        Opens the specified file for reading, decompressing it transparently if necessary.
+        Uses the prefetched data if prefetching is enabled and schedules the upcoming
+        inputs to be prefetched.
+
+        :param path: the file to open
+        :type path: str
+        :param binary: whether to open the file in binary or text mode
+        :type binary: bool
+        :return: the file-like object
+        """
+        if self.prefetch < 1:
+            return open_input(path, binary, sniff=self.sniff_compression)
+
+        if self._prefetcher is None:
+            self._prefetcher = Prefetcher(self.prefetch)
+        return open_bytes(self._prefetcher.get(path, upcoming=None if self._inputs is None else self._inputs.peek(self.prefetch)), path, binary, sniff=self.sniff_compression)
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
     def generates(self) -> List:
         """
         Returns the list of classes that get produced.
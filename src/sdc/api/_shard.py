@@ -0,0 +1,168 @@
+import argparse
+import os
+import zlib
+from typing import Optional, Tuple, List
+
+from seppl import Session
+
+from ._compression import compression_from_extension, COMPRESSION_EXTENSIONS
+
+SHARD_OPTION = "shard"
+""" the name of the global session option that stores the shard (index, count). """
+
+
+def add_shard_option(parser: argparse.ArgumentParser):
+    """
+    Adds the shard option to the parser.
+
+    :param parser: the parser to update
+    :type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--shard", type=str, metavar="INDEX/COUNT", help="Only processes the input files that fall into this shard (1-based index), e.g., '3/8'; the files get assigned via a hash of their path relative to the input directory (or their name for files from input lists). Writers with a single output file insert the shard into the file name.", required=False, default=None)
+
+
+def parse_shard(shard: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parses the shard specification.
+
+    :param shard: the shard in format INDEX/COUNT (1-based index), can be None
+    :type shard: str
+    :return: the tuple of index (1-based) and count, None if no shard specified
+    :rtype: tuple
+    """
+    if (shard is None) or (len(shard.strip()) == 0):
+        return None
+    parts = shard.split("/")
+    if len(parts) != 2:
+        raise Exception("Shard must be in format INDEX/COUNT: %s" % shard)
+    index = int(parts[0])
+    count = int(parts[1])
+    if count < 1:
+        raise Exception("Shard count must be at least 1: %s" % shard)
+    if (index < 1) or (index > count):
+        raise Exception("Shard index must be between 1 and %d: %s" % (count, shard))
+    return index, count
+
+
+def shard_root(pattern: str) -> str:
+    """
+    Determines the input root of the path/glob, i.e., the directory up to the first
+    path component that contains glob characters (or the parent directory of a plain file).
+
+    :param pattern: the path/glob to get the root for
+    :type pattern: str
+    :return: the absolute root directory
+    :rtype: str
+    """
+    pattern = os.path.abspath(pattern)
+    if os.path.isdir(pattern):
+        return pattern
+    root = []
+    for part in pattern.split(os.sep):
+        if any(c in part for c in "*?["):
+            return os.sep.join(root) or os.sep
+        root.append(part)
+    return os.path.dirname(pattern)
+
+
+def shard_key(path: str, roots: Optional[List[str]] = None) -> str:
+    """
+    Generates the key for assigning the file to a shard: the path relative to the (most specific)
+    input root it is located in, otherwise the file name. This way, the assignment does not depend
+    on where the data is located on a particular machine.
+
+    :param path: the file to generate the key for
+    :type path: str
+    :param roots: the absolute input roots (see shard_root), can be None
+    :type roots: list
+    :return: the key
+    :rtype: str
+    """
+    if roots is not None:
+        path = os.path.abspath(path)
+        for root in sorted(roots, key=len, reverse=True):
+            if path.startswith(os.path.join(root, "")):
+                return os.path.relpath(path, root).replace(os.sep, "/")
+    return os.path.basename(path)
+
+
+def in_shard(path: str, shard: Optional[Tuple[int, int]], roots: Optional[List[str]] = None) -> bool:
+    """
+    Checks whether the file belongs to the shard. Uses a CRC32 hash of the key generated by shard_key.
+
+    :param path: the file to check
+    :type path: str
+    :param shard: the tuple of index (1-based) and count, None for no sharding
+    :type shard: tuple
+    :param roots: the absolute input roots (see shard_root), can be None
+    :type roots: list
+    :return: True if the file belongs to the shard
+    :rtype: bool
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(shard_key(path, roots).encode("utf-8")) % count == index - 1
+
+
+def set_session_shard(session: Session, shard: Optional[Tuple[int, int]]):
+    """
+    Records the shard in the session's global options, for the writers to use.
+
+    :param session: the session to update
+    :type session: Session
+    :param shard: the tuple of index (1-based) and count, None for no sharding
+    :type shard: tuple
+    """
+    if shard is None:
+        return
+    if session.options is None:
+        session.options = argparse.Namespace()
+    setattr(session.options, SHARD_OPTION, shard)
+
+
+def get_session_shard(session: Session) -> Optional[Tuple[int, int]]:
+    """
+    Returns the shard recorded in the session's global options.
+
+    :param session: the session to get the shard from
+    :type session: Session
+    :return: the tuple of index (1-based) and count, None for no sharding
+    :rtype: tuple
+    """
+    if (session is None) or (session.options is None):
+        return None
+    return getattr(session.options, SHARD_OPTION, None)
+
+
+def shard_suffix(shard: Tuple[int, int]) -> str:
+    """
+    Generates the suffix for output files of the shard.
+
+    :param shard: the tuple of index (1-based) and count
+    :type shard: tuple
+    :return: the suffix
+    :rtype: str
+    """
+    return "-shard%dof%d" % shard
+
+
+def shard_path(path: str, session: Session) -> str:
+    """
+    Inserts the shard recorded in the session into the output file name, before the
+    extension (and compression extension), e.g., 'out.arff.gz' -> 'out-shard3of8.arff.gz'.
+
+    :param path: the output file
+    :type path: str
+    :param session: the session to get the shard from
+    :type session: Session
+    :return: the (updated) output file
+    :rtype: str
+    """
+    shard = get_session_shard(session)
+    if shard is None:
+        return path
+    compression = compression_from_extension(path)
+    comp_ext = "" if compression is None else COMPRESSION_EXTENSIONS[compression]
+    base, ext = os.path.splitext(path[:len(path) - len(comp_ext)])
+    return base + shard_suffix(shard) + ext + comp_ext
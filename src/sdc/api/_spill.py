@@ -0,0 +1,174 @@
+import os
+import pickle
+import shutil
+import tempfile
+from typing import List, Dict, Any, Iterator, Optional
+
+SPILL_SAMPLE_SIZE = 10
+""" the number of items to serialize for estimating the size of the data. """
+
+
+class GroupSpill:
+    """
+    Collects items per group in memory. Once the estimated size exceeds the memory budget, the groups
+    get buffered in temporary binary files, one per group, and get streamed back one group at a time.
+    """
+
+    def __init__(self, budget: int, spill_dir: Optional[str] = None, prefix: str = "sdc-spill-"):
+        """
+        Initializes the spill.
+
+        :param budget: the memory budget in bytes, above which the items get written to disk
+        :type budget: int
+        :param spill_dir: the directory to create the temporary directory in, uses the system's default if None
+        :type spill_dir: str
+        :param prefix: the prefix for the temporary directory
+        :type prefix: str
+        """
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.prefix = prefix
+        self._dir = None
+        self._memory: Dict[Any, List[Any]] = dict()
+        self._files: Dict[Any, Any] = dict()
+        self._paths: Dict[Any, str] = dict()
+        self._counts: Dict[Any, int] = dict()
+        self._memory_count = 0
+        self._sample_count = 0
+        self._sample_size = 0
+
+    @property
+    def groups(self) -> List[Any]:
+        """
+        Returns the groups in the order they were first encountered.
+
+        :return: the groups
+        :rtype: list
+        """
+        return list(self._counts.keys())
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Returns whether the items are getting written to disk.
+
+        :return: True if written to disk
+        :rtype: bool
+        """
+        return self._dir is not None
+
+    def count(self, group: Any) -> int:
+        """
+        Returns the number of items stored for the group.
+
+        :param group: the group to get the count for
+        :return: the number of items
+        :rtype: int
+        """
+        return self._counts.get(group, 0)
+
+    def _memory_size(self) -> int:
+        """
+        Estimates the size of the items held in memory, extrapolating the serialized size of the first items.
+
+        :return: the estimated size in bytes
+        :rtype: int
+        """
+        if self._sample_count == 0:
+            return 0
+        return int(self._sample_size / self._sample_count * self._memory_count)
+
+    def _write(self, group: Any, item: Any):
+        """
+        Appends the item to the file of the group.
+
+        :param group: the group the item belongs to
+        :param item: the item to store
+        """
+        if group not in self._files:
+            path = os.path.join(self._dir, "group-%05d.pkl" % len(self._paths))
+            self._paths[group] = path
+            self._files[group] = open(path, "wb")
+        pickle.dump(item, self._files[group], protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _spill(self):
+        """
+        Moves the items held in memory to disk.
+        """
+        self._dir = tempfile.mkdtemp(prefix=self.prefix, dir=self.spill_dir)
+        for group, items in self._memory.items():
+            for item in items:
+                self._write(group, item)
+        self._memory = dict()
+        self._memory_count = 0
+
+    def add(self, group: Any, item: Any):
+        """
+        Adds the item to the group, writing it to disk if the memory budget has been exceeded.
+
+        :param group: the group the item belongs to
+        :param item: the item to store
+        """
+        self._counts[group] = self._counts.get(group, 0) + 1
+        if self.spilled:
+            self._write(group, item)
+            return
+        if group not in self._memory:
+            self._memory[group] = []
+        self._memory[group].append(item)
+        self._memory_count += 1
+        if self._sample_count < SPILL_SAMPLE_SIZE:
+            self._sample_size += len(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+            self._sample_count += 1
+        if self._memory_size() > self.budget:
+            self._spill()
+
+    def iterate(self, group: Any) -> Iterator[Any]:
+        """
+        Streams the items of the group back, from memory or from disk.
+
+        :param group: the group to read
+        :return: the items
+        """
+        if group not in self._counts:
+            return
+        if group in self._memory:
+            for item in self._memory[group]:
+                yield item
+            return
+        fp = self._files.pop(group, None)
+        if fp is not None:
+            fp.close()
+        with open(self._paths[group], "rb") as fp:
+            for _ in range(self._counts[group]):
+                yield pickle.load(fp)
+
+    def load(self, group: Any) -> List[Any]:
+        """
+        Loads all the items of the group and removes them from the spill.
+
+        :param group: the group to load
+        :return: the items
+        :rtype: list
+        """
+        if group not in self._counts:
+            raise KeyError(group)
+        result = list(self.iterate(group))
+        self._counts.pop(group)
+        if group in self._memory:
+            self._memory_count -= len(self._memory.pop(group))
+        if group in self._paths:
+            os.remove(self._paths.pop(group))
+        return result
+
+    def close(self):
+        """
+        Closes all files and removes the temporary directory.
+        """
+        for fp in self._files.values():
+            fp.close()
+        self._files = dict()
+        self._memory = dict()
+        self._memory_count = 0
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,32 @@
+DEFAULT_TABLE = "spectra"
+""" the default table for storing the spectra in. """
+
+WAVES_TABLE_SUFFIX = "_waves"
+""" the suffix for the table that stores the (shared) wave numbers. """
+
+COLUMN_ID = "_id"
+COLUMN_SAMPLE_ID = "_sample_id"
+COLUMN_WAVES_ID = "_waves_id"
+COLUMN_AMPLITUDES = "_amplitudes"
+COLUMN_DTYPE = "_dtype"
+COLUMN_WAVES = "_waves"
+COLUMNS = [
+    COLUMN_ID,
+    COLUMN_SAMPLE_ID,
+    COLUMN_WAVES_ID,
+    COLUMN_AMPLITUDES,
+    COLUMN_DTYPE,
+]
+""" the fixed columns of the spectra table, all other columns are sample data. """
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quotes the table/column name for use in SQL statements.
+
+    :param name: the name to quote
+    :type name: str
+    :return: the quoted name
+    :rtype: str
+    """
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Optional, List, Tuple
+
+CACHE_EXTENSION = ".sdcc"
+""" the extension for the cache files. """
+
+DEFAULT_CACHE_SIZE = 1024
+""" the default maximum size of the cache directory in MB. """
+
+
+def cache_key(*parts) -> str:
+    """
+    Generates a key from the (picklable) parts, by hashing their serialized form.
+
+    :param parts: the parts to generate the key from
+    :return: the hex digest
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(pickle.dumps(part, protocol=pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Stores the outputs of filters as pickled files in a directory, keyed by a hash.
+    When the total size exceeds the limit, the least recently used files get removed.
+    The total size gets determined once and then tracked in memory, the directory only
+    gets scanned again when evicting. The directory can be shared among several filters
+    and pipelines.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_CACHE_SIZE, logger: Optional[logging.Logger] = None):
+        """
+        Initializes the cache.
+
+        :param cache_dir: the directory to store the cached outputs in
+        :type cache_dir: str
+        :param max_size: the maximum size of the directory in MB, <1 for unlimited
+        :type max_size: int
+        :param logger: the logger to use, can be None
+        :type logger: logging.Logger
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.logger = logger if (logger is not None) else logging.getLogger("spectral-data-converter")
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """
+        Returns the file for the key.
+
+        :param key: the key to get the file for
+        :type key: str
+        :return: the file
+        :rtype: str
+        """
+        return os.path.join(self.cache_dir, key + CACHE_EXTENSION)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value for the key, marking it as recently used.
+
+        :param key: the key to look up
+        :type key: str
+        :return: the value, None if not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fp:
+                result = pickle.load(fp)
+            os.utime(path, None)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            self.logger.warning("Failed to load cached output, removing: %s" % path, exc_info=True)
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: str, value: Any):
+        """
+        Stores the value under the key and evicts old entries if the cache exceeds its size.
+
+        :param key: the key to store the value under
+        :type key: str
+        :param value: the value to store
+        """
+        if self._size is None:
+            self._size = self.size()
+        path = self._path(key)
+        tmp = path + ".%d.tmp" % os.getpid()
+        with open(tmp, "wb") as fp:
+            pickle.dump(value, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        if os.path.exists(path):
+            self._size -= os.path.getsize(path)
+        self._size += os.path.getsize(tmp)
+        os.replace(tmp, path)
+        if (self.max_size > 0) and (self._size > self.max_size * 1024 * 1024):
+            self.evict()
+
+    def _remove(self, path: str):
+        """
+        Removes the file, ignoring files that have already been removed.
+
+        :param path: the file to remove
+        :type path: str
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """
+        Returns the cache files.
+
+        :return: the list of tuples of last access (modification time), size and path
+        :rtype: list
+        """
+        result = []
+        for f in os.listdir(self.cache_dir):
+            if not f.endswith(CACHE_EXTENSION):
+                continue
+            path = os.path.join(self.cache_dir, f)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def size(self) -> int:
+        """
+        Returns the total size of the cached outputs.
+
+        :return: the size in bytes
+        :rtype: int
+        """
+        return sum([x[1] for x in self._entries()])
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits its size limit.
+        Scans the directory, picking up the outputs stored by other filters and pipelines.
+        """
+        if self.max_size < 1:
+            return
+        limit = self.max_size * 1024 * 1024
+        entries = sorted(self._entries())
+        total = sum([x[1] for x in entries])
+        while (total > limit) and (len(entries) > 0):
+            _, size, path = entries.pop(0)
+            self.logger.info("Evicting cached output: %s" % path)
+            self._remove(path)
+            total -= size
+        self._size = total
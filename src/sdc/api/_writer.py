@@ -5,6 +5,7 @@ from wai.logging import LOGGING_WARNING
 from seppl import Initializable
 import kasperl.api
 import seppl.io
+from ._compression import output_compression, open_output, strip_compression_extension
 from ._data import SampleData
 from ._spectralio import SpectralIOBased
 
@@ -22,6 +23,26 @@ class SpectralIOWriter(SpectralIOBased):
         """
         raise NotImplementedError()
 
+    def _write_spectra(self, spectra: List, path: str, compression: str = None):
+        """
+        Writes the spectra to the specified file with the underlying writer.
+        Compresses the output in a background thread if required.
+
+        :param spectra: the wai.spectralio spectra to write
+        :type spectra: list
+        :param path: the file to write to
+        :type path: str
+        :param compression: the compression to apply, None or 'none' to determine from the extension
+        :type compression: str
+        """
+        compression = output_compression(path, compression)
+        if compression is None:
+            self._writer.write(spectra, path)
+        else:
+            binary = self._writer.binary_mode(strip_compression_extension(path))
+            with open_output(path, compression, binary) as fp:
+                self._writer.write_fp(spectra, fp, binary)
+
 
 class DefaultExtensionWriter:
     """
@@ -1,22 +1,59 @@
-from ._abstractpls import AbstractPLS, AbstractSingleResponsePLS, AbstractMultiResponsePLS, PREPROCESSING, PREPROCESSING_ENUM, PREPROCESSING_NONE, PREPROCESSING_CENTER, PREPROCESSING_STANDARDIZE
-from ._add_sampledata import AddSampleData
-from ._apply_cleaner import ApplyCleaner
-from ._attach_metadata import AttachMetaData
-from ._center import Center
-from ._downsample import DownSample
-from ._equi_distance import EquiDistance
-from ._log import Log
-from ._pca import PCA
-from ._pls1 import PLS1
-from ._pyfunc_filter import PythonFunctionFilter
-from ._rename import Rename
-from ._rownorm import RowNorm
-from ._sanitize_name import SanitizeName
-from ._savitzkygolay import SavitzkyGolay
-from ._savitzkygolay2 import SavitzkyGolay2
-from ._simpls import SIMPLS
-from ._spectrum_to_sampledata import SpectrumToSampleData
-from ._standardize import Standardize
-from ._sub_process import SubProcess
-from ._tee import Tee
-from ._trigger import Trigger
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    "AbstractPLS": "._abstractpls",
+    "AbstractSingleResponsePLS": "._abstractpls",
+    "AbstractMultiResponsePLS": "._abstractpls",
+    "PREPROCESSING": "._abstractpls",
+    "PREPROCESSING_ENUM": "._abstractpls",
+    "PREPROCESSING_NONE": "._abstractpls",
+    "PREPROCESSING_CENTER": "._abstractpls",
+    "PREPROCESSING_STANDARDIZE": "._abstractpls",
+    "AddSampleData": "._add_sampledata",
+    "ApplyCleaner": "._apply_cleaner",
+    "AttachMetaData": "._attach_metadata",
+    "Center": "._center",
+    "DownSample": "._downsample",
+    "EquiDistance": "._equi_distance",
+    "Log": "._log",
+    "PCA": "._pca",
+    "PLS1": "._pls1",
+    "PythonFunctionFilter": "._pyfunc_filter",
+    "Rename": "._rename",
+    "RowNorm": "._rownorm",
+    "SanitizeName": "._sanitize_name",
+    "SavitzkyGolay": "._savitzkygolay",
+    "SavitzkyGolay2": "._savitzkygolay2",
+    "SIMPLS": "._simpls",
+    "SpectrumToSampleData": "._spectrum_to_sampledata",
+    "Standardize": "._standardize",
+    "SubProcess": "._sub_process",
+    "Tee": "._tee",
+    "Trigger": "._trigger",
+}
+""" the attributes of the package and the modules they get imported from on first access, keeping imports cheap. """
+
+
+def __getattr__(name: str):
+    """
+    Imports the module of the attribute on first access.
+
+    :param name: the name of the attribute
+    :type name: str
+    :return: the attribute
+    """
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    """
+    Returns all attributes of the package, including the ones not imported yet.
+
+    :return: the attributes
+    :rtype: list
+    """
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTES.keys()))
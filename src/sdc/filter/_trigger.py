@@ -6,14 +6,17 @@ from wai.logging import LOGGING_WARNING
 from kasperl.api import COMPARISON_EQUAL
 from kasperl.filter import Trigger as KTrigger
 
+from sdc.api import AsyncSubFlowSupporter
 
-class Trigger(KTrigger):
+
+class Trigger(AsyncSubFlowSupporter, KTrigger):
     """
     Triggers the sub-flow with data passing through.
     """
 
     def __init__(self, sub_flow: str = None, sub_flow_format: str = None,
                  field: str = None, comparison: str = COMPARISON_EQUAL, value=None,
+                 async_sub_flow: bool = None, queue_size: int = None, overflow: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the filter.
@@ -27,6 +30,12 @@ class Trigger(KTrigger):
         :param comparison: the comparison to perform
         :type comparison: str
         :param value: the value to compare with
+        :param async_sub_flow: whether to execute the sub-flow in a separate worker thread
+        :type async_sub_flow: bool
+        :param queue_size: the maximum number of pending records for the asynchronous sub-flow
+        :type queue_size: int
+        :param overflow: how to handle a full queue (block/drop)
+        :type overflow: str
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -35,6 +44,7 @@ class Trigger(KTrigger):
         super().__init__(sub_flow=sub_flow, sub_flow_format=sub_flow_format,
                          field=field, comparison=comparison, value=value,
                          logger_name=logger_name, logging_level=logging_level)
+        self._init_async_sub_flow(async_sub_flow=async_sub_flow, queue_size=queue_size, overflow=overflow)
 
     def _available_readers(self) -> Dict[str, Plugin]:
         """
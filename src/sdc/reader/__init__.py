@@ -1,20 +1,70 @@
-from kasperl.reader import POLL_ACTIONS, POLL_ACTION_NOTHING, POLL_ACTION_MOVE, POLL_ACTION_DELETE
-from kasperl.reader import EVENTS, EVENT_MODIFIED, EVENT_CREATED, WATCH_ACTIONS, WATCH_ACTION_NOTHING, WATCH_ACTION_MOVE, WATCH_ACTION_DELETE, POLLING_TYPES, POLLING_TYPE_NEVER, POLLING_TYPE_INITIAL, POLLING_TYPE_ALWAYS
-from ._adams import AdamsReader, ReportSampleDataReader
-from ._arff import ARFFReader
-from ._asc import ASCReader
-from ._asciixy import ASCIIXYReader
-from ._cal import CALReader
-from ._csv import CSVReader, CSVSampleDataReader
-from ._dpt import DPTReader
-from ._json import JsonSampleDataReader
-from ._mps import MPSReader
-from ._multi import MultiReader
-from ._nir import NIRReader
-from ._opus import OPUSReader
-from ._opus_ext import OPUSExtReader
-from ._poll_dir import PollDir
-from ._pyfunc import PythonFunctionReader
-from ._spa import SPAReader
-from ._zip import ZipReader
-from ._watch_dir import WatchDir
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    "POLL_ACTIONS": "kasperl.reader",
+    "POLL_ACTION_NOTHING": "kasperl.reader",
+    "POLL_ACTION_MOVE": "kasperl.reader",
+    "POLL_ACTION_DELETE": "kasperl.reader",
+    "EVENTS": "kasperl.reader",
+    "EVENT_MODIFIED": "kasperl.reader",
+    "EVENT_CREATED": "kasperl.reader",
+    "WATCH_ACTIONS": "kasperl.reader",
+    "WATCH_ACTION_NOTHING": "kasperl.reader",
+    "WATCH_ACTION_MOVE": "kasperl.reader",
+    "WATCH_ACTION_DELETE": "kasperl.reader",
+    "POLLING_TYPES": "kasperl.reader",
+    "POLLING_TYPE_NEVER": "kasperl.reader",
+    "POLLING_TYPE_INITIAL": "kasperl.reader",
+    "POLLING_TYPE_ALWAYS": "kasperl.reader",
+    "AdamsReader": "._adams",
+    "ReportSampleDataReader": "._adams",
+    "ARFFReader": "._arff",
+    "ASCReader": "._asc",
+    "ASCIIXYReader": "._asciixy",
+    "AutoReader": "._auto",
+    "CALReader": "._cal",
+    "CSVReader": "._csv",
+    "CSVSampleDataReader": "._csv",
+    "DPTReader": "._dpt",
+    "HDF5Reader": "._hdf5",
+    "JsonSampleDataReader": "._json",
+    "MPSReader": "._mps",
+    "MultiReader": "._multi",
+    "NIRReader": "._nir",
+    "NPZReader": "._npz",
+    "OPUSReader": "._opus",
+    "OPUSExtReader": "._opus_ext",
+    "PollDir": "._poll_dir",
+    "PythonFunctionReader": "._pyfunc",
+    "SPAReader": "._spa",
+    "SQLiteReader": "._sqlite",
+    "TarReader": "._tar",
+    "ZipReader": "._zip",
+    "WatchDir": "._watch_dir",
+}
+""" the attributes of the package and the modules they get imported from on first access, keeping imports cheap. """
+
+
+def __getattr__(name: str):
+    """
+    Imports the module of the attribute on first access.
+
+    :param name: the name of the attribute
+    :type name: str
+    :return: the attribute
+    """
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    """
+    Returns all attributes of the package, including the ones not imported yet.
+
+    :return: the attributes
+    :rtype: list
+    """
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTES.keys()))
@@ -2,20 +2,22 @@ import argparse
 import os
 from typing import List, Iterable, Union
 
-from seppl.io import locate_files, DirectReader
+from seppl.io import DirectReader
 from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 from wai.spectralio.arff import Reader as SReader
 
-from sdc.api import SpectralIOReader, Spectrum2D
+from sdc.api import SpectralIOReader, Spectrum2D, InputFiles, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard, strip_compression_extension
 
 
 class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
 
-    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None, resume_from: str = None,
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None, resume_from: str = None, lazy: bool = None, shard: str = None,
                  sample_id: str = None, spectral_data: str = None, sample_data: str = None, sample_data_prefix: str = None,
                  wave_numbers_in_header: bool = None, wave_numbers_regexp: str = None,
                  instrument: str = None, format: str = None, keep_format: bool = None,
+                 prefetch: int = None, parse_processes: int = None, sniff_compression: bool = None,
                  direct_read: bool = False, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -24,6 +26,10 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :param source_list: the file(s) with filename(s)
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
         :param sample_id: the 1-based index of the sample ID attribute
         :type sample_id: str
         :param spectral_data: the range of amplitude attributes (1-based)
@@ -42,6 +48,12 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :type format: str
         :param keep_format: whether to keep the format determined by the reader
         :type keep_format: bool
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param parse_processes: the number of processes for parsing the prefetched files, 0 for parsing in the main process
+        :type parse_processes: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
         :param direct_read: whether to use direct read mode
         :type direct_read: bool
         :param logger_name: the name to use for the logger
@@ -50,10 +62,13 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :type logging_level: str
         """
         super().__init__(instrument=instrument, format=format, keep_format=keep_format,
+                         prefetch=prefetch, parse_processes=parse_processes, sniff_compression=sniff_compression,
                          logger_name=logger_name, logging_level=logging_level)
         self.source = source
         self.source_list = source_list
         self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
         self.sample_id = sample_id
         self.spectral_data = spectral_data
         self.sample_data = sample_data
@@ -95,6 +110,8 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the ARFF file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the ARFF files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.arff'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
         parser.add_argument("--sample_id", type=str, help="The 1-based index of the sample ID attribute.", required=False, default="1")
         parser.add_argument("--spectral_data", type=str, help="The range of attributes containing the spectral data (1-based).", required=False, default="2-last")
         parser.add_argument("--sample_data", type=str, help="The range of attributes containing the reference values (1-based).", required=False, default=None)
@@ -114,6 +131,8 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         self.source = ns.input
         self.source_list = ns.input_list
         self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
         self.sample_id = ns.sample_id
         self.spectral_data = ns.spectral_data
         self.sample_data = ns.sample_data
@@ -159,7 +178,7 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
             self.wave_numbers_in_header = False
         self._reader = self._init_reader()
         if self.direct_read:
-            self._inputs = []
+            self._inputs = InputFiles()
         else:
             self._inputs = None
 
@@ -203,15 +222,28 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.arff", resume_from=self.resume_from)
-        self._current_input = self._inputs.pop(0)
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.arff", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
+        yield from self.read_file(self.session.current_input)
+
+    def read_file(self, path: str) -> Iterable:
+        """
+        Reads the data from the specified file and returns the items one by one.
+
+        :param path: the file to read
+        :type path: str
+        :return: the data
+        :rtype: Iterable
+        """
         i = 0
-        for sp in self._reader.read(self.session.current_input):
+        for sp in self._read_spectra(path):
             i += 1
-            spectrum_name = os.path.basename(self.session.current_input)
+            spectrum_name = os.path.basename(strip_compression_extension(path))
             spectrum_name = os.path.splitext(spectrum_name)[0] + "-" + str(i)
             yield Spectrum2D(spectrum_name=spectrum_name, spectrum=sp)
 
@@ -224,7 +256,7 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :rtype: Iterable
         """
         i = 0
-        for sp in self._reader.read_fp(fp):
+        for sp in self._read_spectra_fp(fp):
             i += 1
             yield Spectrum2D(spectrum_name="direct-" + str(i), spectrum=sp)
 
@@ -235,4 +267,4 @@ class ARFFReader(SpectralIOReader, DirectReader, VariableSupporter):
         :return: True if finished
         :rtype: bool
         """
-        return (self._inputs is not None) and len(self._inputs) == 0
+        return (self._inputs is not None) and self._inputs.is_empty()
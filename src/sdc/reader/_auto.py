@@ -0,0 +1,244 @@
+import argparse
+import os
+import re
+from typing import List, Iterable, Union, Optional
+
+from seppl import init_initializable, Initializable
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import Reader, parse_reader
+from sdc.api import Spectrum2D, SpectralIOReader, open_input, strip_compression_extension, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
+
+MAGIC_BYTES = [
+    (b"\x0a\x0a\xfe\xfe", "from-opus"),
+    (b"Spectral Data File", "from-spa"),
+]
+""" the magic bytes that files of a format start with and the associated reader. """
+
+EXTENSIONS = {
+    ".arff": "from-arff",
+    ".asc": "from-asc",
+    ".cal": "from-cal",
+    ".csv": "from-csv",
+    ".dpt": "from-dpt",
+    ".mps": "from-mps",
+    ".nir": "from-nir",
+    ".spa": "from-spa",
+    ".spec": "from-adams",
+    ".txt": "from-asciixy",
+}
+""" the (lower case) extensions and the associated reader. """
+
+OPUS_EXTENSION = re.compile(r"\.[0-9]+$")
+""" OPUS files use numeric extensions (.0, .1, ...). """
+
+MAGIC_SIZE = max([len(x[0]) for x in MAGIC_BYTES])
+""" the number of bytes to read for determining the format. """
+
+
+def sniff_format(path: str) -> Optional[str]:
+    """
+    Determines the reader for the file, using the magic bytes or, failing that, the extension.
+    Compressed files get decompressed for inspecting the magic bytes.
+
+    :param path: the file to determine the reader for
+    :type path: str
+    :return: the name of the reader, None if the format could not be determined
+    :rtype: str
+    """
+    with open_input(path, True) as fp:
+        header = fp.read(MAGIC_SIZE)
+    for magic, reader in MAGIC_BYTES:
+        if header.startswith(magic):
+            return reader
+
+    name = strip_compression_extension(path).lower()
+    ext = os.path.splitext(name)[1]
+    if ext in EXTENSIONS:
+        return EXTENSIONS[ext]
+    if OPUS_EXTENSION.search(name) is not None:
+        return "from-opus"
+    return None
+
+
+class AutoReader(Reader, VariableSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, readers: List[str] = None, skip_unknown: bool = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s)
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
+        :param readers: the command-lines of the readers to use instead of the default ones
+        :type readers: list
+        :param skip_unknown: whether to skip files with unknown format rather than failing
+        :type skip_unknown: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
+        self.readers = readers
+        self.skip_unknown = skip_unknown
+        self._inputs = None
+        self._current_input = None
+        self._cmdlines = None
+        self._readers = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-auto"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads the spectra from files in mixed formats, determining the format of each file from its magic bytes " \
+               "or, failing that, its extension. The files get dispatched to the appropriate reader, with one reader " \
+               "instance per format. Supported extensions: " + ", ".join(sorted(EXTENSIONS.keys())) + ", .0, .1, ... (OPUS)"
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.spa'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
+        parser.add_argument("-r", "--readers", type=str, help="The command-lines of the readers to use instead of the default ones (which use default options), e.g., for supplying additional options; the format is identified by the reader's name.", required=False, nargs="*")
+        parser.add_argument("--skip_unknown", action="store_true", help="Whether to skip files with unknown format rather than failing.", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
+        self.readers = ns.readers
+        self.skip_unknown = ns.skip_unknown
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.skip_unknown is None:
+            self.skip_unknown = False
+        self._cmdlines = dict()
+        if self.readers is not None:
+            for cmdline in self.readers:
+                self._cmdlines[cmdline.split()[0]] = cmdline
+        self._readers = dict()
+        self._inputs = None
+
+    def _reader_for(self, name: str) -> SpectralIOReader:
+        """
+        Returns the reader instance for the format, creates and initializes it if necessary.
+
+        :param name: the name of the reader
+        :type name: str
+        :return: the reader
+        :rtype: SpectralIOReader
+        """
+        if name not in self._readers:
+            from sdc.registry import available_readers
+
+            cmdline = self._cmdlines.get(name, name)
+            reader = parse_reader(cmdline, available_readers())
+            if not isinstance(reader, SpectralIOReader):
+                raise Exception("Reader is not a spectral reader: %s" % str(type(reader)))
+            reader.session = self.session
+            if isinstance(reader, Initializable):
+                init_initializable(reader, "reader", raise_again=True)
+            self.logger().info("Using reader: %s" % cmdline)
+            self._readers[name] = reader
+        return self._readers[name]
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
+        self.session.current_input = self._current_input
+
+        name = sniff_format(self.session.current_input)
+        if name is None:
+            if self.skip_unknown:
+                self.logger().warning("Unknown format, skipping: %s" % self.session.current_input)
+                return
+            raise Exception("Failed to determine format of: %s" % self.session.current_input)
+        self.logger().info("Reading from (%s): %s" % (name, str(self.session.current_input)))
+        yield from self._reader_for(name).read_file(self.session.current_input)
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and self._inputs.is_empty()
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._readers is not None:
+            for reader in self._readers.values():
+                if isinstance(reader, Initializable):
+                    reader.finalize()
+            self._readers = None
@@ -0,0 +1,216 @@
+import argparse
+from typing import List, Iterable, Union
+
+import numpy as np
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from sdc.api import Reader, Spectrum2D, arrays_to_spectrum, generate_spectrum_name, ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard, import_h5py
+
+
+def _decode(value) -> str:
+    """
+    Turns the string value read from a dataset into a str.
+
+    :param value: the value to decode
+    :return: the string
+    :rtype: str
+    """
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+class HDF5Reader(Reader, VariableSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, start: int = None, max: int = None,
+                 wave_min: float = None, wave_max: float = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s)
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
+        :param start: the spectrum number to start loading from (1-based)
+        :type start: int
+        :param max: the maximum number of spectra to load, None or -1 for unlimited
+        :type max: int
+        :param wave_min: the smallest wave number to load, None for no restriction
+        :type wave_min: float
+        :param wave_max: the largest wave number to load, None for no restriction
+        :type wave_max: float
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
+        self.start = start
+        self.max = max
+        self.wave_min = wave_min
+        self.wave_max = wave_max
+        self._inputs = None
+        self._current_input = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-hdf5"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads the spectra from HDF5 files generated by to-hdf5. Only the selected rows and wave number range " \
+               "get read from disk, one chunk at a time."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the HDF5 file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the HDF5 files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.h5'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
+        parser.add_argument("-s", "--start", type=int, help="The spectrum number to start loading from", required=False, default=1)
+        parser.add_argument("-m", "--max", type=int, help="The maximum number of spectra to load, -1 for all", required=False, default=-1)
+        parser.add_argument("--wave_min", type=float, help="The smallest wave number to load.", required=False, default=None)
+        parser.add_argument("--wave_max", type=float, help="The largest wave number to load.", required=False, default=None)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
+        self.start = ns.start
+        self.max = ns.max
+        self.wave_min = ns.wave_min
+        self.wave_max = ns.wave_max
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.start is None:
+            self.start = 1
+        if self.start < 1:
+            raise Exception("Start must be at least 1: %d" % self.start)
+        if self.max is None:
+            self.max = -1
+        self._inputs = None
+
+    def _wave_columns(self, waves: np.ndarray) -> Union[slice, np.ndarray]:
+        """
+        Determines the columns that fall within the wave number range.
+        Returns a slice if the columns are contiguous, allowing for partial reads.
+
+        :param waves: the wave numbers
+        :type waves: np.ndarray
+        :return: the columns
+        """
+        if (self.wave_min is None) and (self.wave_max is None):
+            return slice(None)
+        mask = np.ones(len(waves), dtype=bool)
+        if self.wave_min is not None:
+            mask &= waves >= self.wave_min
+        if self.wave_max is not None:
+            mask &= waves <= self.wave_max
+        indices = np.nonzero(mask)[0]
+        if len(indices) == 0:
+            raise Exception("No wave numbers within range: %s - %s" % (str(self.wave_min), str(self.wave_max)))
+        if indices[-1] - indices[0] + 1 == len(indices):
+            return slice(int(indices[0]), int(indices[-1]) + 1)
+        return indices
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.h5", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
+        self.session.current_input = self._current_input
+        self.logger().info("Reading from: " + str(self.session.current_input))
+
+        with import_h5py().File(self.session.current_input, "r") as f:
+            amplitudes = f[ARRAY_AMPLITUDES]
+            ids = f[ARRAY_IDS] if ARRAY_IDS in f else None
+            sample_data = f[ARRAY_SAMPLE_DATA] if ARRAY_SAMPLE_DATA in f else None
+            columns = self._wave_columns(f[ARRAY_WAVES][()])
+            waves = f[ARRAY_WAVES][columns]
+
+            start = self.start - 1
+            end = amplitudes.shape[0]
+            if self.max > -1:
+                end = min(end, start + self.max)
+            block = amplitudes.chunks[0] if amplitudes.chunks is not None else 1024
+
+            for block_start in range(start, end, block):
+                block_end = min(end, block_start + block)
+                block_amplitudes = amplitudes[block_start:block_end, columns]
+                block_ids = None if ids is None else ids[block_start:block_end]
+                block_sample_data = None if sample_data is None else sample_data[block_start:block_end]
+                for i in range(block_end - block_start):
+                    sp = arrays_to_spectrum(block_amplitudes[i], waves,
+                                            sample_id=None if block_ids is None else _decode(block_ids[i]),
+                                            sample_data=None if block_sample_data is None else _decode(block_sample_data[i]))
+                    name = generate_spectrum_name(sp, self.session.current_input, block_start + i + 1)
+                    yield Spectrum2D(source=self.session.current_input, spectrum_name=name, spectrum=sp)
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and self._inputs.is_empty()
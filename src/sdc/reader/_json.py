@@ -1,18 +1,22 @@
 import argparse
 import json
+import os
 from typing import List, Iterable, Union
 
-from seppl.io import locate_files, DirectReader
+from seppl.io import DirectReader
 from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
-from sdc.api import SampleDataReader, SampleData
+from sdc.api import SampleDataReader, SampleData, SAMPLE_ID, open_input, strip_compression_extension, InputFiles, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
+
+EXT_JSONL = ".jsonl"
 
 
 class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 resume_from: str = None, direct_read: bool = False,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, jsonl: bool = None, prefetch: int = None, sniff_compression: bool = None, direct_read: bool = False,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -21,6 +25,16 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :param source_list: the file(s) with filename(s)
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
+        :param jsonl: whether to read the files as JSON Lines, i.e., one sample data record per line
+        :type jsonl: bool
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
         :param direct_read: whether to use direct read mode
         :type direct_read: bool
         :param logger_name: the name to use for the logger
@@ -28,10 +42,13 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :param logging_level: the logging level to use
         :type logging_level: str
         """
-        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        super().__init__(prefetch=prefetch, sniff_compression=sniff_compression, logger_name=logger_name, logging_level=logging_level)
         self.source = source
         self.source_list = source_list
         self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
+        self.jsonl = jsonl
         self._direct_read = direct_read
         self._inputs = None
         self._current_input = None
@@ -52,7 +69,8 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :return: the description
         :rtype: str
         """
-        return "Loads the sample data in JSON format."
+        return "Loads the sample data in JSON format. Files with extension " + EXT_JSONL + " (or when using --jsonl) " \
+               "are read as JSON Lines, i.e., line by line with one sample data record per line."
 
     def _create_argparser(self) -> argparse.ArgumentParser:
         """
@@ -65,6 +83,9 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the sample data file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the sample data files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.json'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
+        parser.add_argument("--jsonl", action="store_true", help="Whether to read the files as JSON Lines, i.e., one sample data record per line; automatically the case for files with extension " + EXT_JSONL + ". JSON Lines files get streamed rather than prefetched.", required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -78,6 +99,9 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         self.source = ns.input
         self.source_list = ns.input_list
         self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
+        self.jsonl = ns.jsonl
 
     @property
     def direct_read(self) -> bool:
@@ -104,8 +128,10 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.jsonl is None:
+            self.jsonl = False
         if self.direct_read:
-            self._inputs = []
+            self._inputs = InputFiles()
         else:
             self._inputs = None
 
@@ -117,15 +143,43 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.json", resume_from=self.resume_from)
-        self._current_input = self._inputs.pop(0)
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob=("*" + EXT_JSONL) if self.jsonl else "*.json", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
-        with open(self.session.current_input, "r") as fp:
-            sd = json.load(fp)
+        if self.jsonl or strip_compression_extension(self.session.current_input).lower().endswith(EXT_JSONL):
+            with open_input(self.session.current_input, False, sniff=self.sniff_compression) as fp:
+                yield from self._read_lines(fp, source=self.session.current_input)
+        else:
+            with self._open_input(self.session.current_input) as fp:
+                sd = json.load(fp)
+            yield SampleData(source=self.session.current_input, sampledata=sd)
 
-        yield SampleData(source=self.session.current_input, sampledata=sd)
+    def _read_lines(self, fp, source: str = None) -> Iterable:
+        """
+        Reads the JSON Lines from the file-like object, one sample data record at a time.
+        Uses the sample ID as name if available, otherwise the line number.
+
+        :param fp: the file-like object to read from
+        :param source: the file being read, None if direct read
+        :type source: str
+        :return: the data
+        :rtype: Iterable
+        """
+        prefix = "direct" if source is None else os.path.splitext(os.path.basename(strip_compression_extension(source)))[0]
+        for i, line in enumerate(fp):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            sd = json.loads(line)
+            if SAMPLE_ID in sd:
+                name = str(sd[SAMPLE_ID])
+            else:
+                name = "%s-%d" % (prefix, i + 1)
+            yield SampleData(source=source, sampledata_name=name + ".json", sampledata=sd)
 
     def read_fp(self, fp) -> Iterable:
         """
@@ -135,8 +189,11 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :return: the data
         :rtype: Iterable
         """
-        sd = json.load(fp)
-        yield SampleData(sampledata_name="direct", sampledata=sd)
+        if self.jsonl:
+            yield from self._read_lines(fp)
+        else:
+            sd = json.load(fp)
+            yield SampleData(sampledata_name="direct", sampledata=sd)
 
     def has_finished(self) -> bool:
         """
@@ -145,4 +202,4 @@ class JsonSampleDataReader(SampleDataReader, DirectReader, VariableSupporter):
         :return: True if finished
         :rtype: bool
         """
-        return (self._inputs is not None) and len(self._inputs) == 0
+        return (self._inputs is not None) and self._inputs.is_empty()
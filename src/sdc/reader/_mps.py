@@ -1,18 +1,20 @@
 import argparse
 from typing import List, Iterable, Union
 
-from seppl.io import locate_files, DirectReader
+from seppl.io import DirectReader
 from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 from wai.spectralio.mps import Reader as SReader
 
-from sdc.api import SpectralIOReader, Spectrum2D
+from sdc.api import SpectralIOReader, Spectrum2D, InputFiles, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
 
 
 class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 resume_from: str = None, instrument: str = None, format: str = None, keep_format: bool = None,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, instrument: str = None, format: str = None, keep_format: bool = None,
+                 prefetch: int = None, parse_processes: int = None, sniff_compression: bool = None,
                  direct_read: bool = False, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -21,12 +23,22 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         :param source_list: the file(s) with filename(s)
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
         :param instrument: the instrument name to use
         :type instrument: str
         :param format: the spectral format
         :type format: str
         :param keep_format: whether to keep the format determined by the reader
         :type keep_format: bool
+        :param prefetch: the number of upcoming files to read in background threads, 0 to disable
+        :type prefetch: int
+        :param parse_processes: the number of processes for parsing the prefetched files, 0 for parsing in the main process
+        :type parse_processes: int
+        :param sniff_compression: whether to detect the compression of files without compression extension from the magic bytes
+        :type sniff_compression: bool
         :param direct_read: whether to use direct read mode
         :type direct_read: bool
         :param logger_name: the name to use for the logger
@@ -35,10 +47,13 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         :type logging_level: str
         """
         super().__init__(instrument=instrument, format=format, keep_format=keep_format,
+                         prefetch=prefetch, parse_processes=parse_processes, sniff_compression=sniff_compression,
                          logger_name=logger_name, logging_level=logging_level)
         self.source = source
         self.source_list = source_list
         self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
         self._direct_read = direct_read
         self._reader = None
         self._inputs = None
@@ -74,6 +89,8 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the ASC file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the ASC files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.asc'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -87,6 +104,8 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         self.source = ns.input
         self.source_list = ns.input_list
         self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
 
     def generates(self) -> List:
         """
@@ -124,7 +143,7 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         super().initialize()
         self._reader = self._init_reader()
         if self.direct_read:
-            self._inputs = []
+            self._inputs = InputFiles()
         else:
             self._inputs = None
 
@@ -146,13 +165,26 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.mps", resume_from=self.resume_from)
-        self._current_input = self._inputs.pop(0)
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.mps", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
-        for sp in self._reader.read(self.session.current_input):
-            yield Spectrum2D(source=self.session.current_input, spectrum=sp)
+        yield from self.read_file(self.session.current_input)
+
+    def read_file(self, path: str) -> Iterable:
+        """
+        Reads the data from the specified file and returns the items one by one.
+
+        :param path: the file to read
+        :type path: str
+        :return: the data
+        :rtype: Iterable
+        """
+        for sp in self._read_spectra(path):
+            yield Spectrum2D(source=path, spectrum=sp)
 
     def read_fp(self, fp) -> Iterable:
         """
@@ -162,7 +194,7 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         :return: the data
         :rtype: Iterable
         """
-        for sp in self._reader.read_fp(fp):
+        for sp in self._read_spectra_fp(fp):
             yield Spectrum2D(spectrum_name=sp.id, spectrum=sp)
 
     def has_finished(self) -> bool:
@@ -172,4 +204,4 @@ class MPSReader(SpectralIOReader, DirectReader, VariableSupporter):
         :return: True if finished
         :rtype: bool
         """
-        return (self._inputs is not None) and len(self._inputs) == 0
+        return (self._inputs is not None) and self._inputs.is_empty()
@@ -1,4 +1,7 @@
 import argparse
+import copy
+import queue
+import threading
 from typing import List, Iterable
 
 from seppl import Plugin, AnyData
@@ -8,22 +11,43 @@ from sdc.api import Reader
 
 READ_ORDER_SEQUENTIAL = "sequential"
 READ_ORDER_INTERLEAVED = "interleaved"
+READ_ORDER_CONCURRENT_ROUND_ROBIN = "concurrent-round-robin"
+READ_ORDER_CONCURRENT_FIRST_COME = "concurrent-first-come"
 READ_ORDERS = [
     READ_ORDER_SEQUENTIAL,
     READ_ORDER_INTERLEAVED,
+    READ_ORDER_CONCURRENT_ROUND_ROBIN,
+    READ_ORDER_CONCURRENT_FIRST_COME,
 ]
+READ_ORDERS_CONCURRENT = [
+    READ_ORDER_CONCURRENT_ROUND_ROBIN,
+    READ_ORDER_CONCURRENT_FIRST_COME,
+]
+
+DEFAULT_PREFETCH = 100
+""" the default number of items to prefetch per base reader in the concurrent read orders. """
+
+_END_OF_DATA = object()
+""" the marker that a base reader has no more data. """
+
+_END_OF_READ = object()
+""" the marker that a base reader has output all the items of a read() call. """
 
 
 class MultiReader(Reader):
 
-    def __init__(self, readers: List[str] = None, read_order: str = None,
-                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+    def __init__(self, readers: List[str] = None, read_order: str = None, prefetch: int = None,
+                 deterministic: bool = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
 
         :param readers: the list of base readers to use (command-lines)
         :param read_order: how the base readers are being used
         :type read_order: str
+        :param prefetch: the maximum number of items to prefetch per base reader in the concurrent read orders
+        :type prefetch: int
+        :param deterministic: whether the concurrent read orders strictly take turns between the base readers after each of their reads for reproducible output
+        :type deterministic: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -32,8 +56,16 @@ class MultiReader(Reader):
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.readers = readers
         self.read_order = read_order
+        self.prefetch = prefetch
+        self.deterministic = deterministic
         self._readers = None
         self._finalize = None
+        self._queues = None
+        self._ready = None
+        self._available = None
+        self._threads = None
+        self._stop = None
+        self._error = None
 
     def name(self) -> str:
         """
@@ -62,7 +94,9 @@ class MultiReader(Reader):
         """
         parser = super()._create_argparser()
         parser.add_argument("-r", "--reader", type=str, default=None, help="The command-line defining the base reader.", required=True, nargs="+")
-        parser.add_argument("-o", "--read_order", choices=READ_ORDERS, type=str, default=READ_ORDER_SEQUENTIAL, help="How to use the output from the readers.", required=False)
+        parser.add_argument("-o", "--read_order", choices=READ_ORDERS, type=str, default=READ_ORDER_SEQUENTIAL, help="How to use the output from the readers. The concurrent read orders read from all readers at the same time, each in its own thread, and output the items either by taking turns between the readers ('%s') or in the order they became available ('%s')." % (READ_ORDER_CONCURRENT_ROUND_ROBIN, READ_ORDER_CONCURRENT_FIRST_COME), required=False)
+        parser.add_argument("-p", "--prefetch", type=int, default=DEFAULT_PREFETCH, help="The maximum number of items to prefetch per reader in the concurrent read orders.", required=False)
+        parser.add_argument("-d", "--deterministic", action="store_true", help="Whether the concurrent read orders should strictly take turns between the readers after each of their reads (like the '%s' read order), waiting for the next reader if necessary, in order to obtain the same output order with each run." % READ_ORDER_INTERLEAVED)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -75,6 +109,8 @@ class MultiReader(Reader):
         super()._apply_args(ns)
         self.readers = ns.reader
         self.read_order = ns.read_order
+        self.prefetch = ns.prefetch
+        self.deterministic = ns.deterministic
 
     def generates(self) -> List:
         """
@@ -121,6 +157,10 @@ class MultiReader(Reader):
             self.read_order = READ_ORDER_SEQUENTIAL
         if self.read_order not in READ_ORDERS:
             raise Exception("Unknown read order: %s" % self.read_order)
+        if self.prefetch is None:
+            self.prefetch = DEFAULT_PREFETCH
+        if self.deterministic is None:
+            self.deterministic = False
         self._readers = []
         for reader in self.readers:
             objs = self._parse_commandline(reader)
@@ -134,6 +174,152 @@ class MultiReader(Reader):
             reader.session = self.session
         self.logger().info("# readers: %d" % len(self._readers))
         self._finalize = []
+        self._threads = None
+        self._error = None
+
+    def _work(self, index: int, reader: Reader):
+        """
+        Reads all the data from the base reader and places it in the reader's queue,
+        together with the input it was read from. The end of each read() call gets marked.
+
+        :param index: the index of the reader
+        :type index: int
+        :param reader: the base reader to read from
+        :type reader: Reader
+        """
+        q = self._queues[index]
+        try:
+            while not reader.has_finished() and not self._stop.is_set():
+                for data in reader.read():
+                    q.put((reader.session.current_input, data))
+                    self._notify(index)
+                    if self._stop.is_set():
+                        break
+                q.put(_END_OF_READ)
+                self._notify(index)
+        except Exception as e:
+            self.logger().exception("Base reader '%s' failed!" % reader.name())
+            if self._error is None:
+                self._error = e
+        finally:
+            q.put(_END_OF_DATA)
+            self._notify(index)
+
+    def _notify(self, index: int):
+        """
+        Notifies the consumer that the specified reader has output data.
+
+        :param index: the index of the reader
+        :type index: int
+        """
+        if self._ready is not None:
+            self._ready.put(index)
+        with self._available:
+            self._available.notify_all()
+
+    def _start_workers(self):
+        """
+        Starts a thread with its own prefetch queue for each base reader.
+        Each base reader gets its own copy of the session, as they update the current input.
+        """
+        self._queues = [queue.Queue(maxsize=max(1, self.prefetch)) for _ in self._readers]
+        if (self.read_order == READ_ORDER_CONCURRENT_FIRST_COME) and not self.deterministic:
+            self._ready = queue.Queue()
+        else:
+            self._ready = None
+        self._available = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        for i, reader in enumerate(self._readers):
+            reader.session = copy.copy(self.session)
+            t = threading.Thread(target=self._work, args=(i, reader), name="%s-%d" % (self.name(), i), daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _stop_workers(self):
+        """
+        Stops the worker threads, discarding any prefetched data.
+        """
+        if self._threads is None:
+            return
+        self._stop.set()
+        for i, t in enumerate(self._threads):
+            while t.is_alive():
+                try:
+                    self._queues[i].get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            t.join()
+        self._threads = None
+        self._queues = None
+
+    def _next_round_robin(self, active: List[int], start: int):
+        """
+        Returns the next available item, taking turns between the active readers.
+
+        :param active: the indices of the readers that still have data
+        :type active: list
+        :param start: the position in the active list to start looking from
+        :type start: int
+        :return: tuple of position in the active list and the item
+        :rtype: tuple
+        """
+        # strictly take turns
+        if self.deterministic:
+            return start, self._queues[active[start]].get()
+
+        # use the next reader that has data available
+        with self._available:
+            while True:
+                for offset in range(len(active)):
+                    pos = (start + offset) % len(active)
+                    try:
+                        return pos, self._queues[active[pos]].get_nowait()
+                    except queue.Empty:
+                        pass
+                self._available.wait()
+
+    def _read_concurrently(self) -> Iterable:
+        """
+        Reads the data from all base readers concurrently. In deterministic mode, the
+        readers take turns after each of their read() calls, like with the interleaved
+        read order; otherwise, turns get taken (or not) per item.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        self._start_workers()
+        active = list(range(len(self._readers)))
+        pos = 0
+        while len(active) > 0:
+            if self._ready is not None:
+                index = self._ready.get()
+                data = self._queues[index].get_nowait()
+            else:
+                pos, data = self._next_round_robin(active, pos)
+                index = active[pos]
+                # in deterministic mode, the turn only ends with the reader's read() call
+                if (not self.deterministic) or (data is _END_OF_READ) or (data is _END_OF_DATA):
+                    pos += 1
+            if data is _END_OF_READ:
+                # nothing to output
+                pass
+            elif data is _END_OF_DATA:
+                if self._error is not None:
+                    raise self._error
+                active.remove(index)
+                if (self._ready is None) and (pos > 0):
+                    pos -= 1
+                reader = self._readers[index]
+                self.logger().info("Reader finished: %s" % reader.name())
+                self._finalize.append(reader)
+            else:
+                self.session.current_input, data = data
+                yield data
+            if len(active) > 0:
+                pos = pos % len(active)
+        self._threads = None
+        self._readers = []
 
     def read(self) -> Iterable:
         """
@@ -158,6 +344,8 @@ class MultiReader(Reader):
                     if reader.has_finished():
                         self._readers.remove(reader)
                         self._finalize.append(reader)
+        elif self.read_order in READ_ORDERS_CONCURRENT:
+            yield from self._read_concurrently()
         else:
             raise Exception("Unhandled read order: %s" % self.read_order)
 
@@ -175,6 +363,7 @@ class MultiReader(Reader):
         Finishes the processing, e.g., for closing files or databases.
         """
         super().finalize()
+        self._stop_workers()
         if self._finalize is not None:
             for reader in self._finalize:
                 reader.finalize()
@@ -0,0 +1,283 @@
+import argparse
+import os
+import struct
+from typing import List, Iterable, Union, Dict
+from zipfile import ZipFile, ZIP_STORED
+
+import numpy as np
+from seppl.io import locate_files, DirectReader
+from seppl.variables import VariableSupporter, variable_list, expand_variables
+from wai.logging import LOGGING_WARNING
+
+from sdc.api import Reader, Spectrum2D, arrays_to_spectrum, generate_spectrum_name, ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA, InputFiles
+
+
+def _memmap_npz_member(path: str, zipfile: ZipFile, member: str):
+    """
+    Memory-maps the uncompressed .npy member of the .npz file.
+
+    :param path: the .npz file
+    :type path: str
+    :param zipfile: the opened .npz file
+    :type zipfile: ZipFile
+    :param member: the name of the member to map
+    :type member: str
+    :return: the memory-mapped array, None if it cannot be mapped (compressed, object dtype, etc)
+    """
+    info = zipfile.getinfo(member)
+    if info.compress_type != ZIP_STORED:
+        return None
+    with open(path, "rb") as fp:
+        # skip local file header
+        fp.seek(info.header_offset)
+        header = fp.read(30)
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        fp.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+        else:
+            return None
+        offset = fp.tell()
+    if dtype.hasobject or (np.prod(shape) == 0):
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran_order else "C")
+
+
+def _load_arrays(path: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Loads the arrays from the .npz file or directory of .npy files.
+
+    :param path: the .npz file or directory to load the arrays from
+    :type path: str
+    :param mmap: whether to memory-map the arrays rather than loading them into memory
+    :type mmap: bool
+    :return: the arrays
+    :rtype: dict
+    """
+    result = dict()
+    if os.path.isdir(path):
+        for name in [ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA]:
+            fname = os.path.join(path, name + ".npy")
+            if os.path.exists(fname):
+                result[name] = np.load(fname, mmap_mode="r" if mmap else None, allow_pickle=False)
+    else:
+        with ZipFile(path, "r") as zipfile:
+            members = set(zipfile.namelist())
+            for name in [ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA]:
+                member = name + ".npy"
+                if member not in members:
+                    continue
+                array = _memmap_npz_member(path, zipfile, member) if mmap else None
+                if array is None:
+                    with zipfile.open(member) as fp:
+                        array = np.lib.format.read_array(fp, allow_pickle=False)
+                result[name] = array
+    if ARRAY_AMPLITUDES not in result:
+        raise Exception("No '%s' array found in: %s" % (ARRAY_AMPLITUDES, path))
+    if ARRAY_WAVES not in result:
+        raise Exception("No '%s' array found in: %s" % (ARRAY_WAVES, path))
+    return result
+
+
+class NPZReader(Reader, DirectReader, VariableSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, no_mmap: bool = None, direct_read: bool = False,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s)
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param no_mmap: whether to load the arrays into memory rather than memory-mapping them
+        :type no_mmap: bool
+        :param direct_read: whether to use direct read mode
+        :type direct_read: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self.no_mmap = no_mmap
+        self._direct_read = direct_read
+        self._inputs = None
+        self._current_input = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-npz"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads the spectra from binary datasets generated by to-npz, i.e., .npz files or directories of .npy files. " \
+               "The arrays get memory-mapped (unless compressed) and the spectra get extracted one row at a time."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the .npz file(s) or directories with .npy files to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the .npz files or directories with .npy files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.npz'", required=False)
+        parser.add_argument("--no_mmap", action="store_true", help="Loads the arrays into memory instead of memory-mapping them.", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self.no_mmap = ns.no_mmap
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    @property
+    def direct_read(self) -> bool:
+        """
+        Returns whether the reader is in direct read mode.
+
+        :return: True if in direct read mode
+        :rtype: bool
+        """
+        return self._direct_read
+
+    @direct_read.setter
+    def direct_read(self, direct: bool):
+        """
+        Sets whether the reader is to be used in direct mode or not.
+
+        :param direct: True if to use in direct read mode
+        :type direct: bool
+        """
+        self._direct_read = direct
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.no_mmap is None:
+            self.no_mmap = False
+        if self.direct_read:
+            self._inputs = InputFiles()
+        else:
+            self._inputs = None
+
+    def _locate_inputs(self) -> List[str]:
+        """
+        Locates the .npz files and directories with .npy files.
+
+        :return: the located inputs
+        :rtype: list
+        """
+        source = self.source
+        if source is not None:
+            if isinstance(source, str):
+                source = [source]
+            # directories containing the arrays are datasets themselves
+            source = source[:]
+            for i, inp in enumerate(source):
+                amplitudes = os.path.join(expand_variables(inp), ARRAY_AMPLITUDES + ".npy")
+                if os.path.exists(amplitudes):
+                    source[i] = amplitudes
+        return locate_files(source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.npz", resume_from=self.resume_from)
+
+    def _iterate(self, arrays: Dict[str, np.ndarray], source: str = None) -> Iterable:
+        """
+        Turns the rows of the arrays into spectra.
+
+        :param arrays: the arrays to use
+        :type arrays: dict
+        :param source: the source of the arrays, None if from file-like object
+        :type source: str
+        :return: the spectra
+        :rtype: Iterable
+        """
+        amplitudes = arrays[ARRAY_AMPLITUDES]
+        waves = arrays[ARRAY_WAVES]
+        ids = arrays.get(ARRAY_IDS)
+        sample_data = arrays.get(ARRAY_SAMPLE_DATA)
+        for i in range(len(amplitudes)):
+            sp = arrays_to_spectrum(amplitudes[i], waves if (waves.ndim == 1) else waves[i],
+                                    sample_id=None if ids is None else str(ids[i]),
+                                    sample_data=None if sample_data is None else str(sample_data[i]))
+            yield Spectrum2D(source=source, spectrum_name=generate_spectrum_name(sp, source, i + 1), spectrum=sp)
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            self._inputs = InputFiles(self._locate_inputs())
+        self._current_input = self._inputs.pop()
+        self.session.current_input = self._current_input
+        self.logger().info("Reading from: " + str(self.session.current_input))
+
+        path = self.session.current_input
+        if os.path.basename(path) == ARRAY_AMPLITUDES + ".npy":
+            path = os.path.dirname(path)
+        yield from self._iterate(_load_arrays(path, mmap=not self.no_mmap), source=path)
+
+    def read_fp(self, fp) -> Iterable:
+        """
+        Reads the data from the file-like object and returns the items one by one.
+
+        :param fp: the file-like object to read from
+        :return: the data
+        :rtype: Iterable
+        """
+        with np.load(fp, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        if ARRAY_AMPLITUDES not in arrays:
+            raise Exception("No '%s' array found!" % ARRAY_AMPLITUDES)
+        if ARRAY_WAVES not in arrays:
+            raise Exception("No '%s' array found!" % ARRAY_WAVES)
+        yield from self._iterate(arrays)
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and self._inputs.is_empty()
@@ -1,8 +1,45 @@
-from typing import Dict, List
+import argparse
+import os
+import socket
+from time import sleep
+from typing import Dict, List, Iterable, Optional
 
 from wai.logging import LOGGING_WARNING
 from seppl import Plugin
+from seppl.variables import variable_list
 from kasperl.reader import PollDir as KPollDir
+from kasperl.reader import POLL_ACTION_DELETE, POLL_ACTION_MOVE, POLL_ACTION_NOTHING
+from sdc.api import MicroBatcher, add_micro_batch_options, micro_batching_enabled, locate_other_input_files
+
+
+def default_worker_id() -> str:
+    """
+    Generates the default ID of the worker, consisting of host name and process ID.
+
+    :return: the worker ID
+    :rtype: str
+    """
+    return "%s-%d" % (socket.gethostname(), os.getpid())
+
+
+def claim_file(path: str, claim_dir: str) -> Optional[str]:
+    """
+    Claims the file by atomically renaming it into the claim directory. Only one
+    worker can succeed with the rename, all others get an error as the file is gone.
+
+    :param path: the file to claim
+    :type path: str
+    :param claim_dir: the (worker-specific) directory to move the file into, must be on the same file system
+    :type claim_dir: str
+    :return: the path of the claimed file, None if another worker claimed it first
+    :rtype: str
+    """
+    claimed = os.path.join(claim_dir, os.path.basename(path))
+    try:
+        os.rename(path, claimed)
+        return claimed
+    except FileNotFoundError:
+        return None
 
 
 class PollDir(KPollDir):
@@ -10,6 +47,8 @@ class PollDir(KPollDir):
     def __init__(self, dir_in: str = None, dir_out: str = None, poll_wait: float = None, process_wait: float = None,
                  action: str = None, extensions: List[str] = None,
                  other_input_files: List[str] = None, max_files: int = None, base_reader: str = None,
+                 claim_dir: str = None, worker_id: str = None,
+                 batch_files: int = None, batch_time: int = None, batch_bytes: int = None, debounce: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -32,6 +71,18 @@ class PollDir(KPollDir):
         :type max_files: int
         :param base_reader: the base reader to use (command-line)
         :type base_reader: str
+        :param claim_dir: the directory in which workers claim files (using a sub-directory per worker), None for single consumer
+        :type claim_dir: str
+        :param worker_id: the ID of this worker, None for host name and process ID
+        :type worker_id: str
+        :param batch_files: the maximum number of files per micro-batch, <1 for no limit
+        :type batch_files: int
+        :param batch_time: the maximum time in msec to wait for further files after the first file of a micro-batch, <1 for no waiting
+        :type batch_time: int
+        :param batch_bytes: the maximum number of bytes per micro-batch, <1 for no limit
+        :type batch_bytes: int
+        :param debounce: the time in msec that files must not have been modified before being processed, <1 to disable
+        :type debounce: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -41,6 +92,59 @@ class PollDir(KPollDir):
                          action=action, extensions=extensions, other_input_files=other_input_files,
                          max_files=max_files, base_reader=base_reader,
                          logger_name=logger_name, logging_level=logging_level)
+        self.claim_dir = claim_dir
+        self.worker_id = worker_id
+        self.batch_files = batch_files
+        self.batch_time = batch_time
+        self.batch_bytes = batch_bytes
+        self.debounce = debounce
+        self._actual_claim_dir = None
+        self._recovered = False
+        self._batcher = None
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Polls a directory for files and presents them to the base reader. " \
+               "Multiple workers (processes or hosts) can consume the same directory when using a claim directory: " \
+               "files get claimed by atomically renaming them into the worker's sub-directory, which must reside on " \
+               "the same file system as the input directory. Files left over in the worker's sub-directory " \
+               "(e.g., after a crash) get processed at start-up when using a fixed worker ID. " \
+               "Claiming requires the 'move' or 'delete' action. " \
+               "With micro-batching, new files get collected until the batch is closed by the number of files, " \
+               "the time since the first file or the number of bytes, and the batch gets pushed through the filters at once."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("--claim_dir", type=str, help="The directory in which workers claim the files for processing, using a sub-directory per worker; must be on the same file system as the input directory; enables safe consumption by multiple workers; " + variable_list(obj=self), required=False, default=None)
+        parser.add_argument("--worker_id", type=str, help="The ID of the worker, used as sub-directory name in the claim directory; uses host name and process ID if not specified", required=False, default=None)
+        add_micro_batch_options(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.claim_dir = ns.claim_dir
+        self.worker_id = ns.worker_id
+        self.batch_files = ns.batch_files
+        self.batch_time = ns.batch_time
+        self.batch_bytes = ns.batch_bytes
+        self.debounce = ns.debounce
 
     def _available_readers(self) -> Dict[str, Plugin]:
         """
@@ -51,3 +155,157 @@ class PollDir(KPollDir):
         """
         from sdc.registry import available_readers
         return available_readers()
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.worker_id is None:
+            self.worker_id = default_worker_id()
+        self._actual_claim_dir = None
+        self._recovered = False
+        if self.claim_dir is not None:
+            if self.action == POLL_ACTION_NOTHING:
+                raise Exception("Action '%s' is not supported when claiming files, use '%s' or '%s'!" % (POLL_ACTION_NOTHING, POLL_ACTION_MOVE, POLL_ACTION_DELETE))
+            self._actual_claim_dir = os.path.join(self.session.expand_variables(self.claim_dir), self.worker_id)
+            if not os.path.exists(self._actual_claim_dir):
+                self.logger().info("Creating claim dir: %s" % self._actual_claim_dir)
+                os.makedirs(self._actual_claim_dir, exist_ok=True)
+        self._batcher = None
+        if micro_batching_enabled(self.batch_files, self.batch_time, self.batch_bytes, self.debounce):
+            self._batcher = MicroBatcher(batch_files=self.batch_files, batch_time=self.batch_time,
+                                         batch_bytes=self.batch_bytes, debounce=self.debounce)
+
+    def _list_claimed_files(self) -> List[str]:
+        """
+        Lists the files left over in the worker's claim directory.
+
+        :return: the files
+        :rtype: list
+        """
+        result = []
+        for file_name in sorted(os.listdir(self._actual_claim_dir)):
+            if os.path.splitext(file_name)[1] in self.extensions:
+                result.append(os.path.join(self._actual_claim_dir, file_name))
+        return result
+
+    def _other_files(self, file_path: str, dir_in: str) -> List[str]:
+        """
+        Returns the other input files associated with the file.
+
+        :param file_path: the file to get the other files for
+        :type file_path: str
+        :param dir_in: the directory to look for the other files
+        :type dir_in: str
+        :return: the other files
+        :rtype: list
+        """
+        return locate_other_input_files(file_path, dir_in, self.other_input_files)
+
+    def _claim_files(self, files: List[str]) -> List[str]:
+        """
+        Claims the files, skipping the ones claimed by other workers.
+
+        :param files: the files to claim
+        :type files: list
+        :return: the claimed files
+        :rtype: list
+        """
+        result = []
+        for file_path in files:
+            claimed = claim_file(file_path, self._actual_claim_dir)
+            if claimed is None:
+                self.logger().debug("Claimed by other worker: %s" % file_path)
+                continue
+            self.logger().debug("Claimed: %s" % file_path)
+            result.append(claimed)
+            for other_path in self._other_files(file_path, self._actual_dir_in):
+                claim_file(other_path, self._actual_claim_dir)
+        return result
+
+    def _next_batch(self) -> List[str]:
+        """
+        Polls the input directory until a micro-batch gets closed (or the session stopped).
+
+        :return: the files of the batch (claimed, if using a claim directory)
+        :rtype: list
+        """
+        while not self.session.stopped:
+            batch = self._batcher.poll()
+            if batch is not None:
+                self.logger().info("Micro-batch closed with %d file(s)" % len(batch))
+                if self._actual_claim_dir is not None:
+                    batch = self._claim_files(batch)
+                if len(batch) > 0:
+                    return batch
+                continue
+            self.logger().debug("Waiting for %s seconds before polling" % str(self.poll_wait))
+            sleep(self.poll_wait)
+            self._batcher.offer(self.list_files())
+        return []
+
+    def _apply_action(self, path: str):
+        """
+        Applies the action to the processed file.
+
+        :param path: the file to apply the action to
+        :type path: str
+        """
+        if self.action == POLL_ACTION_DELETE:
+            self.logger().debug("Deleting input: %s" % path)
+            os.remove(path)
+        elif self.action == POLL_ACTION_MOVE:
+            self.logger().debug("Moving input: %s -> %s" % (path, self._actual_dir_out))
+            os.replace(path, os.path.join(self._actual_dir_out, os.path.basename(path)))
+        elif self.action == POLL_ACTION_NOTHING:
+            pass
+        else:
+            raise Exception("Unhandled action: %s" % self.action)
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if (self._actual_claim_dir is None) and (self._batcher is None):
+            yield from super().read()
+            return
+
+        # left over from previous run?
+        files = []
+        if (self._actual_claim_dir is not None) and not self._recovered:
+            self._recovered = True
+            files = self._list_claimed_files()
+            if len(files) > 0:
+                self.logger().info("Processing %d file(s) left over in claim dir" % len(files))
+        if len(files) == 0:
+            if self._batcher is not None:
+                files = self._next_batch()
+            else:
+                self.logger().info("Waiting for %s seconds before polling" % str(self.poll_wait))
+                sleep(self.poll_wait)
+                files = self._claim_files(self.list_files())
+
+        result = []
+        if len(files) > 0:
+            if self.process_wait > 0:
+                self.logger().info("Waiting for %s seconds before processing" % str(self.process_wait))
+                sleep(self.process_wait)
+            result = self._read_files(files)
+
+        # action?
+        for file_path in files:
+            self._apply_action(file_path)
+            for other_path in self._other_files(file_path, os.path.dirname(file_path)):
+                self._apply_action(other_path)
+
+        # micro-batch gets pushed through the filters as a whole
+        if self._batcher is not None:
+            if len(result) > 0:
+                yield result
+        else:
+            for item in result:
+                yield item
@@ -2,17 +2,17 @@ import argparse
 from typing import List, Iterable, Union
 
 from seppl.variables import VariableSupporter, variable_list
-from seppl.io import locate_files
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader, load_function
-from sdc.api import Spectrum
+from sdc.api import Spectrum, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
 
 
 class PythonFunctionReader(Reader, VariableSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 function: str = None, resume_from: str = None,
+                 function: str = None, resume_from: str = None, lazy: bool = None, shard: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -23,6 +23,10 @@ class PythonFunctionReader(Reader, VariableSupporter):
         :type function: str
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -33,6 +37,8 @@ class PythonFunctionReader(Reader, VariableSupporter):
         self.source_list = source_list
         self.function = function
         self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
         self._inputs = None
         self._current_input = None
         self._function = None
@@ -66,6 +72,8 @@ class PythonFunctionReader(Reader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the spectral file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the spectral files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.spec'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
         parser.add_argument("-f", "--function", type=str, default=None, help="The Python function to use, format: module_name:function_name", required=True)
         return parser
 
@@ -81,6 +89,8 @@ class PythonFunctionReader(Reader, VariableSupporter):
         self.source_list = ns.input_list
         self.function = ns.function
         self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
 
     def generates(self) -> List:
         """
@@ -107,8 +117,10 @@ class PythonFunctionReader(Reader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, resume_from=self.resume_from)
-        self._current_input = self._inputs.pop(0)
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
         for item in self._function(self.session.current_input):
@@ -124,4 +136,4 @@ class PythonFunctionReader(Reader, VariableSupporter):
         :return: True if finished
         :rtype: bool
         """
-        return (self._inputs is not None) and len(self._inputs) == 0
+        return (self._inputs is not None) and self._inputs.is_empty()
@@ -0,0 +1,192 @@
+import argparse
+import sqlite3
+from pathlib import Path
+from typing import List, Iterable, Union
+
+import numpy as np
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+from wai.spectralio.api import Spectrum as WaiSpectrum
+
+from sdc.api import Reader, Spectrum2D, generate_spectrum_name, quote_identifier, DEFAULT_TABLE, WAVES_TABLE_SUFFIX, \
+    COLUMN_ID, COLUMN_SAMPLE_ID, COLUMN_WAVES_ID, COLUMN_AMPLITUDES, COLUMN_DTYPE, COLUMN_WAVES, COLUMNS, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
+
+DEFAULT_FETCH_SIZE = 1000
+""" the default number of rows to fetch at a time. """
+
+
+class SQLiteReader(Reader, VariableSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, table: str = None, where: str = None, fetch_size: int = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s)
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
+        :param table: the name of the table to read the spectra from
+        :type table: str
+        :param where: the SQL WHERE clause (without the WHERE keyword) for selecting the spectra, None for all
+        :type where: str
+        :param fetch_size: the number of rows to fetch at a time
+        :type fetch_size: int
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
+        self.table = table
+        self.where = where
+        self.fetch_size = fetch_size
+        self._inputs = None
+        self._current_input = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-sqlite"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads the spectra from SQLite databases generated by to-sqlite. The spectra can be selected via an " \
+               "SQL WHERE clause on the sample data columns (column names with spaces need to be in double quotes). " \
+               "The result set gets streamed."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the SQLite database(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the SQLite databases to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.db'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
+        parser.add_argument("-t", "--table", type=str, help="The name of the table to read the spectra from.", required=False, default=DEFAULT_TABLE)
+        parser.add_argument("-w", "--where", type=str, help="The SQL WHERE clause (without the WHERE keyword) for selecting the spectra, e.g.: \"Sample Type\" = 'cal'", required=False, default=None)
+        parser.add_argument("--fetch_size", type=int, help="The number of rows to fetch from the result set at a time.", required=False, default=DEFAULT_FETCH_SIZE)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
+        self.table = ns.table
+        self.where = ns.where
+        self.fetch_size = ns.fetch_size
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.table is None:
+            self.table = DEFAULT_TABLE
+        if self.fetch_size is None:
+            self.fetch_size = DEFAULT_FETCH_SIZE
+        self._inputs = None
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.db", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
+        self.session.current_input = self._current_input
+        self.logger().info("Reading from: " + str(self.session.current_input))
+
+        conn = sqlite3.connect(Path(self.session.current_input).absolute().as_uri() + "?mode=ro", uri=True)
+        try:
+            waves = dict()
+            for row in conn.execute("SELECT %s, %s FROM %s" % (quote_identifier(COLUMN_ID), quote_identifier(COLUMN_WAVES),
+                                                               quote_identifier(self.table + WAVES_TABLE_SUFFIX))):
+                waves[row[0]] = np.frombuffer(row[1], dtype=np.float64).tolist()
+
+            sql = "SELECT * FROM %s" % quote_identifier(self.table)
+            if (self.where is not None) and (len(self.where.strip()) > 0):
+                sql += " WHERE " + self.where
+            sql += " ORDER BY %s" % quote_identifier(COLUMN_ID)
+            self.logger().debug("SQL: %s" % sql)
+            cursor = conn.execute(sql)
+            columns = [x[0] for x in cursor.description]
+            index = {x: i for i, x in enumerate(columns)}
+            sample_data_columns = [(i, x) for i, x in enumerate(columns) if x not in COLUMNS]
+            count = 0
+            while True:
+                rows = cursor.fetchmany(self.fetch_size)
+                if len(rows) == 0:
+                    break
+                for row in rows:
+                    sample_data = dict()
+                    for i, column in sample_data_columns:
+                        if row[i] is not None:
+                            sample_data[column] = row[i]
+                    amplitudes = np.frombuffer(row[index[COLUMN_AMPLITUDES]], dtype=row[index[COLUMN_DTYPE]]).tolist()
+                    # each spectrum gets its own list of wave numbers
+                    sp = WaiSpectrum(waves=waves[row[index[COLUMN_WAVES_ID]]][:], amplitudes=amplitudes, sample_data=sample_data)
+                    if row[index[COLUMN_SAMPLE_ID]] is not None:
+                        sp.id = str(row[index[COLUMN_SAMPLE_ID]])
+                    count += 1
+                    name = generate_spectrum_name(sp, self.session.current_input, count)
+                    yield Spectrum2D(source=self.session.current_input, spectrum_name=name, spectrum=sp)
+        finally:
+            conn.close()
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and self._inputs.is_empty()
@@ -0,0 +1,275 @@
+import argparse
+import fnmatch
+import io
+import os
+import tarfile
+from typing import List, Iterable, Union
+
+from seppl import init_initializable, Initializable
+from seppl.io import DirectReader
+from seppl.variables import VariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from kasperl.api import Reader, parse_reader
+from sdc.api import SampleData, Spectrum2D, open_input, InputFiles, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
+
+
+class _TarMember(io.RawIOBase):
+    """
+    Exposes a tar member read in stream mode as a regular (non-seekable) binary stream.
+    """
+
+    def __init__(self, member):
+        """
+        Initializes the stream.
+
+        :param member: the file-like object returned by TarFile.extractfile
+        """
+        super().__init__()
+        self._member = member
+
+    def readable(self) -> bool:
+        """
+        Returns whether the stream can be read from.
+
+        :return: always True
+        :rtype: bool
+        """
+        return True
+
+    def readinto(self, b) -> int:
+        """
+        Reads bytes from the member into the buffer.
+
+        :param b: the pre-allocated, writable buffer to fill
+        :return: the number of bytes read, 0 at the end of the member
+        :rtype: int
+        """
+        data = self._member.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class TarReader(Reader, DirectReader, VariableSupporter):
+
+    def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, pattern: str = None, reader: str = None, direct_read: bool = False,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the reader.
+
+        :param source: the filename(s)
+        :param source_list: the file(s) with filename(s)
+        :param resume_from: the file to resume from (glob)
+        :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
+        :param pattern: the glob pattern that files must match in order to be read, None for all
+        :type pattern: str
+        :param reader: the command-line of the base reader to use
+        :type reader: str
+        :param direct_read: whether to use direct read mode
+        :type direct_read: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.source = source
+        self.source_list = source_list
+        self.resume_from = resume_from
+        self.lazy = lazy
+        self.shard = shard
+        self.pattern = pattern
+        self.reader = reader
+        self._direct_read = direct_read
+        self._inputs = None
+        self._current_input = None
+        self._reader = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "from-tar"
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Loads spectra or sample data matching the pattern from the (compressed) tar file(s) using the specified reader. " \
+               "The members get streamed sequentially to the reader, without extracting them to disk."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-i", "--input", type=str, help="Path to the tar file(s) to read (.tar, .tar.gz, .tar.bz2, .tar.xz, .tar.zst); glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the tar files to use; " + variable_list(obj=self), required=False, nargs="*")
+        parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.tar.gz'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
+        parser.add_argument("-p", "--pattern", type=str, help="Glob expression matching the files to read, e.g., '*.spec'", required=False)
+        parser.add_argument("-r", "--reader", type=str, help="The command-line of the direct reader to use for reading the spectra or sample data from the tar archive.", required=True)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.source = ns.input
+        self.source_list = ns.input_list
+        self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
+        self.pattern = ns.pattern
+        self.reader = ns.reader
+
+    def generates(self) -> List:
+        """
+        Returns the list of classes that get produced.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        if self._reader is None:
+            return [Spectrum2D, SampleData]
+        else:
+            return self._reader.generates()
+
+    @property
+    def direct_read(self) -> bool:
+        """
+        Returns whether the reader is in direct read mode.
+
+        :return: True if in direct read mode
+        :rtype: bool
+        """
+        return self._direct_read
+
+    @direct_read.setter
+    def direct_read(self, direct: bool):
+        """
+        Sets whether the reader is to be used in direct mode or not.
+
+        :param direct: True if to use in direct read mode
+        :type direct: bool
+        """
+        self._direct_read = direct
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+
+        from sdc.registry import available_readers
+
+        self._reader = parse_reader(self.reader, available_readers())
+        if not isinstance(self._reader, DirectReader):
+            raise Exception("Base reader is not a direct reader: %s" % str(type(self._reader)))
+        self._reader.direct_read = True
+        self._reader.session = self.session
+        if isinstance(self._reader, Initializable) and not init_initializable(self._reader, "reader"):
+            self.logger().error("Failed to initialize reader: %s" % self.reader)
+
+        if self.direct_read:
+            self._inputs = InputFiles()
+        else:
+            self._inputs = None
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one.
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._inputs is None:
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.tar*", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
+        self.session.current_input = self._current_input
+        self.logger().info("Reading from: " + str(self.session.current_input))
+
+        # the decompression (if any) happens in a background thread, the tar file gets read as a stream
+        with open_input(self.session.current_input, True) as fp:
+            with tarfile.open(fileobj=fp, mode="r|*") as tar:
+                yield from self._read_tarfile(tar)
+
+    def read_fp(self, fp) -> Iterable:
+        """
+        Reads the data from the file-like object and returns the items one by one.
+
+        :param fp: the file-like object to read from
+        :return: the data
+        :rtype: Iterable
+        """
+        with tarfile.open(fileobj=fp, mode="r|*") as tar:
+            yield from self._read_tarfile(tar)
+
+    def _read_tarfile(self, tar: tarfile.TarFile) -> Iterable:
+        """
+        Reads the matching members sequentially from the tar file and returns the items one by one.
+
+        :param tar: the tar file to read from (opened in stream mode)
+        :type tar: tarfile.TarFile
+        :return: the data
+        :rtype: Iterable
+        """
+        count = 0
+        for info in tar:
+            if not info.isfile():
+                continue
+            name = info.name
+            if (self.pattern is not None) and not fnmatch.fnmatch(name, self.pattern):
+                continue
+            count += 1
+            self.logger().info("Reading data from: %s" % name)
+            # the member data is only available until the next member gets accessed
+            with io.BufferedReader(_TarMember(tar.extractfile(info))) as member:
+                items = list(self._reader.read_fp(member))
+            for item in items:
+                if isinstance(item, Spectrum2D):
+                    item.spectrum_name = os.path.basename(name)
+                if isinstance(item, SampleData):
+                    item.sampledata_name = os.path.basename(name)
+            yield from items
+        self.logger().info("# matching files in tar file: %d" % count)
+
+    def has_finished(self) -> bool:
+        """
+        Returns whether reading has finished.
+
+        :return: True if finished
+        :rtype: bool
+        """
+        return (self._inputs is not None) and self._inputs.is_empty()
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if isinstance(self._reader, Initializable):
+            self._reader.finalize()
+        self._reader = None
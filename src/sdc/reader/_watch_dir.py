@@ -1,8 +1,66 @@
-from typing import Dict, List
+import argparse
+import os
+import threading
+from time import sleep
+from typing import Dict, List, Iterable
 
+import watchdog.events
+import watchdog.observers
 from wai.logging import LOGGING_WARNING
 from seppl import Plugin
 from kasperl.reader import WatchDir as KWatchDir
+from kasperl.reader import WATCH_ACTION_DELETE, WATCH_ACTION_MOVE, WATCH_ACTION_NOTHING, POLLING_TYPE_INITIAL, POLLING_TYPE_ALWAYS, \
+    EVENT_CREATED, EVENT_MODIFIED
+from sdc.api import MicroBatcher, add_micro_batch_options, micro_batching_enabled, locate_other_input_files
+
+
+class _MicroBatchHandler(watchdog.events.PatternMatchingEventHandler):
+    """
+    Collects the files that the watchdog observer reports for the micro-batches of the reader.
+    """
+
+    def __init__(self, owner):
+        """
+        Initializes the handler.
+
+        :param owner: the reader to collect the files for
+        :type owner: WatchDir
+        """
+        super().__init__(patterns=["*" + x for x in owner.extensions], ignore_directories=True, case_sensitive=False)
+        self.owner = owner
+        self.events = set(owner.events)
+
+    def _handle(self, event_type: str, path: str):
+        """
+        Collects the file or (when always polling) the directory listing.
+
+        :param event_type: the type of event
+        :type event_type: str
+        :param path: the file the event is for
+        :type path: str
+        """
+        if event_type not in self.events:
+            return
+        if self.owner.polling_type == POLLING_TYPE_ALWAYS:
+            self.owner.collect_files(self.owner.list_dir())
+        else:
+            self.owner.collect_files([path])
+
+    def on_created(self, event):
+        """
+        Called when a file is created.
+
+        :param event: the event
+        """
+        self._handle(EVENT_CREATED, event.src_path)
+
+    def on_modified(self, event):
+        """
+        Called when a file is modified.
+
+        :param event: the event
+        """
+        self._handle(EVENT_MODIFIED, event.src_path)
 
 
 class WatchDir(KWatchDir):
@@ -10,6 +68,7 @@ class WatchDir(KWatchDir):
     def __init__(self, dir_in: str = None, dir_out: str = None, check_wait: float = None, process_wait: float = None,
                  action: str = None, extensions: List[str] = None,
                  other_input_files: List[str] = None, max_files: int = None, base_reader: str = None,
+                 batch_files: int = None, batch_time: int = None, batch_bytes: int = None, debounce: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -32,6 +91,14 @@ class WatchDir(KWatchDir):
         :type max_files: int
         :param base_reader: the base reader to use (command-line)
         :type base_reader: str
+        :param batch_files: the maximum number of files per micro-batch, <1 for no limit
+        :type batch_files: int
+        :param batch_time: the maximum time in msec to wait for further files after the first file of a micro-batch, <1 for no waiting
+        :type batch_time: int
+        :param batch_bytes: the maximum number of bytes per micro-batch, <1 for no limit
+        :type batch_bytes: int
+        :param debounce: the time in msec that files must not have been modified before being processed, <1 to disable
+        :type debounce: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -41,6 +108,49 @@ class WatchDir(KWatchDir):
                          action=action, extensions=extensions, other_input_files=other_input_files,
                          max_files=max_files, base_reader=base_reader,
                          logger_name=logger_name, logging_level=logging_level)
+        self.batch_files = batch_files
+        self.batch_time = batch_time
+        self.batch_bytes = batch_bytes
+        self.debounce = debounce
+        self._batcher = None
+        self._batch_observer = None
+        self._collected = None
+        self._collected_lock = None
+
+    def description(self) -> str:
+        """
+        Returns a description of the reader.
+
+        :return: the description
+        :rtype: str
+        """
+        return super().description() + " " \
+               "With micro-batching, new files get collected until the batch is closed by the number of files, " \
+               "the time since the first file or the number of bytes, and the batch gets pushed through the filters at once."
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        add_micro_batch_options(parser)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.batch_files = ns.batch_files
+        self.batch_time = ns.batch_time
+        self.batch_bytes = ns.batch_bytes
+        self.debounce = ns.debounce
 
     def _available_readers(self) -> Dict[str, Plugin]:
         """
@@ -49,5 +159,128 @@ class WatchDir(KWatchDir):
         :return: the reader plugins
         :rtype: dict
         """
-        from adc.registry import available_readers
+        from sdc.registry import available_readers
         return available_readers()
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        self._batcher = None
+        if micro_batching_enabled(self.batch_files, self.batch_time, self.batch_bytes, self.debounce):
+            self._batcher = MicroBatcher(batch_files=self.batch_files, batch_time=self.batch_time,
+                                         batch_bytes=self.batch_bytes, debounce=self.debounce)
+        self._batch_observer = None
+        self._collected = []
+        self._collected_lock = threading.Lock()
+
+    def list_dir(self) -> List[str]:
+        """
+        Lists the files in the input directory that match the extensions, up to the maximum number of files.
+
+        :return: the files
+        :rtype: list
+        """
+        result = []
+        for file_name in sorted(os.listdir(self._actual_dir_in)):
+            file_path = os.path.join(self._actual_dir_in, file_name)
+            if os.path.isdir(file_path) or (os.path.splitext(file_name)[1] not in self.extensions):
+                continue
+            result.append(file_path)
+            if (self.max_files > 0) and (len(result) == self.max_files):
+                break
+        return result
+
+    def collect_files(self, paths: List[str]):
+        """
+        Adds the files to the ones collected for the micro-batches (called from the watchdog thread).
+
+        :param paths: the files to add
+        :type paths: list
+        """
+        with self._collected_lock:
+            self._collected.extend(paths)
+
+    def _collected_files(self) -> List[str]:
+        """
+        Returns the files collected since the last call.
+
+        :return: the files
+        :rtype: list
+        """
+        with self._collected_lock:
+            result = self._collected
+            self._collected = []
+        return result
+
+    def _apply_action(self, path: str):
+        """
+        Applies the action to the processed file.
+
+        :param path: the file to apply the action to
+        :type path: str
+        """
+        if self.action == WATCH_ACTION_DELETE:
+            self.logger().debug("Deleting input: %s" % path)
+            os.remove(path)
+        elif self.action == WATCH_ACTION_MOVE:
+            self.logger().debug("Moving input: %s -> %s" % (path, self._actual_dir_out))
+            os.replace(path, os.path.join(self._actual_dir_out, os.path.basename(path)))
+        elif self.action == WATCH_ACTION_NOTHING:
+            pass
+        else:
+            raise Exception("Unhandled action: %s" % self.action)
+
+    def read(self) -> Iterable:
+        """
+        Loads the data and returns the items one by one (or as micro-batches).
+
+        :return: the data
+        :rtype: Iterable
+        """
+        if self._batcher is None:
+            yield from super().read()
+            return
+
+        if self._batch_observer is None:
+            self._batch_observer = watchdog.observers.Observer()
+            self._batch_observer.schedule(_MicroBatchHandler(self), path=self._actual_dir_in, recursive=False)
+            self._batch_observer.start()
+
+            # initial listing
+            if self.polling_type in [POLLING_TYPE_INITIAL, POLLING_TYPE_ALWAYS]:
+                self.collect_files(self.list_dir())
+
+        while not self.session.stopped:
+            self._batcher.offer(self._collected_files())
+            batch = self._batcher.poll()
+            if batch is None:
+                sleep(self.check_wait)
+                continue
+
+            self.logger().info("Micro-batch closed with %d file(s)" % len(batch))
+            if self.process_wait > 0:
+                self.logger().info("Waiting for %s seconds before processing" % str(self.process_wait))
+                sleep(self.process_wait)
+            result = self._read_files(batch)
+
+            # delete or move files
+            for file_path in batch:
+                self._apply_action(file_path)
+                for other_path in locate_other_input_files(file_path, self._actual_dir_in, self.other_input_files):
+                    self._apply_action(other_path)
+
+            # micro-batch gets pushed through the filters as a whole
+            if len(result) > 0:
+                yield result
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._batch_observer is not None:
+            self._batch_observer.stop()
+            self._batch_observer.join()
+            self._batch_observer = None
@@ -1,23 +1,97 @@
 import argparse
 import fnmatch
+import multiprocessing
 import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from typing import List, Iterable, Union
-from zipfile import ZipFile
+from typing import List, Iterable, Union, Optional, Dict
+from zipfile import ZipFile, ZipInfo
 
-from seppl import init_initializable, Initializable
-from seppl.io import locate_files, DirectReader
+from seppl import init_initializable, Initializable, Session
+from seppl.io import DirectReader
 from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import Reader, parse_reader
-from sdc.api import SampleData, Spectrum2D
+from sdc.api import SampleData, Spectrum2D, InputFiles, locate_input_files, add_lazy_option, \
+    add_shard_option, parse_shard, set_session_shard
+
+DEFAULT_STREAM_THRESHOLD = 16 * 1024 * 1024
+""" the member size in bytes above which members get streamed rather than buffered. """
+
+ZIP_FILE_CACHE_SIZE = 16
+""" the maximum number of zip files that a reader keeps open for reading them again. """
+
+_worker_readers: Dict[str, Reader] = dict()
+""" the base readers of the worker process, keyed by command-line. """
+
+_worker_zipfile = None
+""" the tuple of key (path, size, modification time) and zip file last opened by the worker process. """
+
+
+def _zipfile_key(path: str) -> tuple:
+    """
+    Generates the key for the zip file, which changes when the file gets modified.
+
+    :param path: the zip file
+    :type path: str
+    :return: the tuple of absolute path, size and modification time
+    :rtype: tuple
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def _parse_member(reader: str, session: Session, path: Optional[str], name: str, data: Optional[bytes]) -> List:
+    """
+    Parses the zip file member with the base reader. Gets executed in a worker process,
+    which keeps the base reader and the last zip file open for subsequent members.
+
+    :param reader: the command-line of the base reader
+    :type reader: str
+    :param session: the session for the base reader
+    :type session: Session
+    :param path: the zip file to read the member from, None if the data is supplied
+    :type path: str
+    :param name: the name of the member
+    :type name: str
+    :param data: the content of the member, None to read it from the zip file
+    :type data: bytes
+    :return: the items
+    :rtype: list
+    """
+    global _worker_zipfile
+
+    base_reader = _worker_readers.get(reader)
+    if base_reader is None:
+        from sdc.registry import available_readers
+        base_reader = parse_reader(reader, available_readers())
+        base_reader.direct_read = True
+        base_reader.session = session
+        if isinstance(base_reader, Initializable):
+            init_initializable(base_reader, "reader", raise_again=True)
+        _worker_readers[reader] = base_reader
+    base_reader.session = session
+
+    if data is None:
+        key = _zipfile_key(path)
+        if (_worker_zipfile is None) or (_worker_zipfile[0] != key):
+            if _worker_zipfile is not None:
+                _worker_zipfile[1].close()
+            _worker_zipfile = (key, ZipFile(path, mode="r"))
+        data = _worker_zipfile[1].read(name)
+    buffer = BytesIO(data)
+    buffer.name = name
+    return list(base_reader.read_fp(buffer))
 
 
 class ZipReader(Reader, DirectReader, VariableSupporter):
 
     def __init__(self, source: Union[str, List[str]] = None, source_list: Union[str, List[str]] = None,
-                 resume_from: str = None, pattern: str = None, reader: str = None, direct_read: bool = False,
+                 resume_from: str = None, lazy: bool = None, shard: str = None, pattern: str = None, reader: str = None, num_workers: int = None,
+                 stream_threshold: int = None, direct_read: bool = False,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the reader.
@@ -26,10 +100,18 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         :param source_list: the file(s) with filename(s)
         :param resume_from: the file to resume from (glob)
         :type resume_from: str
+        :param lazy: whether to enumerate the input files lazily
+        :type lazy: bool
+        :param shard: the shard to process (INDEX/COUNT, 1-based index), None for all files
+        :type shard: str
         :param pattern: the glob pattern that files must match in order to be extracted, None for all
         :type pattern: str
         :param reader: the command-line of the base reader to use
         :type reader: str
+        :param num_workers: the number of worker processes for decompressing/parsing members in parallel, <2 for sequential
+        :type num_workers: int
+        :param stream_threshold: the size in bytes above which members get streamed to the base reader rather than buffered, -1 to always buffer
+        :type stream_threshold: int
         :param direct_read: whether to use direct read mode
         :type direct_read: bool
         :param logger_name: the name to use for the logger
@@ -41,12 +123,18 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         self.source = source
         self.source_list = source_list
         self.resume_from = resume_from
-        self.pattner = pattern
+        self.lazy = lazy
+        self.shard = shard
+        self.pattern = pattern
         self.reader = reader
+        self.num_workers = num_workers
+        self.stream_threshold = stream_threshold
         self._direct_read = direct_read
         self._inputs = None
         self._current_input = None
         self._reader = None
+        self._zipfiles = None
+        self._pool = None
 
     def name(self) -> str:
         """
@@ -77,8 +165,12 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         parser.add_argument("-i", "--input", type=str, help="Path to the zip file(s) to read; glob syntax is supported; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("-I", "--input_list", type=str, help="Path to the text file(s) listing the zip files to use; " + variable_list(obj=self), required=False, nargs="*")
         parser.add_argument("--resume_from", type=str, help="Glob expression matching the file to resume from, e.g., '*/012345.zip'", required=False)
+        add_lazy_option(parser)
+        add_shard_option(parser)
         parser.add_argument("-p", "--pattern", type=str, help="Glob expression matching the files to extract, e.g., '*.spec'", required=False)
         parser.add_argument("-r", "--reader", type=str, help="The command-line of the direct reader to use for reading the spectra or sample data from the zip archive.", required=True)
+        parser.add_argument("-n", "--num_workers", type=int, help="The number of worker processes to use for decompressing and parsing the members in parallel (items are still output in member order); <2 for sequential processing.", required=False, default=1)
+        parser.add_argument("--stream_threshold", type=int, help="The size in bytes above which members get streamed to the base reader rather than getting buffered in memory; -1 to always buffer.", required=False, default=DEFAULT_STREAM_THRESHOLD)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -92,8 +184,12 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         self.source = ns.input
         self.source_list = ns.input_list
         self.resume_from = ns.resume_from
+        self.lazy = ns.lazy
+        self.shard = ns.shard
         self.pattern = ns.pattern
         self.reader = ns.reader
+        self.num_workers = ns.num_workers
+        self.stream_threshold = ns.stream_threshold
 
     def generates(self) -> List:
         """
@@ -127,24 +223,41 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         """
         self._direct_read = direct
 
-    def initialize(self):
+    def _create_base_reader(self) -> Reader:
         """
-        Initializes the processing, e.g., for opening files or databases.
+        Parses and initializes the base reader.
+
+        :return: the base reader
+        :rtype: Reader
         """
         from sdc.registry import available_readers
 
+        result = parse_reader(self.reader, available_readers())
+        if not isinstance(result, DirectReader):
+            raise Exception("Base reader is not a direct reader: %s" % str(type(result)))
+        result.direct_read = True
+        result.session = self.session
+        if isinstance(result, Initializable) and not init_initializable(result, "reader"):
+            self.logger().error("Failed to initialize reader: %s" % self.reader)
+        return result
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
         super().initialize()
 
-        self._reader = parse_reader(self.reader, available_readers())
-        if not isinstance(self._reader, DirectReader):
-            raise Exception("Base reader is not a direct reader: %s" % str(type(self._reader)))
-        self._reader.direct_read = True
-        self._reader.session = self.session
-        if isinstance(self._reader, Initializable) and not init_initializable(self._reader, "reader"):
-            self.logger().error("Failed to initialize reader: %s" % self.reader)
+        if self.num_workers is None:
+            self.num_workers = 1
+        if self.stream_threshold is None:
+            self.stream_threshold = DEFAULT_STREAM_THRESHOLD
+
+        self._reader = self._create_base_reader()
+        self._zipfiles = OrderedDict()
+        self._pool = None
 
         if self.direct_read:
-            self._inputs = []
+            self._inputs = InputFiles()
         else:
             self._inputs = None
 
@@ -156,13 +269,14 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         :rtype: Iterable
         """
         if self._inputs is None:
-            self._inputs = locate_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.zip", resume_from=self.resume_from)
-        self._current_input = self._inputs.pop(0)
+            shard = parse_shard(self.shard)
+            set_session_shard(self.session, shard)
+            self._inputs = locate_input_files(self.source, input_lists=self.source_list, fail_if_empty=True, default_glob="*.zip", resume_from=self.resume_from, lazy=self.lazy, shard=shard)
+        self._current_input = self._inputs.pop()
         self.session.current_input = self._current_input
         self.logger().info("Reading from: " + str(self.session.current_input))
 
-        with open(self.session.current_input, "rb") as fp:
-            yield self.read_fp(fp)
+        yield from self._read_zipfile(self._open_zipfile(self.session.current_input), self.session.current_input)
 
     def read_fp(self, fp) -> Iterable:
         """
@@ -172,23 +286,149 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         :return: the data
         :rtype: Iterable
         """
-        zipfile = ZipFile(fp)
-        names = zipfile.namelist()
-        self.logger().info("# files in zip file: %d" % len(names))
-        if self.pattern is not None:
-            names = fnmatch.filter(names, self.pattern)
-            self.logger().info("# matching files: %d" % len(names))
-        for name in names:
+        with ZipFile(fp) as zipfile:
+            yield from self._read_zipfile(zipfile, None)
+
+    def _open_zipfile(self, path: str) -> ZipFile:
+        """
+        Opens the zip file for reading, reusing the already opened instance (and its parsed
+        central directory) if the file was read before and has not changed since.
+
+        :param path: the zip file to open
+        :type path: str
+        :return: the zip file
+        :rtype: ZipFile
+        """
+        key = _zipfile_key(path)
+        result = self._zipfiles.get(key)
+        if result is not None:
+            self._zipfiles.move_to_end(key)
+            return result
+        # close outdated versions of the file and the least recently used files
+        for other in [x for x in self._zipfiles.keys() if x[0] == key[0]]:
+            self._zipfiles.pop(other).close()
+        while len(self._zipfiles) >= ZIP_FILE_CACHE_SIZE:
+            self._zipfiles.popitem(last=False)[1].close()
+        result = ZipFile(path, mode="r")
+        self._zipfiles[key] = result
+        return result
+
+    def _worker_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the pool of worker processes, creates it if necessary.
+
+        :return: the pool
+        :rtype: ProcessPoolExecutor
+        """
+        if self._pool is None:
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+            else:
+                context = multiprocessing.get_context()
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=context)
+        return self._pool
+
+    def _read_member(self, zipfile: ZipFile, info: ZipInfo, reader: Reader) -> Iterable:
+        """
+        Reads the items from the specified zip file member and returns them one by one.
+
+        :param zipfile: the zip file to read from
+        :type zipfile: ZipFile
+        :param info: the member to read
+        :type info: ZipInfo
+        :param reader: the base reader to use for parsing the data
+        :type reader: Reader
+        :return: the data
+        :rtype: Iterable
+        """
+        name = info.filename
+        if (self.stream_threshold > -1) and (info.file_size > self.stream_threshold):
+            self.logger().info("Streaming data from: %s" % name)
+            with zipfile.open(info) as member:
+                for item in reader.read_fp(member):
+                    yield self._rename(item, name)
+        else:
             self.logger().info("Extracting: %s" % name)
-            data = zipfile.read(name)
-            buffer = BytesIO(data)
+            buffer = BytesIO(zipfile.read(info))
+            buffer.name = name
             self.logger().info("Reading data from: %s" % name)
-            for item in self._reader.read_fp(buffer):
-                if isinstance(item, Spectrum2D):
-                    item.spectrum_name = os.path.basename(name)
-                if isinstance(item, SampleData):
-                    item.sampledata_name = os.path.basename(name)
-                yield item
+            for item in reader.read_fp(buffer):
+                yield self._rename(item, name)
+
+    def _rename(self, item, name: str):
+        """
+        Names the item after the zip file member it was read from.
+
+        :param item: the item to update
+        :param name: the name of the member
+        :type name: str
+        :return: the updated item
+        """
+        if isinstance(item, Spectrum2D):
+            item.spectrum_name = os.path.basename(name)
+        if isinstance(item, SampleData):
+            item.sampledata_name = os.path.basename(name)
+        return item
+
+    def _read_zipfile(self, zipfile: ZipFile, path: Optional[str]) -> Iterable:
+        """
+        Reads the matching members from the zip file and returns the items one by one.
+
+        :param zipfile: the zip file to read from
+        :type zipfile: ZipFile
+        :param path: the path of the zip file, None if read from a file-like object
+        :type path: str
+        :return: the data
+        :rtype: Iterable
+        """
+        infos = [x for x in zipfile.infolist() if not x.is_dir()]
+        self.logger().info("# files in zip file: %d" % len(infos))
+        if self.pattern is not None:
+            infos = [x for x in infos if fnmatch.fnmatch(x.filename, self.pattern)]
+            self.logger().info("# matching files: %d" % len(infos))
+
+        if self.num_workers < 2:
+            for info in infos:
+                yield from self._read_member(zipfile, info, self._reader)
+            return
+
+        # decompress and parse the members in worker processes, but output them in member order;
+        # the workers read the members from the zip file themselves, unless it has no path;
+        # large members get streamed in this process; the number of pending members is limited
+        # to keep memory usage in check
+        pool = self._worker_pool()
+        session = Session(options=self.session.options, logger=self.session.logger)
+        pending = deque()
+        try:
+            for info in infos:
+                if (self.stream_threshold > -1) and (info.file_size > self.stream_threshold):
+                    while len(pending) > 0:
+                        yield from self._collect(*pending.popleft())
+                    yield from self._read_member(zipfile, info, self._reader)
+                    continue
+                data = zipfile.read(info) if (path is None) else None
+                pending.append((info.filename, pool.submit(_parse_member, self.reader, session, path, info.filename, data)))
+                if len(pending) >= 2 * self.num_workers:
+                    yield from self._collect(*pending.popleft())
+            while len(pending) > 0:
+                yield from self._collect(*pending.popleft())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def _collect(self, name: str, future) -> Iterable:
+        """
+        Waits for the worker process to parse the member and returns the items one by one.
+
+        :param name: the name of the member
+        :type name: str
+        :param future: the future of the parsing job
+        :return: the data
+        :rtype: Iterable
+        """
+        self.logger().info("Reading data from: %s" % name)
+        for item in future.result():
+            yield self._rename(item, name)
 
     def has_finished(self) -> bool:
         """
@@ -197,4 +437,20 @@ class ZipReader(Reader, DirectReader, VariableSupporter):
         :return: True if finished
         :rtype: bool
         """
-        return (self._inputs is not None) and len(self._inputs) == 0
+        return (self._inputs is not None) and self._inputs.is_empty()
+
+    def finalize(self):
+        """
+        Finishes the reading, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._zipfiles is not None:
+            for zipfile in self._zipfiles.values():
+                zipfile.close()
+            self._zipfiles = None
+        if isinstance(self._reader, Initializable):
+            self._reader.finalize()
+        self._reader = None
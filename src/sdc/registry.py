@@ -1,11 +1,20 @@
 import argparse
+import hashlib
+import importlib.util
+import json
 import logging
 import os
 import traceback
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from seppl import ClassListerRegistry, Plugin, get_class_name
+from seppl import ClassListerRegistry, ClassCache, Plugin, get_class_name, get_class, get_all_names, get_class_lister, \
+    split_args
+
+try:
+    from importlib_metadata import entry_points
+except ImportError:
+    from importlib.metadata import entry_points
 
 # environment variable with comma-separated list of class listers to use
 ENV_SDC_CLASS_LISTERS = "SDC_CLASS_LISTERS"
@@ -31,12 +40,28 @@ DEFAULT_SDC_CLASS_LISTERS_IGNORED = [
 # environment variable for managing the class cache: on|off|reset
 ENV_SDC_CLASS_CACHE = "SDC_CLASS_CACHE"
 
+# environment variable for turning off lazy loading of plugins: on|off
+ENV_SDC_LAZY_PLUGINS = "SDC_LAZY_PLUGINS"
+
+# the name of the application, used for the class cache
+APP_NAME = "spectral-data-converter"
+
+# the file (in the class cache dir) that maps the names of the pipeline plugins to their classes
+PLUGIN_INDEX_FILE = "sdc.plugin_index.json"
+
+# the superclasses of the pipeline plugins that get indexed
+PIPELINE_SUPERCLASSES = [
+    "seppl.io.Reader",
+    "seppl.io.Filter",
+    "seppl.io.Writer",
+]
+
 REGISTRY = ClassListerRegistry(default_class_listers=DEFAULT_SDC_CLASS_LISTERS,
                                env_class_listers=ENV_SDC_CLASS_LISTERS,
                                env_excluded_class_listers=ENV_SDC_CLASS_LISTERS_EXCL,
                                ignored_class_listers=DEFAULT_SDC_CLASS_LISTERS_IGNORED,
                                env_ignored_class_listers=ENV_SDC_CLASS_LISTERS_IGNORED,
-                               app_name="spectral-data-converter",
+                               app_name=APP_NAME,
                                class_cache_env=ENV_SDC_CLASS_CACHE)
 
 IMG_REGISTRY = "sdc-registry"
@@ -212,6 +237,184 @@ def register_plugins(custom_class_listers: List[str] = None, excluded_class_list
     available_plugins()
 
 
+def lazy_loading_enabled() -> bool:
+    """
+    Returns whether plugins can get loaded lazily.
+
+    :return: True if lazy loading enabled
+    :rtype: bool
+    """
+    return os.getenv(ENV_SDC_LAZY_PLUGINS, "on") != "off"
+
+
+def _plugin_index_path() -> str:
+    """
+    Returns the path of the plugin index file, located in the class cache dir.
+
+    :return: the path
+    :rtype: str
+    """
+    return os.path.join(ClassCache(APP_NAME, PIPELINE_SUPERCLASSES[0]).cache_dir, PLUGIN_INDEX_FILE)
+
+
+def _class_listers() -> List[str]:
+    """
+    Returns all the class listers that may contribute pipeline plugins (defaults, environment, custom, entry points).
+
+    :return: the class listers
+    :rtype: list
+    """
+    result = set(DEFAULT_SDC_CLASS_LISTERS)
+    if REGISTRY.custom_class_listers is not None:
+        result.update(REGISTRY.custom_class_listers)
+    if os.getenv(ENV_SDC_CLASS_LISTERS) is not None:
+        result.update(os.getenv(ENV_SDC_CLASS_LISTERS).split(","))
+    for item in entry_points(group="class_lister"):
+        result.add(item.value)
+    return sorted([x for x in result if len(x) > 0])
+
+
+def _module_files(module: str) -> List[str]:
+    """
+    Returns the source files of the module, i.e., all the Python files for a package.
+
+    :param module: the module to get the files for
+    :type module: str
+    :return: the files
+    :rtype: list
+    """
+    spec = importlib.util.find_spec(module)
+    if spec is None:
+        return []
+    if spec.submodule_search_locations is None:
+        return [] if (spec.origin is None) else [spec.origin]
+    result = []
+    for location in spec.submodule_search_locations:
+        for root, dirs, files in os.walk(location):
+            result.extend([os.path.join(root, f) for f in files if f.endswith(".py")])
+    return result
+
+
+def plugin_index_fingerprint() -> str:
+    """
+    Generates a fingerprint of the modules that the class listers list for the pipeline plugins
+    (names, sizes and modification times of their files), for detecting an outdated index.
+    Only imports the class listers, not the modules themselves.
+
+    :return: the fingerprint
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    for env in [ENV_SDC_CLASS_LISTERS, ENV_SDC_CLASS_LISTERS_EXCL, ENV_SDC_CLASS_LISTERS_IGNORED]:
+        h.update(("%s=%s\n" % (env, os.getenv(env, ""))).encode("utf-8"))
+    modules = set()
+    for class_lister in _class_listers():
+        try:
+            classes = get_class_lister(class_lister)()
+        except Exception:
+            h.update(("%s: failed\n" % class_lister).encode("utf-8"))
+            continue
+        for c in PIPELINE_SUPERCLASSES:
+            modules.update(classes.get(c, []))
+    for module in sorted(modules):
+        try:
+            files = _module_files(module)
+        except Exception:
+            files = []
+        for f in sorted(files):
+            try:
+                stat = os.stat(f)
+                h.update(("%s:%d:%d\n" % (f, stat.st_size, stat.st_mtime_ns)).encode("utf-8"))
+            except OSError:
+                pass
+    return h.hexdigest()
+
+
+def update_plugin_index() -> Dict[str, Dict]:
+    """
+    Loads all pipeline plugins and stores the mapping of plugin names (incl aliases) to class names,
+    along with the fingerprint of the plugin modules, which is used for detecting an outdated index.
+
+    :return: the index, key is superclass
+    :rtype: dict
+    """
+    result = {"fingerprint": plugin_index_fingerprint()}
+    for c in PIPELINE_SUPERCLASSES:
+        plugins = REGISTRY.plugins(c, fail_if_empty=False)
+        result[c] = {
+            "plugins": {name: get_class_name(plugin) for name, plugin in plugins.items()},
+        }
+    try:
+        os.makedirs(os.path.dirname(_plugin_index_path()), exist_ok=True)
+        with open(_plugin_index_path(), "w") as fp:
+            json.dump(result, fp, indent=2)
+    except Exception:
+        logger().warning("Failed to write plugin index: %s" % _plugin_index_path())
+    return result
+
+
+def load_plugin_index() -> Optional[Dict[str, Dict]]:
+    """
+    Loads the plugin index, if available and still consistent with the plugin modules.
+
+    :return: the index, key is superclass; None if not available or outdated
+    :rtype: dict
+    """
+    path = _plugin_index_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as fp:
+            result = json.load(fp)
+    except Exception:
+        logger().warning("Failed to read plugin index: %s" % path)
+        return None
+    for c in PIPELINE_SUPERCLASSES:
+        if c not in result:
+            return None
+    if result.get("fingerprint") != plugin_index_fingerprint():
+        return None
+    return result
+
+
+def lazy_pipeline_plugins(args: List[str]) -> Optional[Tuple[Dict[str, Plugin], Dict[str, Plugin], Dict[str, Plugin]]]:
+    """
+    Instantiates only the readers, filters and writers that the command-line arguments use, using the plugin index.
+    The arguments get split into plugins the same way as when parsing the pipeline. Only the modules of these
+    plugins (and their dependencies) get imported.
+
+    :param args: the command-line arguments of the pipeline
+    :type args: list
+    :return: the tuple of readers, filters and writers dictionaries; None if lazy loading is not possible
+    :rtype: tuple
+    """
+    if not lazy_loading_enabled():
+        return None
+    index = load_plugin_index()
+    if index is None:
+        update_plugin_index()
+        return None
+
+    handlers = []
+    for c in PIPELINE_SUPERCLASSES:
+        handlers.extend(index[c]["plugins"].keys())
+    names = set([v[0] for k, v in split_args(args, handlers).items() if len(k) > 0])
+    result = []
+    for c in PIPELINE_SUPERCLASSES:
+        plugins = dict()
+        instances = dict()
+        for name, cname in index[c]["plugins"].items():
+            if name not in names:
+                continue
+            if cname not in instances:
+                instances[cname] = get_class(full_class_name=cname)()
+            plugin = instances[cname]
+            for plugin_name in get_all_names(plugin):
+                plugins[plugin_name] = plugin
+        result.append(plugins)
+    return result[0], result[1], result[2]
+
+
 def _list(list_type: str, custom_class_listers: Optional[List[str]] = None, excluded_class_listers: Optional[List[str]] = None):
     """
     Lists various things on stdout.
@@ -0,0 +1,160 @@
+import argparse
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+from typing import List, Dict
+
+from wai.logging import add_logging_level, init_logging, set_logging_level
+
+from sdc.core import ENV_SDC_LOGLEVEL
+from sdc.registry import ENV_SDC_CLASS_CACHE, ENV_SDC_LAZY_PLUGINS
+
+BENCHMARK_STARTUP = "sdc-benchmark-startup"
+
+_logger = logging.getLogger(BENCHMARK_STARTUP)
+
+DEFAULT_PIPELINE = ["start"]
+""" the default pipeline to time, does not require any data. """
+
+
+def _run(pipeline: List[str], env: Dict[str, str], importtime: bool = False) -> subprocess.CompletedProcess:
+    """
+    Executes sdc-convert with the pipeline in a new Python process.
+
+    :param pipeline: the pipeline arguments
+    :type pipeline: list
+    :param env: the environment to use
+    :type env: dict
+    :param importtime: whether to output the import times (-X importtime)
+    :type importtime: bool
+    :return: the completed process
+    :rtype: subprocess.CompletedProcess
+    """
+    cmd = [sys.executable]
+    if importtime:
+        cmd.extend(["-X", "importtime"])
+    cmd.extend(["-m", "sdc.tool.convert"])
+    cmd.extend(pipeline)
+    return subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def _top_imports(stderr: str, num: int) -> List[str]:
+    """
+    Parses the output of -X importtime and returns the top-level imports with the largest cumulative times.
+
+    :param stderr: the output of the process
+    :type stderr: str
+    :param num: the number of imports to return
+    :type num: int
+    :return: the formatted imports
+    :rtype: list
+    """
+    imports = []
+    for line in stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)", line)
+        if m is None:
+            continue
+        # only the top-level imports (indented by a single space)
+        if len(m.group(3)) == 1:
+            imports.append((int(m.group(2)), m.group(4)))
+    imports.sort(reverse=True)
+    return ["%8.1fms  %s" % (x[0] / 1000.0, x[1]) for x in imports[:num]]
+
+
+def benchmark_startup(pipeline: List[str], runs: int = 5, lazy: bool = True, importtime: int = 0) -> float:
+    """
+    Measures the wall-clock time of executing sdc-convert with the pipeline, starting a new process for each run.
+    An initial run (not timed) populates the class cache and the plugin index.
+
+    :param pipeline: the pipeline arguments
+    :type pipeline: list
+    :param runs: the number of timed runs
+    :type runs: int
+    :param lazy: whether to use lazy plugin loading or load all plugins
+    :type lazy: bool
+    :param importtime: the number of top-level imports to output, 0 to skip
+    :type importtime: int
+    :return: the median time in milliseconds
+    :rtype: float
+    """
+    env = dict(os.environ)
+    env[ENV_SDC_CLASS_CACHE] = "on"
+    env[ENV_SDC_LAZY_PLUGINS] = "on" if lazy else "off"
+
+    result = _run(pipeline, env)
+    if result.returncode != 0:
+        raise Exception("Failed to execute pipeline %s:\n%s" % (str(pipeline), result.stderr))
+
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        _run(pipeline, env)
+        times.append((time.perf_counter() - start) * 1000.0)
+        _logger.info("run %d: %.1fms" % (i + 1, times[-1]))
+    median = statistics.median(times)
+    print("pipeline: %s" % " ".join(pipeline))
+    print("mode:     %s" % ("lazy" if lazy else "eager"))
+    print("runs:     %d" % runs)
+    print("min:      %.1fms" % min(times))
+    print("median:   %.1fms" % median)
+    print("max:      %.1fms" % max(times))
+
+    if importtime > 0:
+        result = _run(pipeline, env, importtime=True)
+        print("top-level imports (cumulative):")
+        for line in _top_imports(result.stderr, importtime):
+            print(line)
+
+    return median
+
+
+def main(args=None):
+    """
+    The main method for parsing command-line arguments.
+
+    :param args: the commandline arguments, uses sys.argv if not supplied
+    :type args: list
+    """
+    init_logging(env_var=ENV_SDC_LOGLEVEL)
+    parser = argparse.ArgumentParser(
+        description="Measures the cold start time of sdc-convert for a pipeline, for tracking the start-up overhead.",
+        prog=BENCHMARK_STARTUP,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--runs", metavar="NUM", help="The number of timed runs.", type=int, default=5, required=False)
+    parser.add_argument("--eager", action="store_true", help="Loads all plugins rather than only the ones used by the pipeline.", required=False)
+    parser.add_argument("-i", "--importtime", metavar="NUM", help="Outputs the NUM top-level imports with the largest cumulative import times; 0 to skip.", type=int, default=0, required=False)
+    parser.add_argument("-t", "--threshold", metavar="MSEC", help="Fails if the median time exceeds this many milliseconds; <1 to disable.", type=float, default=-1, required=False)
+    add_logging_level(parser)
+    parser.add_argument("pipeline", nargs=argparse.REMAINDER, help="The sdc-convert pipeline to time (default: %s)." % " ".join(DEFAULT_PIPELINE))
+    parsed = parser.parse_args(args=args)
+    set_logging_level(_logger, parsed.logging_level)
+
+    pipeline = parsed.pipeline if (len(parsed.pipeline) > 0) else DEFAULT_PIPELINE
+    median = benchmark_startup(pipeline, runs=parsed.runs, lazy=not parsed.eager, importtime=parsed.importtime)
+    if (parsed.threshold > 0) and (median > parsed.threshold):
+        raise Exception("Median start-up time of %.1fms exceeds threshold of %.1fms!" % (median, parsed.threshold))
+
+
+def sys_main() -> int:
+    """
+    Runs the main function using the system cli arguments, and
+    returns a system error code.
+
+    :return: 0 for success, 1 for failure.
+    """
+    try:
+        main()
+        return 0
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(sys.argv[1:]), file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    main()
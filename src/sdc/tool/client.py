@@ -0,0 +1,148 @@
+import argparse
+import json
+import socket
+import sys
+import traceback
+import urllib.request
+from typing import Dict, Iterator, List
+
+CLIENT = "sdc-client"
+
+EXIT_CODE_ERROR = 2
+""" the exit code used when the daemon reports an error. """
+
+
+def _socket_events(path: str, request: Dict) -> Iterator[Dict]:
+    """
+    Sends the request to the daemon via the Unix domain socket and returns the events as they arrive.
+
+    :param path: the socket file
+    :type path: str
+    :param request: the request to send
+    :type request: dict
+    :return: the events
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as fp:
+            for line in fp:
+                yield json.loads(line.decode("utf-8"))
+
+
+def _http_events(url: str, request: Dict) -> Iterator[Dict]:
+    """
+    Sends the request to the daemon's HTTP endpoint and returns the events as they arrive.
+
+    :param url: the base URL of the daemon, e.g., http://127.0.0.1:8000
+    :type url: str
+    :param request: the request to send
+    :type request: dict
+    :return: the events
+    """
+    url = url.rstrip("/")
+    command = request.get("command", "run")
+    if command == "run":
+        req = urllib.request.Request(url + "/jobs", data=json.dumps(request).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    elif command == "status":
+        req = urllib.request.Request(url + "/status", method="GET")
+    else:
+        req = urllib.request.Request(url + "/" + command, data=b"", method="POST")
+    with urllib.request.urlopen(req) as fp:
+        for line in fp:
+            yield json.loads(line.decode("utf-8"))
+
+
+def submit(request: Dict, socket_file: str = None, url: str = None, quiet: bool = False) -> int:
+    """
+    Submits the request to the daemon and outputs the streamed events.
+
+    :param request: the request to send
+    :type request: dict
+    :param socket_file: the Unix domain socket of the daemon
+    :type socket_file: str
+    :param url: the URL of the daemon's HTTP endpoint
+    :type url: str
+    :param quiet: whether to suppress the output of the job
+    :type quiet: bool
+    :return: the exit code of the job (0 for status/shutdown)
+    :rtype: int
+    """
+    if socket_file is not None:
+        events = _socket_events(socket_file, request)
+    elif url is not None:
+        events = _http_events(url, request)
+    else:
+        raise Exception("Either socket or URL must be specified!")
+
+    result = 0
+    for event in events:
+        kind = event.get("event")
+        if kind == "output":
+            if not quiet:
+                print(event["line"], flush=True)
+        elif kind == "finished":
+            result = event["exit_code"]
+            print("job %d finished: exit code=%d, duration=%.3fs" % (event["job"], result, event["duration"]), file=sys.stderr)
+        elif kind == "error":
+            print("error: %s" % event["message"], file=sys.stderr)
+            result = EXIT_CODE_ERROR
+        elif kind == "status":
+            print(json.dumps(event, indent=2))
+        elif not quiet:
+            print("job %d %s" % (event["job"], kind), file=sys.stderr)
+    return result
+
+
+def main(args=None) -> int:
+    """
+    The main method for parsing command-line arguments.
+
+    :param args: the commandline arguments, uses sys.argv if not supplied
+    :type args: list
+    :return: the exit code of the job
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        description="Thin client for submitting sdc-convert pipelines to sdc-daemon and streaming back status and output. "
+                    "Example: " + CLIENT + " -s /tmp/sdc.sock from-asciixy -i '*.txt' to-arff -o out.arff",
+        prog=CLIENT,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-s", "--socket", metavar="FILE", help="The Unix domain socket of the daemon.", type=str, default=None, required=False)
+    parser.add_argument("-u", "--url", metavar="URL", help="The URL of the daemon's HTTP endpoint, e.g., http://127.0.0.1:8000", type=str, default=None, required=False)
+    parser.add_argument("--status", action="store_true", help="Outputs the status of the daemon.", required=False)
+    parser.add_argument("--shutdown", action="store_true", help="Shuts down the daemon.", required=False)
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppresses the output of the job.", required=False)
+    parser.add_argument("pipeline", nargs=argparse.REMAINDER, help="The sdc-convert pipeline to execute.")
+    parsed = parser.parse_args(args=args)
+
+    if parsed.status:
+        request = {"command": "status"}
+    elif parsed.shutdown:
+        request = {"command": "shutdown"}
+    else:
+        pipeline: List[str] = parsed.pipeline
+        if len(pipeline) == 0:
+            raise Exception("No pipeline specified!")
+        request = {"command": "run", "args": pipeline}
+    return submit(request, socket_file=parsed.socket, url=parsed.url, quiet=parsed.quiet)
+
+
+def sys_main() -> int:
+    """
+    Runs the main function using the system cli arguments, and
+    returns a system error code.
+
+    :return: the exit code of the job, 1 for failure.
+    """
+    try:
+        return main()
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(sys.argv[1:]), file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
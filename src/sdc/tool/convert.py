@@ -1,13 +1,130 @@
+import sys
 import traceback
+from typing import List, Dict
 
+from seppl import Plugin
+from seppl.io import execute
+from wai.logging import init_logging
+
+from sdc.api import CheckpointedExecution
 from sdc.core import ENV_SDC_LOGLEVEL
 from sdc.help import generate_plugin_usage
-from sdc.registry import available_readers, available_filters, available_writers, REGISTRY
-from kasperl.api import perform_conversion
+from sdc.registry import available_readers, available_filters, available_writers, lazy_pipeline_plugins, REGISTRY
+from kasperl.api import perform_conversion, parse_conversion_args, print_conversion_usage, CommandlineParameter
 
 CONVERT = "sdc-convert"
 DESCRIPTION = "Tool for converting between spectral data formats."
 
+FULL_REGISTRY_ARGS = ["-h", "--help", "--help-all", "--help-plugin", "--load_pipeline"]
+""" the arguments that require all plugins to be loaded. """
+
+PARAM_CHECKPOINT = "--checkpoint"
+PARAM_RESUME = "--resume"
+
+CHECKPOINT_PARAMS = [
+    CommandlineParameter(long_opt=PARAM_CHECKPOINT, metavar="FILE", help="The file to periodically store the state of the conversion in (reader position, trained filters, writer); requires streaming mode. Gets removed once the conversion finishes successfully."),
+    CommandlineParameter(long_opt="--checkpoint_interval", metavar="NUM", help="Stores a checkpoint every NUM records; <1 to disable.", type=int, default=1000),
+    CommandlineParameter(long_opt="--checkpoint_seconds", metavar="SEC", help="Stores a checkpoint every SEC seconds; <=0 to disable.", type=float, default=-1),
+    CommandlineParameter(long_opt=PARAM_RESUME, help="Resumes the conversion from the checkpoint file, if present; the writer must support checkpoints or write one file per record.", action="store_true"),
+]
+""" the options for checkpointing. """
+
+
+def _requires_full_registry(args: List[str]) -> bool:
+    """
+    Checks whether the arguments require all plugins to be loaded, e.g., for outputting the help.
+
+    :param args: the command-line arguments
+    :type args: list
+    :return: True if all plugins are required
+    :rtype: bool
+    """
+    for arg in FULL_REGISTRY_ARGS:
+        if arg in args:
+            return True
+    return False
+
+
+def _pipeline_args(args: List[str], readers: Dict[str, Plugin]) -> List[str]:
+    """
+    Returns the arguments of the pipeline plugins, i.e., without the global options preceding the reader.
+
+    :param args: the command-line arguments
+    :type args: list
+    :param readers: the available readers
+    :type readers: dict
+    :return: the plugin arguments
+    :rtype: list
+    """
+    for i, arg in enumerate(args):
+        if arg in readers:
+            return args[i:]
+    return args
+
+
+def perform_checkpointed_conversion(args: List[str], readers: Dict[str, Plugin], filters: Dict[str, Plugin], writers: Dict[str, Plugin]):
+    """
+    Parses the command-line arguments and performs the conversion, storing checkpoints.
+
+    :param args: the command-line arguments
+    :type args: list
+    :param readers: the available readers
+    :type readers: dict
+    :param filters: the available filters
+    :type filters: dict
+    :param writers: the available writers
+    :type writers: dict
+    """
+    init_logging(env_var=ENV_SDC_LOGLEVEL)
+    try:
+        reader, filter_, writer, session = parse_conversion_args(
+            args[:], CONVERT, DESCRIPTION, readers, filters, writers,
+            aliases=REGISTRY.all_aliases, require_reader=True, require_writer=False,
+            generate_plugin_usage=generate_plugin_usage, additional_params=CHECKPOINT_PARAMS)
+        session.logger.info("options: %s" % str(args))
+        execution = CheckpointedExecution(
+            reader, filter_, writer, session, session.options.checkpoint,
+            interval=session.options.checkpoint_interval, interval_seconds=session.options.checkpoint_seconds,
+            resume=session.options.resume, args=_pipeline_args(args, readers))
+        execution.execute()
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(args), file=sys.stderr)
+        sys.exit(1)
+
+
+def perform_lazy_conversion(args: List[str], readers: Dict[str, Plugin], filters: Dict[str, Plugin], writers: Dict[str, Plugin]):
+    """
+    Parses the command-line arguments and performs the conversion, using only the plugins of the pipeline.
+    In case of an error, the usage gets output with all the available plugins.
+
+    :param args: the command-line arguments
+    :type args: list
+    :param readers: the readers of the pipeline
+    :type readers: dict
+    :param filters: the filters of the pipeline
+    :type filters: dict
+    :param writers: the writers of the pipeline
+    :type writers: dict
+    """
+    init_logging(env_var=ENV_SDC_LOGLEVEL)
+    try:
+        reader, filter_, writer, session = parse_conversion_args(
+            args[:], CONVERT, DESCRIPTION, readers, filters, writers,
+            require_reader=True, require_writer=False,
+            generate_plugin_usage=generate_plugin_usage, additional_params=CHECKPOINT_PARAMS)
+        session.logger.info("options: %s" % str(args))
+        execute(reader, filter_, writer, session)
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(args), file=sys.stderr)
+        # the usage lists all the plugins, not just the ones of the pipeline
+        readers, filters, writers = available_readers(), available_filters(), available_writers()
+        print_conversion_usage(
+            CONVERT, DESCRIPTION, readers, filters, writers, aliases=REGISTRY.all_aliases,
+            generate_plugin_usage=generate_plugin_usage, additional_params=CHECKPOINT_PARAMS)
+        sys.exit(1)
+
 
 def main(args=None):
     """
@@ -16,10 +133,30 @@ def main(args=None):
     :param args: the commandline arguments, uses sys.argv if not supplied
     :type args: list
     """
+    _args = sys.argv[1:] if (args is None) else args
+
+    # only load the plugins used in the pipeline?
+    plugins = None
+    if not _requires_full_registry(_args):
+        plugins = lazy_pipeline_plugins(_args)
+    if plugins is None:
+        readers, filters, writers = available_readers(), available_filters(), available_writers()
+    else:
+        readers, filters, writers = plugins
+
+    if (PARAM_CHECKPOINT in _args) and not _requires_full_registry(_args):
+        perform_checkpointed_conversion(_args, readers, filters, writers)
+        return
+
+    if plugins is not None:
+        perform_lazy_conversion(_args, readers, filters, writers)
+        return
+
     perform_conversion(
-        ENV_SDC_LOGLEVEL, args, CONVERT, DESCRIPTION,
-        available_readers(), available_filters(), available_writers(), aliases=REGISTRY.all_aliases,
-        require_reader=True, require_writer=False, generate_plugin_usage=generate_plugin_usage)
+        ENV_SDC_LOGLEVEL, _args, CONVERT, DESCRIPTION,
+        readers, filters, writers, aliases=REGISTRY.all_aliases,
+        require_reader=True, require_writer=False, generate_plugin_usage=generate_plugin_usage,
+        additional_params=CHECKPOINT_PARAMS)
 
 
 def sys_main() -> int:
@@ -0,0 +1,415 @@
+import argparse
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Callable
+
+from wai.logging import add_logging_level, init_logging, set_logging_level
+
+from sdc.core import ENV_SDC_LOGLEVEL
+
+DAEMON = "sdc-daemon"
+
+_logger = logging.getLogger(DAEMON)
+
+DEFAULT_HOST = "127.0.0.1"
+""" the default host to bind the HTTP endpoint to. """
+
+EVENT_QUEUED = "queued"
+EVENT_STARTED = "started"
+EVENT_OUTPUT = "output"
+EVENT_FINISHED = "finished"
+EVENT_STATUS = "status"
+EVENT_ERROR = "error"
+
+COMMAND_RUN = "run"
+COMMAND_STATUS = "status"
+COMMAND_SHUTDOWN = "shutdown"
+COMMANDS = [
+    COMMAND_RUN,
+    COMMAND_STATUS,
+    COMMAND_SHUTDOWN,
+]
+
+OUTPUT_POLL_INTERVAL = 0.05
+""" the interval in seconds for checking the job output for new lines. """
+
+
+def warm_up(pid: int = None) -> int:
+    """
+    Loads the registry and the plugins, so that jobs don't have to.
+
+    :param pid: ignored, used for submitting the warm-up to all workers
+    :return: the process ID
+    :rtype: int
+    """
+    from sdc.registry import available_readers, available_filters, available_writers, available_generators
+    import sdc.tool.convert
+    available_readers()
+    available_filters()
+    available_writers()
+    available_generators()
+    return os.getpid()
+
+
+def run_job(args: List[str], log_file: str) -> int:
+    """
+    Executes the conversion pipeline in the worker process, capturing stdout/stderr in the log file.
+
+    :param args: the command-line arguments for sdc-convert
+    :type args: list
+    :param log_file: the file to write the output to
+    :type log_file: str
+    :return: the exit code
+    :rtype: int
+    """
+    from sdc.tool.convert import main as convert_main
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    with open(log_file, "w") as fp:
+        os.dup2(fp.fileno(), 1)
+        os.dup2(fp.fileno(), 2)
+        try:
+            convert_main(args)
+            result = 0
+        except SystemExit as e:
+            result = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            result = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+    return result
+
+
+class Daemon:
+    """
+    Manages the worker pool with the warm registry and executes the submitted jobs.
+    """
+
+    def __init__(self, workers: int = 1):
+        """
+        Initializes the daemon.
+
+        :param workers: the number of worker processes
+        :type workers: int
+        """
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._running = 0
+        self._queued = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._started = time.time()
+        self._log_dir = None
+        self.server = None
+
+    def start(self):
+        """
+        Warms up the registry and starts the worker processes. Workers get forked from the
+        warm process (where available), so they inherit the loaded modules.
+        """
+        warm_up()
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        pids = set(self._pool.map(warm_up, range(self.workers)))
+        _logger.info("Started %d worker(s): %s" % (self.workers, ", ".join([str(x) for x in sorted(pids)])))
+        self._log_dir = tempfile.mkdtemp(prefix=DAEMON + "-")
+        self._started = time.time()
+
+    def stop(self):
+        """
+        Stops the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._log_dir is not None:
+            shutil.rmtree(self._log_dir, ignore_errors=True)
+            self._log_dir = None
+
+    def status(self) -> Dict:
+        """
+        Returns the status of the daemon.
+
+        :return: the status
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "event": EVENT_STATUS,
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "succeeded": self._succeeded,
+                "failed": self._failed,
+                "uptime": time.time() - self._started,
+            }
+
+    def run(self, args: List[str], emit: Callable[[Dict], None]):
+        """
+        Executes the pipeline in the worker pool and emits the status events and output lines.
+
+        :param args: the command-line arguments for sdc-convert
+        :type args: list
+        :param emit: the method that sends an event to the client
+        """
+        with self._lock:
+            self._next_id += 1
+            job_id = self._next_id
+            self._queued += 1
+        connected = True
+
+        def _send(event: Dict):
+            # the job keeps running if the client disconnects
+            nonlocal connected
+            if connected:
+                try:
+                    emit(event)
+                except (BrokenPipeError, ConnectionResetError):
+                    connected = False
+                    _logger.warning("Client of job %d disconnected" % job_id)
+
+        log_file = os.path.join(self._log_dir, "job-%d.log" % job_id)
+        open(log_file, "w").close()
+        start = time.time()
+        _logger.info("Job %d: %s" % (job_id, str(args)))
+        future = self._pool.submit(run_job, args, log_file)
+        _send({"event": EVENT_QUEUED, "job": job_id})
+
+        started = False
+        partial = ""
+        with open(log_file, "r") as fp:
+            while True:
+                done = future.done()
+                if not started and (done or future.running()):
+                    started = True
+                    with self._lock:
+                        self._queued -= 1
+                        self._running += 1
+                    _send({"event": EVENT_STARTED, "job": job_id, "wait": time.time() - start})
+                line = fp.readline()
+                while len(line) > 0:
+                    # incomplete lines get completed with the next read
+                    if not line.endswith("\n"):
+                        partial += line
+                        break
+                    _send({"event": EVENT_OUTPUT, "job": job_id, "line": partial + line.rstrip("\n")})
+                    partial = ""
+                    line = fp.readline()
+                if done:
+                    break
+                time.sleep(OUTPUT_POLL_INTERVAL)
+        if len(partial) > 0:
+            _send({"event": EVENT_OUTPUT, "job": job_id, "line": partial})
+
+        try:
+            exit_code = future.result()
+        except Exception as e:
+            _send({"event": EVENT_OUTPUT, "job": job_id, "line": str(e)})
+            exit_code = 1
+        os.remove(log_file)
+        with self._lock:
+            self._running -= 1
+            if exit_code == 0:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+        _logger.info("Job %d finished with exit code %d" % (job_id, exit_code))
+        _send({"event": EVENT_FINISHED, "job": job_id, "exit_code": exit_code, "duration": time.time() - start})
+
+    def handle(self, request: Dict, emit: Callable[[Dict], None]):
+        """
+        Handles the request from a client.
+
+        :param request: the request, with "command" (default: run) and, for running jobs, "args"
+        :type request: dict
+        :param emit: the method that sends an event to the client
+        """
+        command = request.get("command", COMMAND_RUN)
+        if command == COMMAND_RUN:
+            args = request.get("args", None)
+            if not isinstance(args, list) or (len(args) == 0):
+                emit({"event": EVENT_ERROR, "message": "No pipeline arguments provided!"})
+                return
+            self.run([str(x) for x in args], emit)
+        elif command == COMMAND_STATUS:
+            emit(self.status())
+        elif command == COMMAND_SHUTDOWN:
+            emit(self.status())
+            if self.server is not None:
+                threading.Thread(target=self.server.shutdown).start()
+        else:
+            emit({"event": EVENT_ERROR, "message": "Unknown command: %s" % command})
+
+
+class _UnixRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads a single JSON request line and streams the events back as JSON lines.
+    """
+
+    def handle(self):
+        def _emit(event: Dict):
+            self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+        except Exception as e:
+            _emit({"event": EVENT_ERROR, "message": "Invalid request: %s" % str(e)})
+            return
+        try:
+            self.server.daemon_.handle(request, _emit)
+        except BrokenPipeError:
+            _logger.warning("Client disconnected")
+
+
+class _HttpRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    GET /status returns the status, POST /jobs (JSON body) runs a job and streams
+    the events back as JSON lines, POST /shutdown stops the daemon.
+    """
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+    def _emit(self, event: Dict):
+        self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/" + COMMAND_STATUS:
+            self._start_stream()
+            self.server.daemon_.handle({"command": COMMAND_STATUS}, self._emit)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path == "/jobs":
+            length = int(self.headers.get("Content-Length", "0"))
+            try:
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+            except Exception as e:
+                self.send_error(400, "Invalid request: %s" % str(e))
+                return
+            request["command"] = COMMAND_RUN
+        elif path == "/" + COMMAND_SHUTDOWN:
+            request = {"command": COMMAND_SHUTDOWN}
+        else:
+            self.send_error(404)
+            return
+        self._start_stream()
+        try:
+            self.server.daemon_.handle(request, self._emit)
+        except BrokenPipeError:
+            _logger.warning("Client disconnected")
+
+    def log_message(self, format, *args):
+        _logger.debug(format % args)
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _ThreadingHttpServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def main(args=None):
+    """
+    The main method for parsing command-line arguments.
+
+    :param args: the commandline arguments, uses sys.argv if not supplied
+    :type args: list
+    """
+    init_logging(env_var=ENV_SDC_LOGLEVEL)
+    parser = argparse.ArgumentParser(
+        description="Long-running daemon that keeps the registry and plugins loaded in a pool of worker processes "
+                    "and executes sdc-convert pipelines submitted via a Unix domain socket or a local HTTP endpoint, "
+                    "streaming the status and output back to the client (see sdc-client).",
+        prog=DAEMON,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-s", "--socket", metavar="FILE", help="The Unix domain socket to listen on.", type=str, default=None, required=False)
+    parser.add_argument("-p", "--port", metavar="PORT", help="The port for the local HTTP endpoint.", type=int, default=None, required=False)
+    parser.add_argument("--host", metavar="HOST", help="The host to bind the HTTP endpoint to.", type=str, default=DEFAULT_HOST, required=False)
+    parser.add_argument("-w", "--workers", metavar="NUM", help="The number of worker processes for executing the pipelines.", type=int, default=1, required=False)
+    add_logging_level(parser)
+    parsed = parser.parse_args(args=args)
+    set_logging_level(_logger, parsed.logging_level)
+
+    if (parsed.socket is None) == (parsed.port is None):
+        raise Exception("Either a socket or a port must be specified!")
+    if parsed.workers < 1:
+        raise Exception("At least one worker is required: %d" % parsed.workers)
+
+    daemon = Daemon(workers=parsed.workers)
+    daemon.start()
+    try:
+        if parsed.socket is not None:
+            if os.path.exists(parsed.socket):
+                os.remove(parsed.socket)
+            server = _ThreadingUnixServer(parsed.socket, _UnixRequestHandler)
+            _logger.info("Listening on: %s" % parsed.socket)
+        else:
+            server = _ThreadingHttpServer((parsed.host, parsed.port), _HttpRequestHandler)
+            _logger.info("Listening on: http://%s:%d" % (parsed.host, parsed.port))
+        server.daemon_ = daemon
+        daemon.server = server
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if parsed.socket is not None:
+                if os.path.exists(parsed.socket):
+                    os.remove(parsed.socket)
+    finally:
+        daemon.stop()
+    _logger.info("Stopped")
+
+
+def sys_main() -> int:
+    """
+    Runs the main function using the system cli arguments, and
+    returns a system error code.
+
+    :return: 0 for success, 1 for failure.
+    """
+    try:
+        main()
+        return 0
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(sys.argv[1:]), file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,236 @@
+import argparse
 import logging
+import multiprocessing
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import threading
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Tuple
 
 from sdc.core import ENV_SDC_LOGLEVEL
 from sdc.registry import available_generators
 from sdc.tool.convert import main as convert_main, CONVERT
-from kasperl.api import perform_pipeline_execution
+from sdc.tool.daemon import run_job, warm_up
+from kasperl.api import perform_pipeline_execution, CommandlineParameter
 
 EXEC = "sdc-exec"
 
 _logger = logging.getLogger(EXEC)
 
+ON_ERROR_FAIL_FAST = "fail-fast"
+ON_ERROR_CONTINUE = "continue"
+ON_ERROR = [
+    ON_ERROR_FAIL_FAST,
+    ON_ERROR_CONTINUE,
+]
+
+
+def _timed_job(args: List[str], log_file: str) -> Tuple[int, float]:
+    """
+    Executes the conversion pipeline in the worker process and measures the time it took.
+
+    :param args: the command-line arguments for sdc-convert
+    :type args: list
+    :param log_file: the file to capture the output in
+    :type log_file: str
+    :return: the tuple of exit code and duration in seconds
+    :rtype: tuple
+    """
+    start = time.time()
+    exit_code = run_job(args, log_file)
+    return exit_code, time.time() - start
+
+
+class ParallelExecution:
+    """
+    Executes the expanded pipelines in a pool of processes rather than one after the other.
+    Hooks into the pipeline execution: the pipelines get submitted instead of executed and
+    the summary gets output once all jobs have finished.
+    """
+
+    def __init__(self):
+        """
+        Initializes the execution.
+        """
+        self.jobs = 1
+        self.log_dir = None
+        self.on_error = ON_ERROR_FAIL_FAST
+        self._pool = None
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._results = []
+        self._temp_dir = None
+        self._stopped = False
+        self._start = None
+
+    def is_parallel(self) -> bool:
+        """
+        Returns whether the pipelines get executed in parallel.
+
+        :return: True if parallel
+        :rtype: bool
+        """
+        return self.jobs != 1
+
+    def pre_exec(self, parsed: argparse.Namespace):
+        """
+        Configures the execution from the parsed options and starts the pool.
+
+        :param parsed: the parsed options
+        :type parsed: argparse.Namespace
+        """
+        self.jobs = parsed.exec_jobs
+        if self.jobs < 1:
+            self.jobs = os.cpu_count()
+        self.log_dir = parsed.exec_log_dir
+        self.on_error = parsed.exec_on_error
+        if not self.is_parallel():
+            return
+        if self.log_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix=EXEC + "-")
+        else:
+            os.makedirs(self.log_dir, exist_ok=True)
+        # load the registry and plugins once, the forked workers inherit them
+        warm_up()
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self._pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=context)
+        self._start = time.time()
+        _logger.info("Executing pipelines using %d processes" % self.jobs)
+
+    def _log_file(self, job: int) -> str:
+        """
+        Returns the log file for the job.
+
+        :param job: the job number
+        :type job: int
+        :return: the log file
+        :rtype: str
+        """
+        return os.path.join(self.log_dir if (self._temp_dir is None) else self._temp_dir, "job-%05d.log" % job)
+
+    def _job_finished(self, job: int, args: List[str], future: Future):
+        """
+        Records the result of the job and outputs its log if no log dir was provided.
+
+        :param job: the job number
+        :type job: int
+        :param args: the arguments of the pipeline
+        :type args: list
+        :param future: the future of the job
+        :type future: Future
+        """
+        if future.cancelled():
+            exit_code, duration = None, 0.0
+        elif future.exception() is not None:
+            exit_code, duration = 1, 0.0
+            _logger.error("Job %d failed to execute: %s" % (job, str(future.exception())))
+        else:
+            exit_code, duration = future.result()
+
+        with self._lock:
+            self._results.append((job, exit_code, duration, args))
+            if (exit_code is not None) and (self._temp_dir is not None):
+                log_file = self._log_file(job)
+                if os.path.exists(log_file):
+                    with open(log_file, "r") as fp:
+                        output = fp.read()
+                    if len(output) > 0:
+                        print("--- job %d ---" % job, file=sys.stderr)
+                        print(output, end="" if output.endswith("\n") else "\n", file=sys.stderr)
+            if (exit_code is not None) and (exit_code != 0):
+                _logger.error("Job %d failed with exit code %d: %s" % (job, exit_code, shlex.join(args)))
+                if self.on_error == ON_ERROR_FAIL_FAST:
+                    self._stopped = True
+
+    def submit(self, args: List[str]):
+        """
+        Submits the expanded pipeline for execution. Executes it directly when not in parallel mode.
+
+        :param args: the pipeline arguments
+        :type args: list
+        """
+        if not self.is_parallel():
+            convert_main(args)
+            return
+        with self._lock:
+            if self._stopped:
+                _logger.warning("Skipping pipeline due to previous failure: %s" % shlex.join(args))
+                return
+            job = len(self._futures) + 1
+        future = self._pool.submit(_timed_job, args, self._log_file(job))
+        self._futures.append(future)
+        future.add_done_callback(lambda f: self._job_finished(job, args, f))
+
+    def _wait(self):
+        """
+        Waits for the jobs to finish, cancelling the pending ones after a failure in fail-fast mode.
+        """
+        while True:
+            with self._lock:
+                stopped = self._stopped
+            # cancelling executes the callbacks, which acquire the lock themselves
+            if stopped:
+                for future in self._futures:
+                    future.cancel()
+            if all([x.done() for x in self._futures]):
+                break
+            time.sleep(0.05)
+        self._pool.shutdown(wait=True)
+
+    def _summary(self) -> Tuple[int, int, int]:
+        """
+        Outputs the timings of the jobs.
+
+        :return: the tuple of number of succeeded, failed and cancelled jobs
+        :rtype: tuple
+        """
+        succeeded = 0
+        failed = 0
+        cancelled = 0
+        total = 0.0
+        print("%6s  %-9s  %10s  %s" % ("job", "status", "duration", "pipeline"))
+        for job, exit_code, duration, args in sorted(self._results, key=lambda x: x[0]):
+            if exit_code is None:
+                status = "cancelled"
+                cancelled += 1
+            elif exit_code == 0:
+                status = "ok"
+                succeeded += 1
+            else:
+                status = "failed"
+                failed += 1
+            total += duration
+            print("%6d  %-9s  %9.3fs  %s" % (job, status, duration, shlex.join(args)))
+        print("jobs: %d, succeeded: %d, failed: %d, cancelled: %d, processes: %d" % (len(self._results), succeeded, failed, cancelled, self.jobs))
+        print("wall time: %.3fs, total job time: %.3fs" % (time.time() - self._start, total))
+        return succeeded, failed, cancelled
+
+    def post_exec(self, parsed: argparse.Namespace):
+        """
+        Waits for all jobs to finish, outputs the summary and cleans up.
+
+        :param parsed: the parsed options
+        :type parsed: argparse.Namespace
+        """
+        if not self.is_parallel():
+            return
+        try:
+            self._wait()
+            succeeded, failed, cancelled = self._summary()
+        finally:
+            if self._temp_dir is not None:
+                shutil.rmtree(self._temp_dir, ignore_errors=True)
+        if failed > 0:
+            raise Exception("%d of %d pipeline(s) failed!" % (failed, len(self._results)))
+
 
 def main(args=None):
     """
@@ -18,8 +239,18 @@ def main(args=None):
     :param args: the commandline arguments, uses sys.argv if not supplied
     :type args: list
     """
+    execution = ParallelExecution()
+    params = [
+        CommandlineParameter(long_opt="--exec_jobs", metavar="NUM", type=int, default=1,
+                             help="The number of processes to execute the expanded pipelines with; <1 uses all CPUs. In parallel mode, a summary with the timings gets output at the end."),
+        CommandlineParameter(long_opt="--exec_log_dir", metavar="DIR", type=str, default=None,
+                             help="The directory to store the output of each job in when executing in parallel (job-NNNNN.log); if not provided, the output of a job gets output once it finishes."),
+        CommandlineParameter(long_opt="--exec_on_error", choices=ON_ERROR, default=ON_ERROR_FAIL_FAST,
+                             help="How to proceed when a pipeline fails in parallel mode: '" + ON_ERROR_FAIL_FAST + "' cancels the pending pipelines, '" + ON_ERROR_CONTINUE + "' executes all of them."),
+    ]
     perform_pipeline_execution(ENV_SDC_LOGLEVEL, args, EXEC, None,
-                               CONVERT, convert_main, available_generators(), _logger)
+                               CONVERT, execution.submit, available_generators(), _logger,
+                               additional_params=params, pre_exec=execution.pre_exec, post_exec=execution.post_exec)
 
 
 def sys_main() -> int:
@@ -0,0 +1,164 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+import traceback
+from typing import List
+
+from wai.logging import add_logging_level, init_logging, set_logging_level
+
+from sdc.api import open_input, open_output, strip_compression_extension, output_compression, COMPRESSION_NONE
+from sdc.core import ENV_SDC_LOGLEVEL
+
+MERGE = "sdc-merge"
+
+_logger = logging.getLogger(MERGE)
+
+FORMAT_AUTO = "auto"
+FORMAT_ARFF = "arff"
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMATS = [
+    FORMAT_AUTO,
+    FORMAT_ARFF,
+    FORMAT_CSV,
+    FORMAT_JSONL,
+]
+""" the formats that support concatenation. """
+
+
+def _determine_format(path: str) -> str:
+    """
+    Determines the format from the file's extension (ignoring any compression extension).
+
+    :param path: the file to determine the format for
+    :type path: str
+    :return: the format
+    :rtype: str
+    """
+    ext = os.path.splitext(strip_compression_extension(path))[1].lower()
+    if ext == ".arff":
+        return FORMAT_ARFF
+    elif ext == ".csv":
+        return FORMAT_CSV
+    elif ext in [".jsonl", ".ndjson"]:
+        return FORMAT_JSONL
+    else:
+        raise Exception("Cannot determine format from extension of: %s" % path)
+
+
+def _read_header(fp, data_format: str) -> List[str]:
+    """
+    Reads the header lines from the file.
+
+    :param fp: the file-like object to read from
+    :param data_format: the format of the file
+    :type data_format: str
+    :return: the header lines
+    :rtype: list
+    """
+    result = []
+    if data_format == FORMAT_ARFF:
+        for line in fp:
+            result.append(line)
+            if line.strip().lower().startswith("@data"):
+                break
+    elif data_format == FORMAT_CSV:
+        line = fp.readline()
+        if len(line) > 0:
+            result.append(line)
+    return result
+
+
+def merge_files(inputs: List[str], output: str, data_format: str = FORMAT_AUTO, logger: logging.Logger = None):
+    """
+    Merges the files (e.g., the outputs of sharded conversions) into a single file.
+    The header of the first file gets used, the headers of the other files must match it.
+
+    :param inputs: the files to merge, in order
+    :type inputs: list
+    :param output: the file to write the merged data to (compression is determined by extension)
+    :type output: str
+    :param data_format: the format of the files, see FORMATS
+    :type data_format: str
+    :param logger: the optional logger to use
+    :type logger: logging.Logger
+    """
+    if len(inputs) == 0:
+        raise Exception("No files to merge!")
+    if (data_format is None) or (data_format == FORMAT_AUTO):
+        data_format = _determine_format(output)
+    if data_format not in FORMATS:
+        raise Exception("Unsupported format: %s" % data_format)
+
+    header = None
+    with open_output(output, output_compression(output, COMPRESSION_NONE), False) as fp_out:
+        for path in inputs:
+            if logger is not None:
+                logger.info("Merging: %s" % path)
+            with open_input(path, False) as fp_in:
+                current = _read_header(fp_in, data_format)
+                if header is None:
+                    header = current
+                    fp_out.writelines(header)
+                elif current != header:
+                    raise Exception("Header of file differs from first file: %s" % path)
+                for line in fp_in:
+                    if (data_format == FORMAT_JSONL) and (len(line.strip()) == 0):
+                        continue
+                    if not line.endswith("\n"):
+                        line += "\n"
+                    fp_out.write(line)
+    if logger is not None:
+        logger.info("Merged %d file(s) into: %s" % (len(inputs), output))
+
+
+def main(args=None):
+    """
+    The main method for parsing command-line arguments.
+
+    :param args: the commandline arguments, uses sys.argv if not supplied
+    :type args: list
+    """
+    init_logging(env_var=ENV_SDC_LOGLEVEL)
+    parser = argparse.ArgumentParser(
+        description="Merges the output files of sharded conversions (or any files of the same format) into a single file. "
+                    "Only supports formats that allow concatenation, i.e., ARFF, CSV and JSON Lines. "
+                    "The headers of the files must be identical.",
+        prog=MERGE,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-i", "--input", metavar="FILE", help="The files to merge, glob syntax is supported; the files of each glob get merged in sorted order.", type=str, required=True, nargs="+")
+    parser.add_argument("-o", "--output", metavar="FILE", help="The file to write the merged data to; gets compressed if the extension denotes a compression (.gz, .bz2, .xz, .zst).", type=str, required=True)
+    parser.add_argument("-f", "--format", choices=FORMATS, help="The format of the files, 'auto' determines it from the output file's extension.", type=str, default=FORMAT_AUTO, required=False)
+    add_logging_level(parser)
+    parsed = parser.parse_args(args=args)
+    set_logging_level(_logger, parsed.logging_level)
+
+    inputs = []
+    for inp in parsed.input:
+        if glob.has_magic(inp):
+            inputs.extend(sorted(glob.glob(inp)))
+        else:
+            inputs.append(inp)
+    merge_files(inputs, parsed.output, data_format=parsed.format, logger=_logger)
+
+
+def sys_main() -> int:
+    """
+    Runs the main function using the system cli arguments, and
+    returns a system error code.
+
+    :return: 0 for success, 1 for failure.
+    """
+    try:
+        main()
+        return 0
+    except Exception:
+        traceback.print_exc()
+        print("options: %s" % str(sys.argv[1:]), file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,51 @@
-from ._adams import AdamsWriter, ReportSampleDataWriter
-from ._arff import ARFFWriter
-from ._asc import ASCWriter
-from ._asciixy import ASCIIXYWriter
-from ._cal import CALWriter
-from ._console import ConsoleWriter
-from ._csv import CSVWriter, CSVSampleDataWriter
-from ._dpt import DPTWriter
-from ._json import JsonSampleDataWriter
-from ._metadata import MetaDataWriter
-from ._multi import MultiWriter
-from ._nir import NIRWriter
-from ._pyfunc import PythonFunctionWriter
-from ._send_email import SendEmail
-from ._text_file import TextFileWriter
-from ._zip import ZipWriter
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    "AdamsWriter": "._adams",
+    "ReportSampleDataWriter": "._adams",
+    "ARFFWriter": "._arff",
+    "ASCWriter": "._asc",
+    "ASCIIXYWriter": "._asciixy",
+    "CALWriter": "._cal",
+    "ConsoleWriter": "._console",
+    "CSVWriter": "._csv",
+    "CSVSampleDataWriter": "._csv",
+    "DPTWriter": "._dpt",
+    "HDF5Writer": "._hdf5",
+    "JsonSampleDataWriter": "._json",
+    "MetaDataWriter": "._metadata",
+    "MultiWriter": "._multi",
+    "NIRWriter": "._nir",
+    "NPZWriter": "._npz",
+    "PythonFunctionWriter": "._pyfunc",
+    "SendEmail": "._send_email",
+    "SQLiteWriter": "._sqlite",
+    "TextFileWriter": "._text_file",
+    "ZipWriter": "._zip",
+}
+""" the attributes of the package and the modules they get imported from on first access, keeping imports cheap. """
+
+
+def __getattr__(name: str):
+    """
+    Imports the module of the attribute on first access.
+
+    :param name: the name of the attribute
+    :type name: str
+    :return: the attribute
+    """
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    """
+    Returns all attributes of the package, including the ones not imported yet.
+
+    :return: the attributes
+    :rtype: list
+    """
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTES.keys()))
@@ -10,12 +10,14 @@ from wai.spectralio.adams import DATATYPE_SUFFIX
 from wai.spectralio.adams import Writer as SWriter
 
 from kasperl.api import SplittableStreamWriter, make_list
-from sdc.api import Spectrum2D, SplittableSampleDataStreamWriter, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SplittableSampleDataStreamWriter, SpectralIOWriter, DefaultExtensionWriter, \
+    add_compression_option, compressed_path, strip_compression_extension, open_output, COMPRESSION_NONE
 
 
 class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_dir: str = None, output_sampledata: bool = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -25,6 +27,8 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
         :type output_dir: str
         :param output_sampledata: whether to output the sample data as well
         :type output_sampledata: bool
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -37,6 +41,7 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
         self.output_sampledata = output_sampledata
         self._writer = None
@@ -79,6 +84,7 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The directory to store the .spec files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=False)
         parser.add_argument("--output_sampledata", action="store_true", help="Outputs the sampledata as well")
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -89,6 +95,7 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
         self.output_sampledata = ns.output_sampledata
 
@@ -106,6 +113,8 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.output_sampledata is None:
             self.output_sampledata = False
         self._writer = self._init_writer()
@@ -151,9 +160,9 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
                 os.makedirs(sub_dir)
 
             path = os.path.join(sub_dir, item.spectrum_name)
-            path = os.path.splitext(path)[0] + self.default_extension
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + self.default_extension, self.compression)
             self.logger().info("Writing spectrum to: %s" % path)
-            self._writer.write([item.spectrum], path)
+            self._write_spectra([item.spectrum], path, self.compression)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
         """
@@ -170,6 +179,7 @@ class AdamsWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter,
 class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_dir: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -177,6 +187,8 @@ class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWrite
 
         :param output_dir: the output directory to save the .spec files in
         :type output_dir: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -189,6 +201,7 @@ class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWrite
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
 
     def name(self) -> str:
@@ -228,6 +241,7 @@ class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWrite
         """
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The directory to store the .report files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=False)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -238,6 +252,7 @@ class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWrite
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
 
     def _to_props(self, sd: Dict[str, Any]) -> Properties:
@@ -285,9 +300,9 @@ class ReportSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWrite
                 os.makedirs(sub_dir)
 
             path = os.path.join(sub_dir, item.sampledata_name)
-            path = os.path.splitext(path)[0] + ".report"
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + ".report", self.compression)
             self.logger().info("Writing sample data to: %s" % path)
-            with open(path, "w") as fp:
+            with open_output(path, self.compression, False) as fp:
                 dump(self._to_props(item.sampledata), fp)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
@@ -7,13 +7,15 @@ from seppl.variables import InputBasedVariableSupporter
 from wai.logging import LOGGING_WARNING
 from wai.spectralio.arff import Writer as SWriter, PLACEHOLDERS, PH_WAVE_NUMBER
 
-from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter, add_compression_option, compressed_path, \
+    COMPRESSION_NONE, shard_path
 
 
 class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_file: str = None, sample_id: str = None, sample_data: List[str] = None,
                  sample_data_prefix: str = None, wave_numbers_format: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -29,6 +31,8 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         :typer sample_data_prefix: str
         :param wave_numbers_format: the format to use for constructing the wave number attribute names
         :type wave_numbers_format: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -41,6 +45,7 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_file = output_file
         self.sample_id = sample_id
         self.sample_data = sample_data
@@ -89,6 +94,7 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         parser.add_argument("--sample_data", type=str, help="The sample data names to store in ARFF file.", required=False, default=[], nargs="*")
         parser.add_argument("--sample_data_prefix", type=str, help="The prefix to use for the sample data attributes.", required=False, default="")
         parser.add_argument("--wave_numbers_format", type=str, help="The format to use for the spectral data columns, the following placeholders are available: " + "|".join(PLACEHOLDERS), default=PH_WAVE_NUMBER)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -99,6 +105,7 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_file = ns.output
         self.sample_id = ns.sample_id
         self.sample_data = ns.sample_data
@@ -119,6 +126,8 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.sample_data is None:
             self.sample_data = []
         self._writer = self._init_writer()
@@ -162,9 +171,9 @@ class ARFFWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Def
         if self.output_file is None:
             raise Exception("No output file specified!")
 
-        output_file = self.session.expand_variables(self.output_file)
+        output_file = compressed_path(shard_path(self.session.expand_variables(self.output_file), self.session), self.compression)
         self.logger().info("Writing spectra to: %s" % output_file)
-        self._writer.write([x.spectrum for x in data], output_file)
+        self._write_spectra([x.spectrum for x in data], output_file, self.compression)
 
     def write_batch_fp(self, data, fp, as_bytes: bool):
         """
@@ -8,13 +8,15 @@ from wai.logging import LOGGING_WARNING
 from wai.spectralio.asc import Writer as SWriter
 
 from kasperl.api import SplittableStreamWriter, make_list
-from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter, add_compression_option, compressed_path, \
+    strip_compression_extension, COMPRESSION_NONE
 
 
 class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_dir: str = None, instrument_name: str = None, accessory_name: str = None,
                  data_points: int = None, first_x_point: float = None, last_x_point: float = None, descending: bool = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -34,6 +36,8 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type last_x_point: float
         :param descending: whether to output the wave numbers in descending order
         :type descending: bool
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -46,6 +50,7 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
         self.instrument_name = instrument_name
         self.accessory_name = accessory_name
@@ -98,6 +103,7 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         parser.add_argument("--first_x_point", type=float, help="The first wave number", required=False, default=3749.3428948242)
         parser.add_argument("--last_x_point", type=float, help="The last wave number", required=False, default=9998.2477195313)
         parser.add_argument("--descending", action="store_true", help="Outputs the wave numbers in descending order")
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -108,6 +114,7 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
         self.instrument_name = ns.instrument_name
         self.accessory_name = ns.accessory_name
@@ -130,6 +137,8 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.instrument_name is None:
             self.instrument_name = "<not implemented>"
         if self.accessory_name is None:
@@ -190,9 +199,9 @@ class ASCWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
                 os.makedirs(sub_dir)
 
             path = os.path.join(sub_dir, item.spectrum_name)
-            path = os.path.splitext(path)[0] + self.default_extension
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + self.default_extension, self.compression)
             self.logger().info("Writing spectrum to: %s" % path)
-            self._writer.write([item.spectrum], path)
+            self._write_spectra([item.spectrum], path, self.compression)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
         """
@@ -8,12 +8,14 @@ from wai.logging import LOGGING_WARNING
 from wai.spectralio.asciixy import Writer as SWriter
 
 from kasperl.api import SplittableStreamWriter, make_list
-from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter, add_compression_option, compressed_path, \
+    strip_compression_extension, COMPRESSION_NONE
 
 
 class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_dir: str = None, separator: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -23,6 +25,8 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
         :type output_dir: str
         :param separator: the separator to use for identifying X and Y columns
         :type separator: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -35,6 +39,7 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
         self.separator = separator
         self._writer = None
@@ -77,6 +82,7 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The directory to store the ASCII XY .txt files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=False)
         parser.add_argument("-s", "--separator", type=str, help="The separator to use for identifying X and Y columns.", required=False, default=";")
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -87,6 +93,7 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
         self.separator = ns.separator
 
@@ -104,6 +111,8 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.separator is None:
             self.separator = ";"
         self._writer = self._init_writer()
@@ -148,9 +157,9 @@ class ASCIIXYWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter
                 os.makedirs(sub_dir)
 
             path = os.path.join(sub_dir, item.spectrum_name)
-            path = os.path.splitext(path)[0] + self.default_extension
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + self.default_extension, self.compression)
             self.logger().info("Writing spectrum to: %s" % path)
-            self._writer.write([item.spectrum], path)
+            self._write_spectra([item.spectrum], path, self.compression)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
         """
@@ -5,6 +5,7 @@ from wai.logging import LOGGING_WARNING
 from wai.spectralio.cal import Writer as SWriter
 
 from ._nir import NIRWriter
+from sdc.api import compressed_path, shard_path
 from kasperl.api import make_list
 
 
@@ -16,7 +17,7 @@ class CALWriter(NIRWriter):
                  sample_id_3: str = None, serial_no: str = None, master: str = None,
                  operator: str = None, segment_widths: List[int] = None, start_points: List[float] = None,
                  increments: List[float] = None, end_points: List[float] = None, EOC: int = None, timestamp: str = None,
-                 constituents: List[str] = None,
+                 constituents: List[str] = None, compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -60,6 +61,8 @@ class CALWriter(NIRWriter):
         :type timestamp: str
         :param constituents: the constituents (names of modeling targets to store in CAL file)
         :type constituents: list of str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -76,7 +79,7 @@ class CALWriter(NIRWriter):
                          sample_id_1=sample_id_1, sample_id_2=sample_id_2, sample_id_3=sample_id_3,
                          serial_no=serial_no, master=master, operator=operator, segment_widths=segment_widths,
                          start_points=start_points, increments=increments, end_points=end_points,
-                         EOC=EOC, timestamp=timestamp,
+                         EOC=EOC, timestamp=timestamp, compression=compression,
                          split_names=split_names, split_ratios=split_ratios, split_group=split_group,
                          logger_name=logger_name, logging_level=logging_level)
         self.constituents = constituents
@@ -171,9 +174,9 @@ class CALWriter(NIRWriter):
         if self.output_file is None:
             raise Exception("No output file specified!")
 
-        output_file = self.session.expand_variables(self.output_file)
+        output_file = compressed_path(shard_path(self.session.expand_variables(self.output_file), self.session), self.compression)
         self.logger().info("Writing spectra to: %s" % output_file)
-        self._writer.write([x.spectrum for x in data], output_file)
+        self._write_spectra([x.spectrum for x in data], output_file, self.compression)
 
     def write_batch_fp(self, data, fp, as_bytes: bool):
         """
@@ -10,13 +10,14 @@ from wai.spectralio.csv import Writer as SWriter, PLACEHOLDERS, PH_WAVE_NUMBER
 
 from kasperl.api import SplittableBatchWriter, make_list
 from sdc.api import Spectrum2D, SplittableSampleDataBatchWriter, SampleData, SAMPLE_ID, \
-    SpectralIOWriter, DefaultExtensionWriter
+    SpectralIOWriter, DefaultExtensionWriter, add_compression_option, compressed_path, open_output, COMPRESSION_NONE, shard_path
 
 
 class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_file: str = None, sample_id: str = None, sample_data: List[str] = None,
                  sample_data_prefix: str = None, wave_numbers_format: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -32,6 +33,8 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :typer sample_data_prefix: str
         :param wave_numbers_format: the format to use for constructing the wave number attribute names
         :type wave_numbers_format: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -44,6 +47,7 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_file = output_file
         self.sample_id = sample_id
         self.sample_data = sample_data
@@ -92,6 +96,7 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         parser.add_argument("--sample_data", type=str, help="The sample data names to store in CSV file.", required=False, default=[], nargs="*")
         parser.add_argument("--sample_data_prefix", type=str, help="The prefix to use for the sample data columns.", required=False, default="")
         parser.add_argument("--wave_numbers_format", type=str, help="The format to use for the spectral data columns, the following placeholders are available: " + "|".join(PLACEHOLDERS), default=PH_WAVE_NUMBER)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -102,6 +107,7 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_file = ns.output
         self.sample_id = ns.sample_id
         self.sample_data = ns.sample_data
@@ -122,6 +128,8 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.sample_data is None:
             self.sample_data = []
         self._writer = self._init_writer()
@@ -165,9 +173,9 @@ class CSVWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         if self.output_file is None:
             raise Exception("No output file specified!")
 
-        output_file = self.session.expand_variables(self.output_file)
+        output_file = compressed_path(shard_path(self.session.expand_variables(self.output_file), self.session), self.compression)
         self.logger().info("Writing spectra to: %s" % output_file)
-        self._writer.write([x.spectrum for x in data], output_file)
+        self._write_spectra([x.spectrum for x in data], output_file, self.compression)
 
     def write_batch_fp(self, data, fp, as_bytes: bool):
         """
@@ -187,6 +195,7 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
 
     def __init__(self, output_file: str = None, sample_id: str = None, sample_data: List[str] = None,
                  sample_data_prefix: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -200,6 +209,8 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         :type sample_data: list of str
         :param sample_data_prefix: the prefix to use for the sample data attributes
         :typer sample_data_prefix: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -212,6 +223,7 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_file = output_file
         self.sample_id = sample_id
         self.sample_data = sample_data
@@ -257,6 +269,7 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         parser.add_argument("--sample_id", type=str, help="The name to use for the sample ID column.", required=False, default="sample_id")
         parser.add_argument("--sample_data", type=str, help="The sample data names to store in CSV file.", required=False, default=[], nargs="*")
         parser.add_argument("--sample_data_prefix", type=str, help="The prefix to use for the sample data columns.", required=False, default="")
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -267,6 +280,7 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_file = ns.output
         self.sample_id = ns.sample_id
         self.sample_data = ns.sample_data
@@ -286,6 +300,8 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.sample_id is None:
             self.sample_id = "sample_id"
         if self.sample_data is None:
@@ -303,10 +319,10 @@ class CSVSampleDataWriter(SplittableSampleDataBatchWriter, DirectBatchWriter, De
         if self.output_file is None:
             raise Exception("No output file specified!")
 
-        output_file = self.session.expand_variables(self.output_file)
+        output_file = compressed_path(shard_path(self.session.expand_variables(self.output_file), self.session), self.compression)
         self.logger().info("Writing sample data to: %s" % output_file)
 
-        with open(output_file, "w") as fp:
+        with open_output(output_file, self.compression, False) as fp:
             self.write_batch_fp(data, fp, False)
 
     def write_batch_fp(self, data, fp, as_bytes: bool):
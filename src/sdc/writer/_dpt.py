@@ -8,12 +8,14 @@ from wai.logging import LOGGING_WARNING
 from wai.spectralio.dpt import Writer as SWriter
 
 from kasperl.api import SplittableStreamWriter, make_list
-from sdc.api import Spectrum2D, add_locale_option, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, add_locale_option, SpectralIOWriter, DefaultExtensionWriter, add_compression_option, \
+    compressed_path, strip_compression_extension, COMPRESSION_NONE
 
 
 class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
 
     def __init__(self, output_dir: str = None, descending: bool = None, locale: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -25,6 +27,8 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type descending: bool
         :param locale: the locale to use for writing the numbers
         :type locale: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -37,6 +41,7 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
         self.descending = descending
         self.locale = locale
@@ -81,6 +86,7 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         parser.add_argument("-o", "--output", type=str, help="The directory to store the .asc files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=False)
         parser.add_argument("--descending", action="store_true", help="Outputs the wave numbers in descending order")
         add_locale_option(parser)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -91,6 +97,7 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
         self.descending = ns.descending
         self.locale = ns.locale
@@ -109,6 +116,8 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.descending is None:
             self.descending = False
         if self.locale is None:
@@ -157,9 +166,9 @@ class DPTWriter(SplittableStreamWriter, SpectralIOWriter, DirectStreamWriter, De
                 os.makedirs(sub_dir)
 
             path = os.path.join(sub_dir, item.spectrum_name)
-            path = os.path.splitext(path)[0] + self.default_extension
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + self.default_extension, self.compression)
             self.logger().info("Writing spectrum to: %s" % path)
-            self._writer.write([item.spectrum], path)
+            self._write_spectra([item.spectrum], path, self.compression)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
         """
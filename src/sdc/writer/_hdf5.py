@@ -0,0 +1,247 @@
+import argparse
+import os
+from typing import List
+
+import numpy as np
+from kasperl.api import StreamWriter, make_list
+from seppl.variables import InputBasedVariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from sdc.api import Spectrum2D, DefaultExtensionWriter, encode_sample_data, DTYPES, DTYPE_FLOAT64, \
+    ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA, shard_path, import_h5py
+
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_LZF = "lzf"
+COMPRESSION_NONE = "none"
+COMPRESSIONS = [
+    COMPRESSION_GZIP,
+    COMPRESSION_LZF,
+    COMPRESSION_NONE,
+]
+
+DEFAULT_CHUNK_SIZE = 1024
+""" the default number of rows per chunk. """
+
+
+class HDF5Writer(StreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
+
+    def __init__(self, output_file: str = None, chunk_size: int = None, compression: str = None,
+                 compression_level: int = None, dtype: str = None, append: bool = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the writer.
+
+        :param output_file: the HDF5 file to save the spectra in
+        :type output_file: str
+        :param chunk_size: the number of spectra per chunk, also the number of spectra buffered before appending them to the file
+        :type chunk_size: int
+        :param compression: the compression to use for the datasets
+        :type compression: str
+        :param compression_level: the compression level to use (gzip only, 0-9)
+        :type compression_level: int
+        :param dtype: the data type to use for amplitudes and wave numbers
+        :type dtype: str
+        :param append: whether to append to an existing file rather than overwriting it
+        :type append: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.output_file = output_file
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.dtype = dtype
+        self.append = append
+        self._file = None
+        self._waves = None
+        self._buffer = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "to-hdf5"
+
+    def description(self) -> str:
+        """
+        Returns a description of the writer.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Saves the spectra in an HDF5 file, with the amplitudes stored as chunked and compressed 2-D dataset. " \
+               "Wave numbers, sample IDs and sample data (JSON) are stored as separate datasets. " \
+               "All spectra must share the same wave numbers."
+
+    @property
+    def default_extension(self) -> str:
+        """
+        Returns the default extension (incl dot) for this file type.
+
+        :return: the default extension
+        :rtype: str
+        """
+        return ".h5"
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-o", "--output", type=str, help="The HDF5 file to store the spectra in. " + variable_list(obj=self), required=False)
+        parser.add_argument("--chunk_size", type=int, help="The number of spectra per chunk; also the number of spectra that get buffered before getting appended to the file.", required=False, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--compression", choices=COMPRESSIONS, help="The compression to use for the datasets.", required=False, default=COMPRESSION_GZIP)
+        parser.add_argument("--compression_level", type=int, help="The compression level to use (gzip only, 0-9).", required=False, default=4)
+        parser.add_argument("--dtype", choices=DTYPES, help="The data type to use for amplitudes and wave numbers.", required=False, default=DTYPE_FLOAT64)
+        parser.add_argument("-a", "--append", action="store_true", help="Whether to append the spectra to an existing file rather than overwriting it.", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.output_file = ns.output
+        self.chunk_size = ns.chunk_size
+        self.compression = ns.compression
+        self.compression_level = ns.compression_level
+        self.dtype = ns.dtype
+        self.append = ns.append
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.chunk_size is None:
+            self.chunk_size = DEFAULT_CHUNK_SIZE
+        if self.chunk_size < 1:
+            raise Exception("Chunk size must be at least 1: %d" % self.chunk_size)
+        if self.compression is None:
+            self.compression = COMPRESSION_GZIP
+        if self.compression not in COMPRESSIONS:
+            raise Exception("Invalid compression: %s" % self.compression)
+        if self.compression_level is None:
+            self.compression_level = 4
+        if self.dtype is None:
+            self.dtype = DTYPE_FLOAT64
+        if self.append is None:
+            self.append = False
+        self._file = None
+        self._waves = None
+        self._buffer = []
+
+    def _dataset_options(self) -> dict:
+        """
+        Returns the compression options for creating datasets.
+
+        :return: the options
+        :rtype: dict
+        """
+        if self.compression == COMPRESSION_GZIP:
+            return {"compression": COMPRESSION_GZIP, "compression_opts": self.compression_level}
+        elif self.compression == COMPRESSION_LZF:
+            return {"compression": COMPRESSION_LZF}
+        else:
+            return dict()
+
+    def _open(self, num_waves: int):
+        """
+        Opens the output file and creates the datasets if necessary.
+
+        :param num_waves: the number of wave numbers
+        :type num_waves: int
+        """
+        h5py = import_h5py()
+        output_file = shard_path(self.session.expand_variables(self.output_file), self.session)
+        if self.append and os.path.exists(output_file):
+            self.logger().info("Appending spectra to: %s" % output_file)
+            self._file = h5py.File(output_file, "a")
+            self._waves = self._file[ARRAY_WAVES][()]
+            return
+
+        self.logger().info("Writing spectra to: %s" % output_file)
+        self._file = h5py.File(output_file, "w")
+        options = self._dataset_options()
+        chunk_size = self.chunk_size
+        self._file.create_dataset(ARRAY_AMPLITUDES, shape=(0, num_waves), maxshape=(None, num_waves),
+                                  chunks=(chunk_size, num_waves), dtype=self.dtype, **options)
+        self._file.create_dataset(ARRAY_IDS, shape=(0,), maxshape=(None,), chunks=(chunk_size,),
+                                  dtype=h5py.string_dtype(), **options)
+        self._file.create_dataset(ARRAY_SAMPLE_DATA, shape=(0,), maxshape=(None,), chunks=(chunk_size,),
+                                  dtype=h5py.string_dtype(), **options)
+
+    def _flush(self):
+        """
+        Appends the buffered spectra to the datasets.
+        """
+        if len(self._buffer) == 0:
+            return
+
+        spectra = self._buffer
+        self._buffer = []
+        if self._file is None:
+            self._open(len(spectra[0].waves))
+        if self._waves is None:
+            self._waves = np.asarray(spectra[0].waves, dtype=self.dtype)
+            self._file.create_dataset(ARRAY_WAVES, data=self._waves)
+
+        for sp in spectra:
+            if (len(sp.waves) != len(self._waves)) or not np.allclose(np.asarray(sp.waves, dtype=self.dtype), self._waves):
+                raise Exception("Spectrum '%s' has different wave numbers than the ones in the file!" % str(sp.id))
+
+        start = self._file[ARRAY_AMPLITUDES].shape[0]
+        end = start + len(spectra)
+        for name in [ARRAY_AMPLITUDES, ARRAY_IDS, ARRAY_SAMPLE_DATA]:
+            self._file[name].resize(end, axis=0)
+        self._file[ARRAY_AMPLITUDES][start:end] = np.array([sp.amplitudes for sp in spectra], dtype=self.dtype)
+        self._file[ARRAY_IDS][start:end] = [("" if sp.id is None else str(sp.id)) for sp in spectra]
+        self._file[ARRAY_SAMPLE_DATA][start:end] = [encode_sample_data(sp.sample_data) for sp in spectra]
+
+    def write_stream(self, data):
+        """
+        Saves the data one by one.
+
+        :param data: the data to write (single record or iterable of records)
+        """
+        if self.output_file is None:
+            raise Exception("No output file specified!")
+
+        for item in make_list(data):
+            self._buffer.append(item.spectrum)
+            if len(self._buffer) >= self.chunk_size:
+                self._flush()
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        try:
+            if self._buffer is not None:
+                self._flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -1,19 +1,28 @@
 import argparse
 import json
 import os
-from typing import List
+from typing import List, Dict, Any, Optional
 
 from seppl.variables import variable_list
 from seppl.io import DirectStreamWriter
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import make_list
-from sdc.api import SplittableSampleDataStreamWriter, DefaultExtensionWriter
+from sdc.api import SplittableSampleDataStreamWriter, DefaultExtensionWriter, add_compression_option, \
+    compressed_path, strip_compression_extension, open_output, output_compression, COMPRESSION_NONE, shard_path, \
+    CheckpointSupporter
 
+EXT_JSONL = ".jsonl"
 
-class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter, DefaultExtensionWriter):
+DEFAULT_JSONL_PREFIX = "sampledata"
+""" the default prefix for the JSON Lines files. """
+
+
+class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter, DefaultExtensionWriter, CheckpointSupporter):
 
     def __init__(self, output_dir: str = None, indent: int = None,
+                 jsonl: bool = None, jsonl_prefix: str = None, lines_per_file: int = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -23,6 +32,14 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         :type output_dir: str
         :param indent: the indentation to use for pretty-printing, None for optimal space
         :type indent: int
+        :param jsonl: whether to write JSON Lines files rather than one file per sample data record
+        :type jsonl: bool
+        :param jsonl_prefix: the prefix for the JSON Lines files
+        :type jsonl_prefix: str
+        :param lines_per_file: the maximum number of records per JSON Lines file before starting a new one, -1 for single file
+        :type lines_per_file: int
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -35,8 +52,13 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_dir = output_dir
         self.indent = indent
+        self.jsonl = jsonl
+        self.jsonl_prefix = jsonl_prefix
+        self.lines_per_file = lines_per_file
+        self._jsonl_files = None
 
     def name(self) -> str:
         """
@@ -54,7 +76,8 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         :return: the description
         :rtype: str
         """
-        return "Saves the sample data in JSON format."
+        return "Saves the sample data in JSON format. Either one file per sample data record or, when using --jsonl, " \
+               "as JSON Lines with one record per line, in a single file or in rolling files."
 
     @property
     def default_extension(self) -> str:
@@ -75,7 +98,11 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         """
         parser = super()._create_argparser()
         parser.add_argument("-o", "--output", type=str, help="The directory to store the .json files in. Any defined splits get added beneath there. " + variable_list(obj=self), required=False)
-        parser.add_argument("--indent", type=int, help="The indent to use for pretty-printing the JSON instead of optimal file size.", default=None, required=False)
+        parser.add_argument("--indent", type=int, help="The indent to use for pretty-printing the JSON instead of optimal file size; ignored when writing JSON Lines.", default=None, required=False)
+        parser.add_argument("--jsonl", action="store_true", help="Whether to write JSON Lines files (one sample data record per line) rather than one file per record.", required=False)
+        parser.add_argument("--jsonl_prefix", type=str, help="The prefix for the JSON Lines files, the extension " + EXT_JSONL + " gets appended (preceded by the file index if rolling files).", default=DEFAULT_JSONL_PREFIX, required=False)
+        parser.add_argument("--lines_per_file", type=int, help="The maximum number of records per JSON Lines file before starting a new file; -1 for a single file.", default=-1, required=False)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -86,8 +113,55 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_dir = ns.output
         self.indent = ns.indent
+        self.jsonl = ns.jsonl
+        self.jsonl_prefix = ns.jsonl_prefix
+        self.lines_per_file = ns.lines_per_file
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
+        if self.jsonl is None:
+            self.jsonl = False
+        if self.jsonl_prefix is None:
+            self.jsonl_prefix = DEFAULT_JSONL_PREFIX
+        if self.lines_per_file is None:
+            self.lines_per_file = -1
+        self._jsonl_files = dict()
+
+    def _write_line(self, sub_dir: str, sampledata: dict):
+        """
+        Appends the sample data record to the JSON Lines file in the specified directory.
+        Starts a new file once the maximum number of lines has been reached.
+
+        :param sub_dir: the directory to write to
+        :type sub_dir: str
+        :param sampledata: the record to write
+        :type sampledata: dict
+        """
+        fp, lines, index, path = self._jsonl_files.get(sub_dir, (None, 0, -1, None))
+        if (fp is not None) and (self.lines_per_file > 0) and (lines >= self.lines_per_file):
+            fp.close()
+            fp = None
+        if fp is None:
+            index += 1
+            lines = 0
+            if self.lines_per_file > 0:
+                path = os.path.join(sub_dir, "%s-%05d%s" % (self.jsonl_prefix, index, EXT_JSONL))
+            else:
+                path = os.path.join(sub_dir, self.jsonl_prefix + EXT_JSONL)
+            path = compressed_path(shard_path(path, self.session), self.compression)
+            self.logger().info("Writing sample data to: %s" % path)
+            fp = open_output(path, self.compression, False)
+        fp.write(json.dumps(sampledata))
+        fp.write("\n")
+        self._jsonl_files[sub_dir] = (fp, lines + 1, index, path)
 
     def write_stream(self, data):
         """
@@ -107,10 +181,14 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
                 self.logger().info("Creating dir: %s" % sub_dir)
                 os.makedirs(sub_dir)
 
+            if self.jsonl:
+                self._write_line(sub_dir, item.sampledata)
+                continue
+
             path = os.path.join(sub_dir, item.sampledata_name)
-            path = os.path.splitext(path)[0] + self.default_extension
+            path = compressed_path(os.path.splitext(strip_compression_extension(path))[0] + self.default_extension, self.compression)
             self.logger().info("Writing sample data to: %s" % path)
-            with open(path, "w") as fp:
+            with open_output(path, self.compression, False) as fp:
                 json.dump(item.sampledata, fp, indent=self.indent)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
@@ -123,9 +201,56 @@ class JsonSampleDataWriter(SplittableSampleDataStreamWriter, DirectStreamWriter,
         :type as_bytes: bool
         """
         data = make_list(data)
+        if self.jsonl:
+            for item in data:
+                line = json.dumps(item.sampledata) + "\n"
+                fp.write(line.encode() if as_bytes else line)
+            return
         if len(data) != 1:
             raise Exception("Can only save single sample data at a time!")
         if as_bytes:
             fp.write(json.dumps(data[0].sampledata, indent=self.indent).encode())
         else:
             json.dump(data[0].sampledata, fp, indent=self.indent)
+
+    def get_checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the current state to store in the checkpoint, i.e., the open JSON Lines files
+        and their sizes. Not required when writing one file per record.
+
+        :return: the state, None if nothing to store
+        :rtype: dict
+        """
+        if not self.jsonl:
+            return None
+        result = dict()
+        for sub_dir, (fp, lines, index, path) in self._jsonl_files.items():
+            if output_compression(path, self.compression) is not None:
+                raise Exception("Checkpoints are not supported for compressed JSON Lines files: %s" % path)
+            fp.flush()
+            result[sub_dir] = {"path": path, "lines": lines, "index": index, "size": os.path.getsize(path)}
+        return result
+
+    def restore_checkpoint_state(self, state: Dict[str, Any]):
+        """
+        Restores the open JSON Lines files, discarding any lines written after the checkpoint.
+
+        :param state: the state to restore
+        :type state: dict
+        """
+        for sub_dir, file_state in state.items():
+            path = file_state["path"]
+            self.logger().info("Resuming sample data file at %d bytes: %s" % (file_state["size"], path))
+            os.truncate(path, file_state["size"])
+            fp = open(path, "a")
+            self._jsonl_files[sub_dir] = (fp, file_state["lines"], file_state["index"], path)
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        if self._jsonl_files is not None:
+            for fp, _, _, _ in self._jsonl_files.values():
+                fp.close()
+            self._jsonl_files = dict()
@@ -1,4 +1,7 @@
 import argparse
+import copy
+import queue
+import threading
 from typing import List
 
 from wai.logging import LOGGING_WARNING
@@ -7,15 +10,25 @@ from seppl import Plugin, AnyData, Initializable
 from seppl.io import DirectStreamWriter, DirectBatchWriter, StreamWriter, BatchWriter
 from kasperl.api import make_list
 
+DEFAULT_QUEUE_SIZE = 100
+""" the default number of items that can be queued per base writer in concurrent mode. """
+
+_END_OF_DATA = object()
+""" the marker that tells a worker that no more data is coming. """
+
 
 class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
 
-    def __init__(self, writers: List[str] = None,
+    def __init__(self, writers: List[str] = None, concurrent: bool = None, queue_size: int = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the writer.
 
         :param writers: the base writers to use (command-line)
+        :param concurrent: whether to run the base writers concurrently, each in its own thread
+        :type concurrent: bool
+        :param queue_size: the maximum number of items to queue per base writer in concurrent mode
+        :type queue_size: int
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -23,7 +36,13 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
         """
         super().__init__(logger_name=logger_name, logging_level=logging_level)
         self.writers = writers
+        self.concurrent = concurrent
+        self.queue_size = queue_size
         self._writers = None
+        self._queues = None
+        self._threads = None
+        self._error = None
+        self._error_lock = None
 
     def name(self) -> str:
         """
@@ -52,6 +71,8 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
         """
         parser = super()._create_argparser()
         parser.add_argument("-w", "--writer", type=str, default=None, help="The command-line defining the base writer.", required=True, nargs="+")
+        parser.add_argument("-c", "--concurrent", action="store_true", help="Whether to run the base writers concurrently, each in its own thread with its own queue; only applies to stream writing, not direct writing.")
+        parser.add_argument("-q", "--queue_size", type=int, default=DEFAULT_QUEUE_SIZE, help="The maximum number of items to queue per base writer in concurrent mode; writing blocks when a queue is full.", required=False)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -63,6 +84,8 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
         """
         super()._apply_args(ns)
         self.writers = ns.writer
+        self.concurrent = ns.concurrent
+        self.queue_size = ns.queue_size
 
     def accepts(self) -> List:
         """
@@ -76,7 +99,7 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
         else:
             result = []
             for writer in self._writers:
-                for c in writer.generates():
+                for c in writer.accepts():
                     if c not in result:
                         result.append(c)
             return result
@@ -117,6 +140,92 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
             writer.initialize()
             writer.session = self.session
         self.logger().info("# writers: %d" % len(self._writers))
+        if self.concurrent is None:
+            self.concurrent = False
+        if self.queue_size is None:
+            self.queue_size = DEFAULT_QUEUE_SIZE
+        self._queues = None
+        self._threads = None
+        self._error = None
+        self._error_lock = threading.Lock()
+
+    def _write(self, writer, data):
+        """
+        Forwards the data to the base writer.
+
+        :param writer: the base writer to use
+        :param data: the data to write (single record or iterable of records)
+        """
+        if isinstance(writer, StreamWriter):
+            writer.write_stream(data)
+        elif isinstance(writer, BatchWriter):
+            writer.write_batch(make_list(data))
+        else:
+            raise Exception("Unknown type of writer: %s" % str(type(writer)))
+
+    def _work(self, writer, q: queue.Queue):
+        """
+        Forwards the queued data (tuples of input and data) to the base writer till the end of the data is reached.
+        After an error of any of the base writers, the remaining data gets discarded in order to not block the producer.
+
+        :param writer: the base writer to use
+        :param q: the queue to obtain the data from
+        :type q: queue.Queue
+        """
+        failed = False
+        while True:
+            data = q.get()
+            if data is _END_OF_DATA:
+                break
+            if failed or (self._error is not None):
+                continue
+            try:
+                writer.session.current_input, data = data
+                self._write(writer, data)
+            except Exception as e:
+                failed = True
+                self.logger().exception("Base writer '%s' failed!" % writer.name())
+                with self._error_lock:
+                    if self._error is None:
+                        self._error = e
+
+    def _start_workers(self):
+        """
+        Starts a worker thread with its own queue for each base writer.
+        Each base writer gets its own copy of the session, as the current input changes while they are writing.
+        """
+        self._queues = []
+        self._threads = []
+        for writer in self._writers:
+            writer.session = copy.copy(self.session)
+            q = queue.Queue(maxsize=max(1, self.queue_size))
+            t = threading.Thread(target=self._work, args=(writer, q), name="%s-%s" % (self.name(), writer.name()), daemon=True)
+            self._queues.append(q)
+            self._threads.append(t)
+            t.start()
+
+    def _stop_workers(self):
+        """
+        Signals the end of the data to all the worker threads and waits for them to finish.
+        """
+        if self._threads is None:
+            return
+        for q in self._queues:
+            q.put(_END_OF_DATA)
+        for t in self._threads:
+            t.join()
+        self._queues = None
+        self._threads = None
+
+    def _check_error(self):
+        """
+        Raises the first error that any of the base writers encountered in concurrent mode.
+        The error is sticky, i.e., all subsequent writes fail as well.
+        """
+        with self._error_lock:
+            error = self._error
+        if error is not None:
+            raise error
 
     def write_stream(self, data):
         """
@@ -124,13 +233,17 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
 
         :param data: the data to write (single record or iterable of records)
         """
-        for writer in self._writers:
-            if isinstance(writer, StreamWriter):
-                writer.write_stream(data)
-            elif isinstance(writer, BatchWriter):
-                writer.write_batch(make_list(data))
-            else:
-                raise Exception("Unknown type of writer: %s" % str(type(writer)))
+        if not self.concurrent:
+            for writer in self._writers:
+                self._write(writer, data)
+            return
+
+        # the items are not modified by the writers, hence they can be shared
+        self._check_error()
+        if self._threads is None:
+            self._start_workers()
+        for q in self._queues:
+            q.put((self.session.current_input, data))
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
         """
@@ -154,6 +267,9 @@ class MultiWriter(StreamWriter, DirectStreamWriter, Initializable):
         Finishes the processing, e.g., for closing files or databases.
         """
         super().finalize()
+        self._stop_workers()
         if self._writers is not None:
             for writer in self._writers:
                 writer.finalize()
+        if self._error_lock is not None:
+            self._check_error()
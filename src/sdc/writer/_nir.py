@@ -7,7 +7,8 @@ from wai.logging import LOGGING_WARNING
 from wai.spectralio.nir import Writer as SWriter
 
 from kasperl.api import SplittableBatchWriter, make_list
-from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SpectralIOWriter, DefaultExtensionWriter, add_compression_option, compressed_path, \
+    COMPRESSION_NONE, shard_path
 
 
 class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
@@ -18,6 +19,7 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
                  sample_id_3: str = None, serial_no: str = None, master: str = None,
                  operator: str = None, segment_widths: List[int] = None, start_points: List[float] = None,
                  increments: List[float] = None, end_points: List[float] = None, EOC: int = None, timestamp: str = None,
+                 compression: str = None,
                  split_names: List[str] = None, split_ratios: List[int] = None, split_group: str = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
@@ -59,6 +61,8 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :type EOC: int
         :param timestamp: the timestamp to use in the file
         :type timestamp: str
+        :param compression: the compression to apply to the output files, None/'none' to determine from the extension
+        :type compression: str
         :param split_names: the names of the splits, no splitting if None
         :type split_names: list
         :param split_ratios: the integer ratios of the splits (must sum up to 100)
@@ -71,6 +75,7 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :type logging_level: str
         """
         super().__init__(split_names=split_names, split_ratios=split_ratios, split_group=split_group, logger_name=logger_name, logging_level=logging_level)
+        self.compression = compression
         self.output_file = output_file
         self.instrument_name = instrument_name
         self.product_code = product_code
@@ -145,6 +150,7 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         parser.add_argument("--end_points", type=float, help="The end points of segments", required=False, default=[1098.0], nargs="+")
         parser.add_argument("--EOC", type=int, help="The number of EOCs per rev", required=False, default=0)
         parser.add_argument("--timestamp", type=str, help="The timestamp to use in the file", required=False, default=None)
+        add_compression_option(parser)
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -155,6 +161,7 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         :type ns: argparse.Namespace
         """
         super()._apply_args(ns)
+        self.compression = ns.compression
         self.output_file = ns.output
         self.instrument_name = ns.instrument_name
         self.product_code = ns.product_code
@@ -188,6 +195,8 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         Initializes the processing, e.g., for opening files or databases.
         """
         super().initialize()
+        if self.compression is None:
+            self.compression = COMPRESSION_NONE
         if self.instrument_name is None:
             self.instrument_name = "<not implemented>"
         if self.product_code is None:
@@ -278,9 +287,9 @@ class NIRWriter(SplittableBatchWriter, SpectralIOWriter, DirectBatchWriter, Defa
         if self.output_file is None:
             raise Exception("No output file specified!")
 
-        output_file = self.session.expand_variables(self.output_file)
+        output_file = compressed_path(shard_path(self.session.expand_variables(self.output_file), self.session), self.compression)
         self.logger().info("Writing spectra to: %s" % output_file)
-        self._writer.write([x.spectrum for x in data], output_file)
+        self._write_spectra([x.spectrum for x in data], output_file, self.compression)
 
     def write_batch_fp(self, data, fp, as_bytes: bool):
         """
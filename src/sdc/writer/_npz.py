@@ -0,0 +1,168 @@
+import argparse
+import os
+from typing import List
+
+import numpy as np
+from kasperl.api import BatchWriter, make_list
+from seppl.io import DirectBatchWriter
+from seppl.variables import InputBasedVariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from sdc.api import Spectrum2D, DefaultExtensionWriter, spectra_to_arrays, DTYPES, DTYPE_FLOAT64, \
+    ARRAY_AMPLITUDES, ARRAY_WAVES, ARRAY_IDS, ARRAY_SAMPLE_DATA, shard_path
+
+
+class NPZWriter(BatchWriter, DirectBatchWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
+
+    def __init__(self, output_file: str = None, dtype: str = None, compressed: bool = None,
+                 logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the writer.
+
+        :param output_file: the .npz file or directory to save the arrays in
+        :type output_file: str
+        :param dtype: the data type to use for amplitudes and wave numbers
+        :type dtype: str
+        :param compressed: whether to compress the .npz file (cannot be memory-mapped)
+        :type compressed: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.output_file = output_file
+        self.dtype = dtype
+        self.compressed = compressed
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "to-npz"
+
+    def description(self) -> str:
+        """
+        Returns a description of the writer.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Saves the spectra as binary dataset: amplitude matrix, wave numbers, sample IDs and sample data. " \
+               "Either stored as .npz file or, if the output does not end in .npz, as directory of .npy files. " \
+               "Uncompressed files and directories can be memory-mapped when reading them."
+
+    @property
+    def default_extension(self) -> str:
+        """
+        Returns the default extension (incl dot) for this file type.
+
+        :return: the default extension
+        :rtype: str
+        """
+        return ".npz"
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-o", "--output", type=str, help="The .npz file or the directory for the .npy files to store the spectra in. " + variable_list(obj=self), required=False)
+        parser.add_argument("--dtype", choices=DTYPES, help="The data type to use for amplitudes and wave numbers.", required=False, default=DTYPE_FLOAT64)
+        parser.add_argument("-c", "--compressed", action="store_true", help="Whether to compress the .npz file; compressed files cannot be memory-mapped.", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.output_file = ns.output
+        self.dtype = ns.dtype
+        self.compressed = ns.compressed
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.dtype is None:
+            self.dtype = DTYPE_FLOAT64
+        if self.compressed is None:
+            self.compressed = False
+
+    def _to_arrays(self, data) -> dict:
+        """
+        Turns the spectra into the named arrays to store.
+
+        :param data: the spectra to convert
+        :return: the arrays
+        :rtype: dict
+        """
+        amplitudes, waves, ids, sample_data = spectra_to_arrays([x.spectrum for x in make_list(data)], dtype=self.dtype)
+        return {
+            ARRAY_AMPLITUDES: amplitudes,
+            ARRAY_WAVES: waves,
+            ARRAY_IDS: ids,
+            ARRAY_SAMPLE_DATA: sample_data,
+        }
+
+    def write_batch(self, data):
+        """
+        Saves the data in one go.
+
+        :param data: the data to write
+        :type data: Iterable
+        """
+        if self.output_file is None:
+            raise Exception("No output file specified!")
+
+        output_file = shard_path(self.session.expand_variables(self.output_file), self.session)
+        if output_file.lower().endswith(self.default_extension):
+            self.logger().info("Writing spectra to: %s" % output_file)
+            with open(output_file, "wb") as fp:
+                self.write_batch_fp(data, fp, True)
+        else:
+            if not os.path.exists(output_file):
+                self.logger().info("Creating dir: %s" % output_file)
+                os.makedirs(output_file)
+            self.logger().info("Writing spectra to: %s" % output_file)
+            arrays = self._to_arrays(data)
+            for name in arrays:
+                np.save(os.path.join(output_file, name + ".npy"), arrays[name], allow_pickle=False)
+
+    def write_batch_fp(self, data, fp, as_bytes: bool):
+        """
+        Saves the data in one go.
+
+        :param data: the data to write
+        :type data: Iterable
+        :param fp: the file-like object to write to
+        :param as_bytes: whether to write as str or bytes
+        :type as_bytes: bool
+        """
+        if not as_bytes:
+            raise Exception("Can only write .npz files in binary mode!")
+        arrays = self._to_arrays(data)
+        if self.compressed:
+            np.savez_compressed(fp, **arrays)
+        else:
+            np.savez(fp, **arrays)
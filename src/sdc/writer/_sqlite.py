@@ -0,0 +1,283 @@
+import argparse
+import os
+import sqlite3
+from typing import List, Any
+
+import numpy as np
+from kasperl.api import StreamWriter, make_list
+from seppl.variables import InputBasedVariableSupporter, variable_list
+from wai.logging import LOGGING_WARNING
+
+from sdc.api import Spectrum2D, DefaultExtensionWriter, DTYPES, DTYPE_FLOAT64, quote_identifier, DEFAULT_TABLE, \
+    WAVES_TABLE_SUFFIX, COLUMN_ID, COLUMN_SAMPLE_ID, COLUMN_WAVES_ID, COLUMN_AMPLITUDES, COLUMN_DTYPE, COLUMN_WAVES, COLUMNS, shard_path
+
+DEFAULT_BATCH_SIZE = 10000
+""" the default number of spectra to insert per transaction. """
+
+
+def _to_sqlite_value(value: Any) -> Any:
+    """
+    Turns the sample data value into a type that SQLite supports.
+
+    :param value: the value to convert
+    :return: the converted value
+    """
+    if (value is None) or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class SQLiteWriter(StreamWriter, DefaultExtensionWriter, InputBasedVariableSupporter):
+
+    def __init__(self, output_file: str = None, table: str = None, batch_size: int = None, dtype: str = None,
+                 append: bool = None, logger_name: str = None, logging_level: str = LOGGING_WARNING):
+        """
+        Initializes the writer.
+
+        :param output_file: the SQLite database to save the spectra in
+        :type output_file: str
+        :param table: the name of the table to store the spectra in
+        :type table: str
+        :param batch_size: the number of spectra to insert per transaction
+        :type batch_size: int
+        :param dtype: the data type to use for the amplitudes
+        :type dtype: str
+        :param append: whether to append to an existing database rather than overwriting it
+        :type append: bool
+        :param logger_name: the name to use for the logger
+        :type logger_name: str
+        :param logging_level: the logging level to use
+        :type logging_level: str
+        """
+        super().__init__(logger_name=logger_name, logging_level=logging_level)
+        self.output_file = output_file
+        self.table = table
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.append = append
+        self._conn = None
+        self._columns = None
+        self._waves = None
+        self._buffer = None
+
+    def name(self) -> str:
+        """
+        Returns the name of the handler, used as sub-command.
+
+        :return: the name
+        :rtype: str
+        """
+        return "to-sqlite"
+
+    def description(self) -> str:
+        """
+        Returns a description of the writer.
+
+        :return: the description
+        :rtype: str
+        """
+        return "Saves the spectra in a SQLite database, with the amplitudes stored as binary blobs and the sample data " \
+               "in indexed columns (one per sample data field). Spectra get inserted in batches, one transaction per batch."
+
+    @property
+    def default_extension(self) -> str:
+        """
+        Returns the default extension (incl dot) for this file type.
+
+        :return: the default extension
+        :rtype: str
+        """
+        return ".db"
+
+    def _create_argparser(self) -> argparse.ArgumentParser:
+        """
+        Creates an argument parser. Derived classes need to fill in the options.
+
+        :return: the parser
+        :rtype: argparse.ArgumentParser
+        """
+        parser = super()._create_argparser()
+        parser.add_argument("-o", "--output", type=str, help="The SQLite database to store the spectra in. " + variable_list(obj=self), required=False)
+        parser.add_argument("-t", "--table", type=str, help="The name of the table to store the spectra in.", required=False, default=DEFAULT_TABLE)
+        parser.add_argument("-b", "--batch_size", type=int, help="The number of spectra to insert per transaction.", required=False, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dtype", choices=DTYPES, help="The data type to use for the amplitudes.", required=False, default=DTYPE_FLOAT64)
+        parser.add_argument("-a", "--append", action="store_true", help="Whether to append the spectra to an existing database rather than overwriting it.", required=False)
+        return parser
+
+    def _apply_args(self, ns: argparse.Namespace):
+        """
+        Initializes the object with the arguments of the parsed namespace.
+
+        :param ns: the parsed arguments
+        :type ns: argparse.Namespace
+        """
+        super()._apply_args(ns)
+        self.output_file = ns.output
+        self.table = ns.table
+        self.batch_size = ns.batch_size
+        self.dtype = ns.dtype
+        self.append = ns.append
+
+    def accepts(self) -> List:
+        """
+        Returns the list of classes that are accepted.
+
+        :return: the list of classes
+        :rtype: list
+        """
+        return [Spectrum2D]
+
+    def initialize(self):
+        """
+        Initializes the processing, e.g., for opening files or databases.
+        """
+        super().initialize()
+        if self.table is None:
+            self.table = DEFAULT_TABLE
+        if self.batch_size is None:
+            self.batch_size = DEFAULT_BATCH_SIZE
+        if self.batch_size < 1:
+            raise Exception("Batch size must be at least 1: %d" % self.batch_size)
+        if self.dtype is None:
+            self.dtype = DTYPE_FLOAT64
+        if self.append is None:
+            self.append = False
+        self._conn = None
+        self._columns = None
+        self._waves = None
+        self._buffer = []
+
+    def _open(self):
+        """
+        Opens the database and creates the tables if necessary.
+        """
+        output_file = shard_path(self.session.expand_variables(self.output_file), self.session)
+        if (not self.append) and os.path.exists(output_file):
+            os.remove(output_file)
+        self.logger().info("Writing spectra to: %s" % output_file)
+        self._conn = sqlite3.connect(output_file)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        table = quote_identifier(self.table)
+        waves_table = quote_identifier(self.table + WAVES_TABLE_SUFFIX)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS %s (%s INTEGER PRIMARY KEY, %s BLOB UNIQUE)"
+                               % (waves_table, quote_identifier(COLUMN_ID), quote_identifier(COLUMN_WAVES)))
+            self._conn.execute("CREATE TABLE IF NOT EXISTS %s (%s INTEGER PRIMARY KEY, %s TEXT, %s INTEGER, %s BLOB, %s TEXT)"
+                               % (table, quote_identifier(COLUMN_ID), quote_identifier(COLUMN_SAMPLE_ID),
+                                  quote_identifier(COLUMN_WAVES_ID), quote_identifier(COLUMN_AMPLITUDES),
+                                  quote_identifier(COLUMN_DTYPE)))
+        self._columns = [row[1] for row in self._conn.execute("PRAGMA table_info(%s)" % table)]
+        self._waves = dict()
+        for row in self._conn.execute("SELECT %s, %s FROM %s" % (quote_identifier(COLUMN_ID), quote_identifier(COLUMN_WAVES), waves_table)):
+            self._waves[bytes(row[1])] = row[0]
+
+    def _waves_id(self, waves: bytes) -> int:
+        """
+        Returns the database ID for the wave numbers, adds them if necessary.
+
+        :param waves: the wave numbers (float64 bytes)
+        :type waves: bytes
+        :return: the ID
+        :rtype: int
+        """
+        if waves not in self._waves:
+            cursor = self._conn.execute("INSERT INTO %s (%s) VALUES (?)"
+                                        % (quote_identifier(self.table + WAVES_TABLE_SUFFIX), quote_identifier(COLUMN_WAVES)),
+                                        (waves,))
+            self._waves[waves] = cursor.lastrowid
+        return self._waves[waves]
+
+    def _check_column(self, key: str):
+        """
+        Ensures that the sample data field can be stored in a column of its own. As SQLite
+        column names are case-insensitive, the field must not clash with the fixed columns
+        or with other sample data fields that only differ in case.
+
+        :param key: the name of the sample data field
+        :type key: str
+        """
+        for column in self._columns:
+            if column.lower() != key.lower():
+                continue
+            if column in COLUMNS:
+                raise Exception("Sample data field '%s' clashes with reserved column '%s', please rename the field!" % (key, column))
+            raise Exception("Sample data field '%s' clashes with column '%s' (SQLite column names are case-insensitive), please rename the field!" % (key, column))
+
+    def _flush(self):
+        """
+        Inserts the buffered spectra in a single transaction.
+        """
+        if len(self._buffer) == 0:
+            return
+
+        spectra = self._buffer
+        self._buffer = []
+        if self._conn is None:
+            self._open()
+
+        table = quote_identifier(self.table)
+        with self._conn:
+            # add columns for new sample data fields
+            for sp in spectra:
+                for key in sp.sample_data:
+                    if key not in self._columns:
+                        self._check_column(key)
+                        self._conn.execute("ALTER TABLE %s ADD COLUMN %s" % (table, quote_identifier(key)))
+                        self._columns.append(key)
+                    elif key in COLUMNS:
+                        self._check_column(key)
+
+            sample_data_columns = [x for x in self._columns if x not in COLUMNS]
+            columns = [COLUMN_SAMPLE_ID, COLUMN_WAVES_ID, COLUMN_AMPLITUDES, COLUMN_DTYPE] + sample_data_columns
+            sql = "INSERT INTO %s (%s) VALUES (%s)" % (table, ", ".join([quote_identifier(x) for x in columns]), ", ".join(["?"] * len(columns)))
+            rows = []
+            for sp in spectra:
+                row = [
+                    None if sp.id is None else str(sp.id),
+                    self._waves_id(np.asarray(sp.waves, dtype=np.float64).tobytes()),
+                    np.asarray(sp.amplitudes, dtype=self.dtype).tobytes(),
+                    self.dtype,
+                ]
+                sample_data = sp.sample_data if (sp.sample_data is not None) else dict()
+                row.extend([_to_sqlite_value(sample_data.get(x)) for x in sample_data_columns])
+                rows.append(row)
+            self._conn.executemany(sql, rows)
+
+    def write_stream(self, data):
+        """
+        Saves the data one by one.
+
+        :param data: the data to write (single record or iterable of records)
+        """
+        if self.output_file is None:
+            raise Exception("No output file specified!")
+
+        for item in make_list(data):
+            self._buffer.append(item.spectrum)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def _create_indices(self):
+        """
+        Creates the indices for the sample ID and sample data columns, if not yet present.
+        """
+        with self._conn:
+            for column in [COLUMN_SAMPLE_ID] + [x for x in self._columns if x not in COLUMNS]:
+                index = quote_identifier("idx_" + self.table + "_" + column)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS %s ON %s (%s)" % (index, quote_identifier(self.table), quote_identifier(column)))
+
+    def finalize(self):
+        """
+        Finishes the processing, e.g., for closing files or databases.
+        """
+        super().finalize()
+        try:
+            if self._buffer is not None:
+                self._flush()
+            if self._conn is not None:
+                self._create_indices()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,8 +1,13 @@
 import argparse
+import io
 import os
+import threading
+import time
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 from typing import List
 
 from seppl import Initializable, init_initializable
@@ -11,7 +16,7 @@ from seppl.variables import VariableSupporter, variable_list
 from wai.logging import LOGGING_WARNING
 
 from kasperl.api import StreamWriter, parse_writer, make_list
-from sdc.api import Spectrum2D, SampleData, DefaultExtensionWriter
+from sdc.api import Spectrum2D, SampleData, DefaultExtensionWriter, shard_path
 
 COMPRESSION_STORED = "stored"
 COMPRESSION_DEFLATED = "deflated"
@@ -37,6 +42,7 @@ DEFAULT_TEXT_EXT = ".txt"
 class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, VariableSupporter):
 
     def __init__(self, output_file: str = None, compression: str = None, writer: str = None, extension: str = None,
+                 num_workers: int = None, streaming: bool = None, force_zip64: bool = None,
                  logger_name: str = None, logging_level: str = LOGGING_WARNING):
         """
         Initializes the writer.
@@ -49,6 +55,12 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         :type writer: str
         :param extension: the file extension to use for the spectra/sample data in the zip file (incl dot)
         :type extension: str
+        :param num_workers: the number of worker threads for serializing members in parallel, <2 for sequential
+        :type num_workers: int
+        :param streaming: whether to write the members straight into the zip file rather than buffering them in memory
+        :type streaming: bool
+        :param force_zip64: whether to always use ZIP64 extensions for streamed members (required for members >4GB)
+        :type force_zip64: bool
         :param logger_name: the name to use for the logger
         :type logger_name: str
         :param logging_level: the logging level to use
@@ -59,9 +71,18 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         self.compression = compression
         self.writer = writer
         self.extension = extension
+        self.num_workers = num_workers
+        self.streaming = streaming
+        self.force_zip64 = force_zip64
         self._fp = None
         self._zipfile = None
         self._writer = None
+        self._executor = None
+        self._committer = None
+        self._pending = None
+        self._worker_writers = None
+        self._worker_local = None
+        self._worker_lock = None
 
     def name(self) -> str:
         """
@@ -115,6 +136,9 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         parser.add_argument("-c", "--compression", choices=COMPRESSION, help="The compression to use.", default=COMPRESSION_STORED, required=False)
         parser.add_argument("-w", "--writer", type=str, help="The direct writer to use for writing the data in the zip file.", required=True)
         parser.add_argument("-e", "--extension", type=str, help="The extension to use for the files in the zip file, overrides any default extension that the direct writer may provide.", required=False)
+        parser.add_argument("-n", "--num_workers", type=int, help="The number of worker threads to use for serializing the members in parallel, with another thread compressing and adding them in order; <2 for sequential processing.", required=False, default=1)
+        parser.add_argument("--streaming", action="store_true", help="Whether to write the members straight into the zip file rather than buffering them in memory first; cannot be used in conjunction with multiple workers.")
+        parser.add_argument("--force_zip64", action="store_true", help="Whether to always use ZIP64 extensions for streamed members, required for members larger than 4GB. NB: ZIP64 extensions for archives with more than 65535 members get used automatically.")
         return parser
 
     def _apply_args(self, ns: argparse.Namespace):
@@ -129,23 +153,49 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         self.compression = ns.compression
         self.writer = ns.writer
         self.extension = ns.extension
+        self.num_workers = ns.num_workers
+        self.streaming = ns.streaming
+        self.force_zip64 = ns.force_zip64
+
+    def _create_base_writer(self):
+        """
+        Parses and initializes the base writer.
+
+        :return: the base writer
+        """
+        from sdc.registry import available_writers
+        result = parse_writer(self.writer, available_writers())
+        if not isinstance(result, DirectWriter):
+            raise Exception("Base writer is not a direct writer: %s" % str(type(result)))
+        result.session = self.session
+        if isinstance(result, Initializable) and not init_initializable(result, "writer"):
+            self.logger().error("Failed to initialize writer: %s" % self.writer)
+        return result
 
     def initialize(self):
         """
         Initializes the processing, e.g., for opening files or databases.
         """
-        from sdc.registry import available_writers
         super().initialize()
-        self._writer = parse_writer(self.writer, available_writers())
-        if not isinstance(self._writer, DirectWriter):
-            raise Exception("Base writer is not a direct writer: %s" % str(type(self._writer)))
-        self._writer.session = self.session
-        if isinstance(self._writer, Initializable) and not init_initializable(self._writer, "writer"):
-            self.logger().error("Failed to initialize writer: %s" % self.writer)
+        self._writer = self._create_base_writer()
         if self.compression is None:
             self.compression = COMPRESSION_STORED
+        if self.num_workers is None:
+            self.num_workers = 1
+        if self.streaming is None:
+            self.streaming = False
+        if self.force_zip64 is None:
+            self.force_zip64 = False
+        if self.streaming and (self.num_workers > 1):
+            raise Exception("Streaming mode cannot be used with multiple workers!")
         self._fp = None
         self._zipfile = None
+        self._executor = None
+        self._committer = None
+        self._pending = deque()
+        self._worker_writers = []
+        self._worker_local = threading.local()
+        self._worker_lock = threading.Lock()
 
     def _init_zipfile(self, fp):
         """
@@ -154,7 +204,112 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         :param fp: the file-like object to initialize with
         """
         if self._zipfile is None:
-            self._zipfile = ZipFile(fp, mode='w', compression=COMPRESSION_TYPE[self.compression])
+            self._zipfile = ZipFile(fp, mode='w', compression=COMPRESSION_TYPE[self.compression], allowZip64=True)
+
+    def _worker_writer(self):
+        """
+        Returns the base writer instance for the current worker thread, creates it if necessary.
+
+        :return: the base writer
+        """
+        result = getattr(self._worker_local, "writer", None)
+        if result is None:
+            result = self._create_base_writer()
+            self._worker_local.writer = result
+            with self._worker_lock:
+                self._worker_writers.append(result)
+        return result
+
+    def _member_name(self, item, as_bytes: bool) -> str:
+        """
+        Generates the name of the zip file member for the item.
+
+        :param item: the spectrum/sample data to generate the name for
+        :param as_bytes: whether to write as str or bytes
+        :type as_bytes: bool
+        :return: the name
+        :rtype: str
+        """
+        if isinstance(item, Spectrum2D):
+            name = item.spectrum_name
+        elif isinstance(item, SampleData):
+            name = item.sampledata_name
+        else:
+            raise Exception("Unhandled data type: %s" % str(type(item)))
+        if self.extension is not None:
+            ext = self.extension
+        elif isinstance(self._writer, DefaultExtensionWriter):
+            ext = self._writer.default_extension
+        else:
+            if as_bytes:
+                ext = DEFAULT_BINARY_EXT
+            else:
+                ext = DEFAULT_TEXT_EXT
+            self.logger().warning("Base writer does not have a default extension and no explicit extension specified, falling back on '%s' as extension!" % ext)
+        return os.path.splitext(name)[0] + ext
+
+    def _serialize(self, writer, item, fp, as_bytes: bool):
+        """
+        Writes the item to the binary file-like object using the specified base writer.
+
+        :param writer: the direct writer to use
+        :param item: the spectrum/sample data to write
+        :param fp: the binary file-like object to write to
+        :param as_bytes: whether the base writer writes bytes or str
+        :type as_bytes: bool
+        """
+        if not as_bytes:
+            fp = io.TextIOWrapper(fp, encoding="utf-8", newline="")
+        if isinstance(writer, DirectBatchWriter):
+            writer.write_batch_fp([item], fp, as_bytes)
+        elif isinstance(writer, DirectStreamWriter):
+            writer.write_stream_fp(item, fp, as_bytes)
+        else:
+            raise Exception("Unhandled type of direct writer: %s" % str(type(writer)))
+        if not as_bytes:
+            fp.flush()
+            fp.detach()
+
+    def _serialize_member(self, name: str, item, as_bytes: bool) -> tuple:
+        """
+        Serializes the item in a worker thread.
+
+        :param name: the name of the zip file member
+        :type name: str
+        :param item: the spectrum/sample data to write
+        :param as_bytes: whether the base writer writes bytes or str
+        :type as_bytes: bool
+        :return: the tuple of member information and uncompressed data
+        :rtype: tuple
+        """
+        buffer = BytesIO()
+        self._serialize(self._worker_writer(), item, buffer, as_bytes)
+        zinfo = ZipInfo(filename=name, date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = COMPRESSION_TYPE[self.compression]
+        zinfo.external_attr = 0o600 << 16
+        return zinfo, buffer.getvalue()
+
+    def _commit_member(self, serialized):
+        """
+        Compresses the serialized member and adds it to the zip file. Gets executed
+        in the commit thread, which adds the members in the order they were submitted.
+
+        :param serialized: the future of the serialization job
+        """
+        zinfo, data = serialized.result()
+        self.logger().info("Adding to zip file: %s" % zinfo.filename)
+        self._zipfile.writestr(zinfo, data)
+
+    def _commit_pending(self, max_pending: int):
+        """
+        Waits for the members to get added to the zip file, in the order they were submitted,
+        till no more than the specified number of members is pending.
+
+        :param max_pending: the maximum number of members that may remain pending
+        :type max_pending: int
+        """
+        while len(self._pending) > max_pending:
+            self._pending.popleft().result()
 
     def write_stream(self, data):
         """
@@ -163,7 +318,7 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         :param data: the data to write (single record or iterable of records)
         """
         if self._fp is None:
-            self._fp = open(self.session.expand_variables(self.output_file), "wb")
+            self._fp = open(shard_path(self.session.expand_variables(self.output_file), self.session), "wb")
         self.write_stream_fp(data, self._fp, True)
 
     def write_stream_fp(self, data, fp, as_bytes: bool):
@@ -177,33 +332,29 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         """
         self._init_zipfile(fp)
         for item in make_list(data):
-            # name for zip file
-            if isinstance(item, Spectrum2D):
-                name = item.spectrum_name
-            elif isinstance(item, SampleData):
-                name = item.sampledata_name
-            else:
-                raise Exception("Unhandled data type: %s" % str(type(item)))
-            if self.extension is not None:
-                ext = self.extension
-            elif isinstance(self._writer, DefaultExtensionWriter):
-                ext = self._writer.default_extension
-            else:
-                if as_bytes:
-                    ext = DEFAULT_BINARY_EXT
-                else:
-                    ext = DEFAULT_TEXT_EXT
-                self.logger().warning("Base writer does not have a default extension and no explicit extension specified, falling back on '%s' as extension!" % ext)
-            name = os.path.splitext(name)[0] + ext
+            name = self._member_name(item, as_bytes)
+
+            # serialize in worker threads, compress and add in commit thread
+            # (compression releases the GIL, i.e., it runs concurrently with the serialization)
+            if self.num_workers > 1:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+                    self._committer = ThreadPoolExecutor(max_workers=1)
+                serialized = self._executor.submit(self._serialize_member, name, item, as_bytes)
+                self._pending.append(self._committer.submit(self._commit_member, serialized))
+                self._commit_pending(2 * self.num_workers)
+                continue
+
+            # write straight into zip file
+            if self.streaming:
+                self.logger().info("Streaming to zip file: %s" % name)
+                with self._zipfile.open(name, mode="w", force_zip64=self.force_zip64) as member:
+                    self._serialize(self._writer, item, member, as_bytes)
+                continue
 
             # write to buffer
             buffer = BytesIO()
-            if isinstance(self._writer, DirectBatchWriter):
-                self._writer.write_batch_fp(data, buffer, as_bytes)
-            elif isinstance(self._writer, DirectStreamWriter):
-                self._writer.write_stream_fp(data, buffer, as_bytes)
-            else:
-                raise Exception("Unhandled type of direct writer: %s" % str(type(self._writer)))
+            self._serialize(self._writer, item, buffer, as_bytes)
 
             # write data to zip file
             self._zipfile.writestr(name, buffer.getvalue())
@@ -213,9 +364,25 @@ class ZipWriter(StreamWriter, DirectStreamWriter, DefaultExtensionWriter, Variab
         Finishes the processing, e.g., for closing files or databases.
         """
         super().finalize()
-        if self._zipfile is not None:
-            self._zipfile.close()
-            self._zipfile = None
-        if self._fp is not None:
-            self._fp.close()
-            self._fp = None
+        try:
+            if (self._pending is not None) and (self._zipfile is not None):
+                self._commit_pending(0)
+        finally:
+            if self._committer is not None:
+                self._committer.shutdown(cancel_futures=True)
+                self._committer = None
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            self._pending = None
+            if self._worker_writers is not None:
+                for writer in self._worker_writers:
+                    if isinstance(writer, Initializable):
+                        writer.finalize()
+                self._worker_writers = None
+            if self._zipfile is not None:
+                self._zipfile.close()
+                self._zipfile = None
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
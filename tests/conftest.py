@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# use the sources of this repository, the package does not have to be installed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# without installing the package, its class lister is not registered via the entry points
+os.environ.setdefault("SDC_CLASS_LISTERS", "sdc.class_lister")
+
+NUM_SPECTRA = 12
+""" the number of spectra to generate. """
+
+NUM_WAVES = 50
+""" the number of wave numbers per spectrum. """
+
+
+@pytest.fixture
+def spectra():
+    """
+    Generates the spectra to use as input.
+
+    :return: the dictionary of sample ID and tuple of wave numbers and amplitudes
+    :rtype: dict
+    """
+    rnd = np.random.RandomState(42)
+    waves = [float(1000 + 2 * i) for i in range(NUM_WAVES)]
+    result = dict()
+    for i in range(NUM_SPECTRA):
+        amplitudes = [round(float(x), 6) for x in rnd.random_sample(NUM_WAVES)]
+        result["s%03d" % i] = (waves, amplitudes)
+    return result
+
+
+@pytest.fixture
+def spectra_dir(tmp_path, spectra):
+    """
+    Writes the spectra as ASCII XY files (one file per sample ID) into a directory.
+
+    :return: the directory
+    :rtype: str
+    """
+    result = tmp_path / "input"
+    result.mkdir()
+    for sample_id, (waves, amplitudes) in spectra.items():
+        with open(result / ("%s.txt" % sample_id), "w") as fp:
+            for wave, amplitude in zip(waves, amplitudes):
+                fp.write("%s;%s\n" % (str(wave), str(amplitude)))
+    return str(result)
@@ -0,0 +1,154 @@
+import json
+import os
+
+import pytest
+
+from sdc.api import load_checkpoint, save_checkpoint
+from sdc.tool.convert import main as convert_main
+
+CRASH_AT = None
+""" the sample ID at which the pipeline fails, None to process all. """
+
+
+def crash(data):
+    """
+    Simulates a crash of the pipeline when encountering the sample ID stored in CRASH_AT.
+
+    :param data: the spectrum container(s) to process
+    :return: the unchanged container(s)
+    """
+    items = data if isinstance(data, list) else [data]
+    for item in items:
+        if item.spectrum.id == CRASH_AT:
+            raise Exception("Simulated crash at: %s" % CRASH_AT)
+    return data
+
+
+def convert(spectra_dir: str, output: str, checkpoint: str, interval: int, resume: bool = False):
+    """
+    Converts the spectra into JSON Lines files, using a checkpoint.
+
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :param output: the output directory
+    :type output: str
+    :param checkpoint: the checkpoint file
+    :type checkpoint: str
+    :param interval: the number of records after which to store a checkpoint
+    :type interval: int
+    :param resume: whether to resume from the checkpoint
+    :type resume: bool
+    """
+    args = ["--checkpoint", checkpoint, "--checkpoint_interval", str(interval)]
+    if resume:
+        args.append("--resume")
+    args.extend([
+        "from-asciixy", "-i", os.path.join(spectra_dir, "*.txt"),
+        "pyfunc-filter", "-f", "%s:crash" % __name__,
+        "spectrum-to-sampledata",
+        "to-json-sd", "--jsonl", "-o", output, "--lines_per_file", "4",
+    ])
+    convert_main(args)
+
+
+def sample_ids(output: str) -> list:
+    """
+    Returns the sample IDs stored in the JSON Lines files.
+
+    :param output: the directory with the JSON Lines files
+    :type output: str
+    :return: the sample IDs, in order
+    :rtype: list
+    """
+    result = []
+    for f in sorted(os.listdir(output)):
+        with open(os.path.join(output, f)) as fp:
+            result.extend([json.loads(line)["Sample ID"] for line in fp])
+    return result
+
+
+@pytest.mark.parametrize("interval", [1, 3, 5])
+def test_resume(tmp_path, monkeypatch, spectra, spectra_dir, interval):
+    output = str(tmp_path / "output")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+
+    monkeypatch.setattr(__import__(__name__), "CRASH_AT", "s007")
+    with pytest.raises(SystemExit):
+        convert(spectra_dir, output, checkpoint, interval)
+    assert os.path.exists(checkpoint)
+    assert len(sample_ids(output)) <= 7
+
+    # output written after the last checkpoint must not get duplicated
+    monkeypatch.setattr(__import__(__name__), "CRASH_AT", None)
+    convert(spectra_dir, output, checkpoint, interval, resume=True)
+    assert not os.path.exists(checkpoint)
+    assert sample_ids(output) == sorted(spectra)
+
+
+def test_resume_without_checkpoint(tmp_path, spectra, spectra_dir):
+    output = str(tmp_path / "output")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+    convert(spectra_dir, output, checkpoint, 1, resume=True)
+    assert not os.path.exists(checkpoint)
+    assert sample_ids(output) == sorted(spectra)
+
+
+def test_resume_skips_consumed_inputs(tmp_path, monkeypatch, spectra, spectra_dir):
+    output = str(tmp_path / "output")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+
+    monkeypatch.setattr(__import__(__name__), "CRASH_AT", "s007")
+    with pytest.raises(SystemExit):
+        convert(spectra_dir, output, checkpoint, 2)
+
+    # the files before the one being read at the time of the checkpoint must not get read again
+    current = os.path.basename(load_checkpoint(checkpoint)["input"])
+    for f in os.listdir(spectra_dir):
+        if f < current:
+            os.remove(os.path.join(spectra_dir, f))
+
+    monkeypatch.setattr(__import__(__name__), "CRASH_AT", None)
+    convert(spectra_dir, output, checkpoint, 2, resume=True)
+    assert sample_ids(output) == sorted(spectra)
+
+
+def store_checkpoint(path: str, spectra_dir: str, reads: int):
+    """
+    Stores a checkpoint that points to the specified position in the sorted input files.
+
+    :param path: the checkpoint file
+    :type path: str
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :param reads: the number of files that have been read completely
+    :type reads: int
+    """
+    save_checkpoint(path, {
+        "version": 1, "args": None, "reads": reads, "records": 0, "count": reads,
+        "input": os.path.join(spectra_dir, sorted(os.listdir(spectra_dir))[reads]),
+        "filters": dict(), "writer": None, "timestamp": 0,
+    })
+
+
+def test_resume_refuses_writer_without_checkpoints(tmp_path, spectra_dir):
+    output = str(tmp_path / "spectra.db")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+    store_checkpoint(checkpoint, spectra_dir, 5)
+    # the database would get recreated, losing the records written before the checkpoint
+    with pytest.raises(SystemExit):
+        convert_main(["--checkpoint", checkpoint, "--resume",
+                      "from-asciixy", "-i", os.path.join(spectra_dir, "*.txt"),
+                      "to-sqlite", "-o", output])
+    assert os.path.exists(checkpoint)
+
+
+def test_resume_file_per_record(tmp_path, spectra, spectra_dir):
+    output = str(tmp_path / "output")
+    checkpoint = str(tmp_path / "checkpoint.pkl")
+    store_checkpoint(checkpoint, spectra_dir, 5)
+    convert_main(["--checkpoint", checkpoint, "--resume",
+                  "from-asciixy", "-i", os.path.join(spectra_dir, "*.txt"),
+                  "to-asciixy", "-o", output])
+    assert not os.path.exists(checkpoint)
+    # only the inputs from the checkpoint onwards get read
+    assert sorted(os.listdir(output)) == sorted(os.listdir(spectra_dir))[5:]
@@ -0,0 +1,56 @@
+import gzip
+import os
+import shutil
+
+import pytest
+
+from sdc.api import detect_compression
+from utils import read_spectra, write_spectra, assert_spectra
+
+EXTENSIONS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zstd": ".zst"}
+
+
+@pytest.mark.parametrize("compression", ["gzip", "bz2", "xz", "zstd"])
+def test_round_trip(tmp_path, spectra, spectra_dir, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    ext = EXTENSIONS[compression]
+    output = str(tmp_path / "compressed")
+    write_spectra(spectra_dir, ("to-asciixy", {"output": output, "compression": compression}))
+    assert sorted(os.listdir(output)) == ["%s.txt%s" % (x, ext) for x in sorted(spectra)]
+    assert_spectra(spectra, read_spectra(("from-asciixy", {"input": os.path.join(output, "*" + ext)})))
+    assert_spectra(spectra, read_spectra(("from-asciixy", {"input": os.path.join(output, "*" + ext), "prefetch": 4})))
+
+
+def test_single_file(tmp_path, spectra, spectra_dir):
+    output = str(tmp_path / "spectra.arff.gz")
+    write_spectra(spectra_dir, ("to-arff", {"output": output, "compression": "gzip"}))
+    with gzip.open(output, "rt") as fp:
+        assert fp.readline().upper().startswith("@RELATION")
+    actual = read_spectra(("from-arff", {"input": output}))
+    assert [x[0] for x in actual] == sorted(spectra)
+
+
+def test_detect(tmp_path):
+    path = str(tmp_path / "data.txt")
+    with gzip.open(path, "wt") as fp:
+        fp.write("1;2\n")
+    assert detect_compression(path + ".gz") == "gzip"
+    # the content only gets inspected on request
+    assert detect_compression(path) is None
+    assert detect_compression(path, sniff=True) == "gzip"
+
+
+@pytest.mark.parametrize("prefetch", [0, 4])
+def test_sniff(tmp_path, spectra, spectra_dir, prefetch):
+    compressed = str(tmp_path / "compressed")
+    write_spectra(spectra_dir, ("to-asciixy", {"output": compressed, "compression": "gzip"}))
+    # strip the extension
+    output = str(tmp_path / "sniff")
+    os.makedirs(output)
+    for f in os.listdir(compressed):
+        shutil.copy(os.path.join(compressed, f), os.path.join(output, f[:-len(".gz")]))
+    reader = ("from-asciixy", {"input": os.path.join(output, "*.txt"), "prefetch": prefetch, "sniff_compression": True})
+    assert_spectra(spectra, read_spectra(reader))
+    with pytest.raises(Exception):
+        read_spectra(("from-asciixy", {"input": os.path.join(output, "*.txt"), "prefetch": prefetch}))
@@ -0,0 +1,26 @@
+import pytest
+
+from utils import read_spectra, write_spectra, assert_spectra
+
+pytest.importorskip("h5py")
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"compression": "gzip", "chunk_size": 5},
+    {"compression": "lzf"},
+])
+def test_round_trip(tmp_path, spectra, spectra_dir, options):
+    output = str(tmp_path / "spectra.h5")
+    write_spectra(spectra_dir, ("to-hdf5", dict(output=output, **options)))
+    assert_spectra(spectra, read_spectra(("from-hdf5", {"input": output})))
+
+
+def test_append(tmp_path, spectra, spectra_dir):
+    output = str(tmp_path / "spectra.h5")
+    write_spectra(spectra_dir, ("to-hdf5", {"output": output}))
+    write_spectra(spectra_dir, ("to-hdf5", {"output": output, "append": True}))
+    actual = read_spectra(("from-hdf5", {"input": output}))
+    assert len(actual) == 2 * len(spectra)
+    assert_spectra(spectra, actual[:len(spectra)])
+    assert_spectra(spectra, actual[len(spectra):])
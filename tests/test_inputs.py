@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from sdc.api import locate_input_files
+
+
+def consume(inputs) -> list:
+    """
+    Consumes all the input files.
+
+    :param inputs: the input files to consume
+    :type inputs: InputFiles
+    :return: the file names
+    :rtype: list
+    """
+    result = []
+    while not inputs.is_empty():
+        result.append(os.path.basename(inputs.pop()))
+    return result
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_resume_from(spectra, spectra_dir, lazy):
+    files = consume(locate_input_files(os.path.join(spectra_dir, "*.txt"), resume_from="*/s005.txt", lazy=lazy))
+    assert files[0] == "s005.txt"
+    # lazy enumeration returns the files in directory order
+    if not lazy:
+        assert files == ["%s.txt" % x for x in sorted(spectra) if x >= "s005"]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_resume_from_not_found(spectra, spectra_dir, lazy, capsys, caplog):
+    files = consume(locate_input_files(os.path.join(spectra_dir, "*.txt"), resume_from="*/missing.txt", lazy=lazy))
+    assert sorted(files) == sorted(["%s.txt" % x for x in spectra])
+    assert "missing.txt" in (capsys.readouterr().out + caplog.text)
@@ -0,0 +1,33 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from sdc.tool.convert import main as convert_main
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_round_trip(tmp_path, spectra, spectra_dir, compression):
+    output = str(tmp_path / "jsonl")
+    convert_main(["from-asciixy", "-i", os.path.join(spectra_dir, "*.txt"), "spectrum-to-sampledata",
+                  "to-json-sd", "--jsonl", "-o", output, "--lines_per_file", "5", "--compression", compression])
+    files = sorted(os.listdir(output))
+    assert len(files) == 3
+    if compression == "gzip":
+        assert all([f.endswith(".jsonl.gz") for f in files])
+
+    # read back and write uncompressed into a single file
+    copy = str(tmp_path / "copy")
+    convert_main(["from-json-sd", "--jsonl", "-i", os.path.join(output, "*"), "to-json-sd", "--jsonl", "-o", copy])
+    with open(os.path.join(copy, "sampledata.jsonl")) as fp:
+        records = [json.loads(line) for line in fp]
+    assert [x["Sample ID"] for x in records] == sorted(spectra)
+
+    # compare with the raw content
+    lines = []
+    for f in files:
+        path = os.path.join(output, f)
+        with (gzip.open(path, "rt") if f.endswith(".gz") else open(path)) as fp:
+            lines.extend([json.loads(line) for line in fp])
+    assert lines == records
@@ -0,0 +1,45 @@
+import logging
+import os
+import time
+
+import pytest
+from seppl import Session
+
+from sdc.api import Pipeline
+from sdc.writer import MultiWriter
+
+
+def test_concurrent(tmp_path, spectra, spectra_dir):
+    outputs = [str(tmp_path / "out1"), str(tmp_path / "out2")]
+    writer = ("to-multi", {"writer": ["to-asciixy -o %s" % x for x in outputs], "concurrent": True, "queue_size": 2})
+    with Pipeline(reader=("from-asciixy", {"input": os.path.join(spectra_dir, "*.txt")}), writer=writer) as pipeline:
+        pipeline.run()
+    for output in outputs:
+        assert sorted(os.listdir(output)) == sorted(os.listdir(spectra_dir))
+
+
+def test_concurrent_error_is_sticky(tmp_path):
+    writer = MultiWriter(writers=["to-asciixy -o %s" % str(tmp_path / "out")], concurrent=True)
+    writer.session = Session(logger=logging.getLogger("test"))
+    writer.initialize()
+    written = []
+
+    def fail(data):
+        if len(written) == 1:
+            raise Exception("Simulated failure")
+        written.append(data)
+
+    writer._writers[0].write_stream = fail
+    writer.write_stream("first")
+    writer.write_stream("second")
+    # wait for the worker thread to process the items
+    for _ in range(100):
+        if writer._error is not None:
+            break
+        time.sleep(0.01)
+    for i in range(3):
+        with pytest.raises(Exception, match="Simulated failure"):
+            writer.write_stream("next")
+    with pytest.raises(Exception, match="Simulated failure"):
+        writer.finalize()
+    assert written == ["first"]
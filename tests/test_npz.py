@@ -0,0 +1,15 @@
+import pytest
+
+from utils import read_spectra, write_spectra, assert_spectra
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"compressed": True},
+    {"dtype": "float32"},
+])
+def test_round_trip(tmp_path, spectra, spectra_dir, options):
+    output = str(tmp_path / "spectra.npz")
+    write_spectra(spectra_dir, ("to-npz", dict(output=output, **options)))
+    assert_spectra(spectra, read_spectra(("from-npz", {"input": output})))
+    assert_spectra(spectra, read_spectra(("from-npz", {"input": output, "no_mmap": True})))
@@ -0,0 +1,38 @@
+import logging
+
+from seppl import Session
+
+from sdc.api import SampleDataReader
+
+
+class FileReader(SampleDataReader):
+    """
+    Reader that reads a single file, without keeping track of any input files.
+    """
+
+    def name(self) -> str:
+        return "from-file"
+
+    def description(self) -> str:
+        return "Reads a single file."
+
+    def read(self):
+        with self._open_input(self.session.current_input) as fp:
+            yield fp.read()
+
+    def has_finished(self) -> bool:
+        return True
+
+
+def test_prefetch_without_inputs(tmp_path):
+    path = str(tmp_path / "data.txt")
+    with open(path, "w") as fp:
+        fp.write("content")
+    reader = FileReader(prefetch=2)
+    reader.session = Session(logger=logging.getLogger("test"))
+    reader.initialize()
+    try:
+        reader.session.current_input = path
+        assert list(reader.read()) == ["content"]
+    finally:
+        reader.finalize()
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import pytest
+
+from sdc.api import Pipeline, parse_shard, shard_root, shard_key, in_shard
+
+COUNT = 3
+""" the number of shards to use. """
+
+
+def read_shard(spectra_dir: str, shard: str) -> list:
+    """
+    Reads the spectra of the shard from the directory.
+
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :param shard: the shard to read (INDEX/COUNT)
+    :type shard: str
+    :return: the sample IDs
+    :rtype: list
+    """
+    reader = ("from-asciixy", {"input": os.path.join(spectra_dir, "*.txt"), "shard": shard})
+    with Pipeline(reader=reader) as pipeline:
+        return [x.spectrum.id for x in pipeline.run()]
+
+
+def test_parse_shard():
+    assert parse_shard(None) is None
+    assert parse_shard("") is None
+    assert parse_shard("2/8") == (2, 8)
+    for shard in ["0/8", "9/8", "1", "a/b"]:
+        with pytest.raises(Exception):
+            parse_shard(shard)
+
+
+def test_shard_key(tmp_path):
+    root = str(tmp_path)
+    os.makedirs(os.path.join(root, "a", "b"))
+    assert shard_root(os.path.join(root, "a", "*", "*.txt")) == os.path.join(root, "a")
+    assert shard_root(os.path.join(root, "a")) == os.path.join(root, "a")
+    assert shard_root(os.path.join(root, "a", "x.txt")) == os.path.join(root, "a")
+    roots = [root, os.path.join(root, "a")]
+    # relative to the most specific root
+    assert shard_key(os.path.join(root, "a", "b", "x.txt"), roots) == os.path.join("b", "x.txt")
+    assert shard_key(os.path.join(root, "c", "x.txt"), roots) == os.path.join("c", "x.txt")
+    # outside of the roots
+    assert shard_key("/elsewhere/x.txt", roots) == "x.txt"
+
+
+def test_partition(spectra, spectra_dir):
+    shards = [read_shard(spectra_dir, "%d/%d" % (i, COUNT)) for i in range(1, COUNT + 1)]
+    ids = [x for shard in shards for x in shard]
+    assert sorted(ids) == sorted(spectra)
+    assert len(set(ids)) == len(ids)
+    for shard in shards:
+        assert shard == sorted(shard)
+    for i, shard in enumerate(shards):
+        for sample_id in shard:
+            assert in_shard(os.path.join(spectra_dir, sample_id + ".txt"), (i + 1, COUNT), [spectra_dir])
+
+
+def test_partition_independent_of_location(tmp_path, spectra_dir):
+    other = str(tmp_path / "mounted" / "elsewhere")
+    shutil.copytree(spectra_dir, other)
+    for i in range(1, COUNT + 1):
+        shard = "%d/%d" % (i, COUNT)
+        assert read_shard(spectra_dir, shard) == read_shard(other, shard)
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from sdc.api import Pipeline, Spectrum2D, GroupSpill, arrays_to_spectrum
+
+NUM_ITEMS = 60
+""" the number of spectra to generate, spread across three groups. """
+
+NUM_WAVES = 4000
+""" the number of wave numbers per spectrum, the data exceeds 1MB. """
+
+
+def generate() -> list:
+    """
+    Generates the spectra, with the group stored in the sample data.
+
+    :return: the spectrum containers
+    :rtype: list
+    """
+    rnd = np.random.RandomState(42)
+    waves = np.arange(NUM_WAVES, dtype=float)
+    result = []
+    for i in range(NUM_ITEMS):
+        sp = arrays_to_spectrum(rnd.random_sample(NUM_WAVES), waves, sample_id="s%03d" % i,
+                                sample_data=json.dumps({"group": "abc"[i % 3]}))
+        result.append(Spectrum2D(spectrum_name="s%03d" % i, spectrum=sp))
+    return result
+
+
+def center(data: list, options: dict) -> list:
+    """
+    Centers the spectra per group.
+
+    :param data: the spectrum containers to filter
+    :type data: list
+    :param options: the options for the filter
+    :type options: dict
+    :return: the tuples of sample ID and amplitudes
+    :rtype: list
+    """
+    with Pipeline(filters=[("center", options)]) as pipeline:
+        return [(x.spectrum.id, list(x.spectrum.amplitudes)) for x in pipeline.process(data)]
+
+
+def test_group_spill(tmp_path):
+    spill = GroupSpill(1000, spill_dir=str(tmp_path))
+    try:
+        for i in range(20):
+            spill.add(i % 2, np.full(10, i))
+            if i == 0:
+                assert not spill.spilled
+        assert spill.spilled
+        assert spill.groups == [0, 1]
+        assert spill.count(1) == 10
+        assert [int(x[0]) for x in spill.load(1)] == list(range(1, 20, 2))
+        assert [int(x[0]) for x in spill.load(0)] == list(range(0, 20, 2))
+        with pytest.raises(KeyError):
+            spill.load(0)
+    finally:
+        spill.close()
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+def test_in_memory():
+    spill = GroupSpill(1024 * 1024)
+    for i in range(5):
+        spill.add("a", i)
+    assert not spill.spilled
+    assert spill.load("a") == list(range(5))
+    spill.close()
+
+
+def test_spilled_batches(tmp_path, monkeypatch):
+    spilled = []
+    spill = GroupSpill._spill
+    monkeypatch.setattr(GroupSpill, "_spill", lambda self: spilled.append(True) or spill(self))
+    expected = center(generate(), {"metadata_key": "group"})
+    actual = center(generate(), {"metadata_key": "group", "spill_threshold": 1, "spill_dir": str(tmp_path)})
+    assert spilled == [True]
+    assert [x[0] for x in actual] == [x[0] for x in expected]
+    np.testing.assert_allclose([x[1] for x in actual], [x[1] for x in expected])
+    assert len(list(tmp_path.iterdir())) == 0
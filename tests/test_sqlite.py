@@ -0,0 +1,47 @@
+import pytest
+from wai.spectralio.api import Spectrum as WaiSpectrum
+
+from sdc.api import Pipeline
+from utils import read_spectra, write_spectra, assert_spectra
+
+
+def write_sample_data(output: str, sample_data: list):
+    """
+    Writes spectra with the specified sample data to the database.
+
+    :param output: the database to write to
+    :type output: str
+    :param sample_data: the list of sample data dictionaries, one per spectrum
+    :type sample_data: list
+    """
+    spectra = []
+    for i, data in enumerate(sample_data):
+        sp = WaiSpectrum(waves=[1.0, 2.0], amplitudes=[0.1, 0.2], sample_data=data)
+        sp.id = "s%d" % i
+        spectra.append(sp)
+    with Pipeline(writer=("to-sqlite", {"output": output, "batch_size": 1})) as pipeline:
+        pipeline.process(spectra)
+
+
+def test_round_trip(tmp_path, spectra, spectra_dir):
+    output = str(tmp_path / "spectra.db")
+    write_spectra(spectra_dir, ("to-sqlite", {"output": output, "batch_size": 5}))
+    assert_spectra(spectra, read_spectra(("from-sqlite", {"input": output, "fetch_size": 5})))
+
+
+def test_sample_data(tmp_path):
+    output = str(tmp_path / "spectra.db")
+    write_sample_data(output, [{"a": 1, "b": "x"}, {"a": 2, "c": 3.5}])
+    with Pipeline(reader=("from-sqlite", {"input": output})) as pipeline:
+        sample_data = [x.spectrum.sample_data for x in pipeline.run()]
+    assert sample_data == [{"a": 1, "b": "x"}, {"a": 2, "c": 3.5}]
+
+
+@pytest.mark.parametrize("sample_data", [
+    [{"_id": 1}],
+    [{"_Sample_ID": "x"}],
+    [{"value": 1}, {"Value": 2}],
+])
+def test_column_clash(tmp_path, sample_data):
+    with pytest.raises(Exception, match="clashes with"):
+        write_sample_data(str(tmp_path / "spectra.db"), sample_data)
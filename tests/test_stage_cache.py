@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+
+from sdc.api import Pipeline, StageCache, cache_key
+
+
+def load(spectra_dir: str) -> list:
+    """
+    Loads the spectra from the directory.
+
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :return: the spectrum containers
+    :rtype: list
+    """
+    with Pipeline(reader=("from-asciixy", {"input": os.path.join(spectra_dir, "*.txt")})) as pipeline:
+        return pipeline.run()
+
+
+def apply(data: list, filter_) -> tuple:
+    """
+    Applies the filter to the data.
+
+    :param data: the spectrum containers to filter
+    :type data: list
+    :param filter_: the filter specification (see Pipeline)
+    :return: the tuple of filtered amplitudes and the filter's cache
+    :rtype: tuple
+    """
+    with Pipeline(filters=[filter_]) as pipeline:
+        output = pipeline.process(data)
+        cache = pipeline.filters[0]._cache
+    return np.array([x.spectrum.amplitudes for x in output]), cache
+
+
+def test_hits(tmp_path, spectra_dir):
+    cache_dir = str(tmp_path / "cache")
+    data = load(spectra_dir)
+    expected, _ = apply(data, "log")
+
+    output, cache = apply(data, ("log", {"cache_dir": cache_dir}))
+    assert (cache.hits, cache.misses) == (0, 1)
+    np.testing.assert_allclose(output, expected)
+
+    output, cache = apply(data, ("log", {"cache_dir": cache_dir}))
+    assert (cache.hits, cache.misses) == (1, 0)
+    np.testing.assert_allclose(output, expected)
+
+    # options that do not influence the output, eg the logging level, get ignored
+    output, cache = apply(data, ("log", {"cache_dir": cache_dir, "logging_level": "INFO"}))
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_misses(tmp_path, spectra_dir):
+    cache_dir = str(tmp_path / "cache")
+    data = load(spectra_dir)
+    apply(data, ("log", {"cache_dir": cache_dir}))
+
+    # different input
+    _, cache = apply(data[:-1], ("log", {"cache_dir": cache_dir}))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # different filter
+    _, cache = apply(data, ("center", {"cache_dir": cache_dir}))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_eviction(tmp_path):
+    cache = StageCache(str(tmp_path), max_size=1)
+    value = np.zeros(100000)
+    for i in range(3):
+        cache.put(cache_key(i), value)
+        os.utime(os.path.join(str(tmp_path), cache_key(i) + ".sdcc"), (i, i))
+    cache.evict()
+    assert cache.size() <= 1024 * 1024
+    assert cache.get(cache_key(0)) is None
+    np.testing.assert_array_equal(cache.get(cache_key(2)), value)
+
+
+def test_size_tracking(tmp_path, monkeypatch):
+    scans = []
+    entries = StageCache._entries
+    monkeypatch.setattr(StageCache, "_entries", lambda self: scans.append(True) or entries(self))
+    cache = StageCache(str(tmp_path), max_size=1)
+    value = np.zeros(50000)
+    for i in range(2):
+        cache.put(cache_key(i), value)
+    cache.put(cache_key(0), value)
+    assert len(scans) == 1
+    assert cache._size == cache.size()
+
+    # exceeding the limit scans the directory to evict the least recently used outputs
+    cache.put(cache_key(2), value)
+    cache.put(cache_key(3), value)
+    assert len(scans) > 2
+    assert cache._size == cache.size() <= 1024 * 1024
+
+
+def test_stream(tmp_path, spectra_dir):
+    cache_dir = str(tmp_path / "cache")
+    data = load(spectra_dir)
+    with Pipeline(filters=[("log", {"cache_dir": cache_dir})]) as pipeline:
+        filter_ = pipeline.filters[0]
+        for item in data:
+            filter_.process(item)
+        assert (filter_._cache.hits, filter_._cache.misses) == (0, 0)
+    assert len(os.listdir(cache_dir)) == 0
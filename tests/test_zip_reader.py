@@ -0,0 +1,49 @@
+import os
+from zipfile import ZipFile, ZIP_DEFLATED
+
+import pytest
+
+from utils import read_spectra, assert_spectra
+
+
+def create_zip(spectra_dir: str, output: str) -> str:
+    """
+    Stores the ASCII XY files from the directory in a zip file.
+
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :param output: the zip file to create
+    :type output: str
+    :return: the zip file
+    :rtype: str
+    """
+    with ZipFile(output, "w", compression=ZIP_DEFLATED) as zipfile:
+        for f in sorted(os.listdir(spectra_dir)):
+            zipfile.write(os.path.join(spectra_dir, f), arcname=os.path.join("spectra", f))
+    return output
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+@pytest.mark.parametrize("stream_threshold", [-1, 0])
+def test_read(tmp_path, spectra, spectra_dir, num_workers, stream_threshold):
+    path = create_zip(spectra_dir, str(tmp_path / "spectra.zip"))
+    reader = ("from-zip", {"input": path, "reader": "from-asciixy", "num_workers": num_workers,
+                           "stream_threshold": stream_threshold})
+    assert_spectra(spectra, read_spectra(reader))
+
+
+def test_read_pattern(tmp_path, spectra, spectra_dir):
+    path = create_zip(spectra_dir, str(tmp_path / "spectra.zip"))
+    reader = ("from-zip", {"input": path, "reader": "from-asciixy", "pattern": "*/s00*.txt", "num_workers": 2})
+    expected = {k: v for k, v in spectra.items() if k.startswith("s00")}
+    assert_spectra(expected, read_spectra(reader))
+
+
+def test_read_modified(tmp_path, spectra, spectra_dir):
+    path = create_zip(spectra_dir, str(tmp_path / "spectra.zip"))
+    assert_spectra(spectra, read_spectra(("from-zip", {"input": path, "reader": "from-asciixy"})))
+    # replacing the archive must not return the content of the previous one
+    os.remove(os.path.join(spectra_dir, sorted(os.listdir(spectra_dir))[0]))
+    create_zip(spectra_dir, path)
+    expected = {k: v for k, v in sorted(spectra.items())[1:]}
+    assert_spectra(expected, read_spectra(("from-zip", {"input": path, "reader": "from-asciixy", "num_workers": 2})))
@@ -0,0 +1,28 @@
+import os
+from zipfile import ZipFile
+
+import pytest
+
+from utils import read_spectra, write_spectra, assert_spectra
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+@pytest.mark.parametrize("compression", ["stored", "deflated", "bzip2", "lzma"])
+def test_write(tmp_path, spectra, spectra_dir, num_workers, compression):
+    output = str(tmp_path / "spectra.zip")
+    write_spectra(spectra_dir, ("to-zip", {"output": output, "writer": "to-asciixy", "compression": compression,
+                                           "num_workers": num_workers}))
+    with ZipFile(output) as zipfile:
+        assert zipfile.testzip() is None
+        assert [os.path.splitext(x)[0] for x in zipfile.namelist()] == sorted(spectra)
+    assert_spectra(spectra, read_spectra(("from-zip", {"input": output, "reader": "from-asciixy"})))
+
+
+@pytest.mark.parametrize("force_zip64", [False, True])
+def test_write_streaming(tmp_path, spectra, spectra_dir, force_zip64):
+    output = str(tmp_path / "spectra.zip")
+    write_spectra(spectra_dir, ("to-zip", {"output": output, "writer": "to-asciixy", "compression": "deflated",
+                                           "streaming": True, "force_zip64": force_zip64}))
+    with ZipFile(output) as zipfile:
+        assert zipfile.testzip() is None
+    assert_spectra(spectra, read_spectra(("from-zip", {"input": output, "reader": "from-asciixy"})))
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from sdc.api import Pipeline
+
+
+def read_spectra(reader) -> list:
+    """
+    Reads the spectra with the reader.
+
+    :param reader: the reader specification (see Pipeline)
+    :return: the list of tuples of sample ID, wave numbers and amplitudes
+    :rtype: list
+    """
+    with Pipeline(reader=reader) as pipeline:
+        return [(x.spectrum.id, list(x.spectrum.waves), list(x.spectrum.amplitudes)) for x in pipeline.run()]
+
+
+def write_spectra(spectra_dir: str, writer):
+    """
+    Reads the spectra from the directory and writes them with the writer.
+
+    :param spectra_dir: the directory with the ASCII XY files
+    :type spectra_dir: str
+    :param writer: the writer specification (see Pipeline)
+    """
+    with Pipeline(reader=("from-asciixy", {"input": os.path.join(spectra_dir, "*.txt")}), writer=writer) as pipeline:
+        pipeline.run()
+
+
+def assert_spectra(expected: dict, actual: list, check_ids: bool = True, rtol: float = 1e-6):
+    """
+    Compares the spectra, in order of their sample IDs.
+
+    :param expected: the expected spectra (sample ID -> tuple of wave numbers and amplitudes)
+    :type expected: dict
+    :param actual: the spectra read back (see read_spectra)
+    :type actual: list
+    :param check_ids: whether to compare the sample IDs as well
+    :type check_ids: bool
+    :param rtol: the relative tolerance for the numbers
+    :type rtol: float
+    """
+    assert len(actual) == len(expected)
+    for sample_id, (sid, waves, amplitudes) in zip(sorted(expected), actual):
+        if check_ids:
+            assert sid == sample_id
+        np.testing.assert_allclose(sorted(waves), expected[sample_id][0], rtol=rtol)
+        order = np.argsort(waves)
+        np.testing.assert_allclose(np.asarray(amplitudes)[order], expected[sample_id][1], rtol=rtol)